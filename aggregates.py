@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+import storage
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Batas default "stok rendah" (Stok Akhir <= batas)
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+
+# ================================
+# HELPER
+# ================================
+
+def _number(value):
+    value = pd.to_numeric(value, errors='coerce')
+    return 0.0 if pd.isna(value) else float(value)
+
+def _lokasi(value):
+    """Lokasi kosong/NaN dikelompokkan sebagai None"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)) or value == "":
+        return None
+    return value
+
+def _empty_state(threshold):
+    return {
+        "threshold": threshold,
+        "total_items": 0,
+        "total_stok": 0.0,
+        "total_masuk": 0.0,
+        "total_keluar": 0.0,
+        "stok_rendah": 0,
+        "lokasi": {},  # lokasi -> {"count": n, "stok": jumlah Stok Akhir}
+    }
+
+def summarize(df, threshold=DEFAULT_LOW_STOCK_THRESHOLD):
+    """Hitung agregat dari frame penuh (vectorized)"""
+    state = _empty_state(threshold)
+    if len(df) == 0:
+        return state
+
+    def column(col):
+        if col not in df.columns:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    stok = column('Stok Akhir')
+    state.update({
+        "total_items": len(df),
+        "total_stok": float(stok.sum()),
+        "total_masuk": float(column('Jumlah Masuk').sum()),
+        "total_keluar": float(column('Jumlah Keluar').sum()),
+        "stok_rendah": int((stok <= threshold).sum()),
+    })
+    if 'Lokasi Penyimpanan' in df.columns:
+        lokasi = df['Lokasi Penyimpanan'].map(_lokasi)
+        grouped = stok.groupby(lokasi, dropna=False, observed=True).agg(['count', 'sum'])
+        state["lokasi"] = {
+            _lokasi(name): {"count": int(row['count']), "stok": float(row['sum'])}
+            for name, row in grouped.iterrows()
+        }
+    return state
+
+# ================================
+# AGGREGATE STORE
+# ================================
+
+class AggregateStore:
+    """Agregat dashboard yang diperbarui incremental dari event backend.
+
+    State disimpan ke file JSON di samping data beserta versi datanya,
+    sehingga proses baru cukup membaca file kecil itu selama versi data
+    belum berubah. Jika event terlewat, state dihitung ulang dari snapshot.
+    """
+
+    def __init__(self, threshold=DEFAULT_LOW_STOCK_THRESHOLD, path=None):
+        self.threshold = threshold
+        self.path = path
+        self._lock = threading.Lock()
+        self._version = None
+        self._state = _empty_state(threshold)
+
+    # -- persistensi --------------------------------------------------
+
+    def _persist(self):
+        if not self.path or self._version is None:
+            return
+        state = dict(self._state)
+        state["lokasi"] = [[name, agg["count"], agg["stok"]] for name, agg in state["lokasi"].items()]
+        version = list(self._version) if isinstance(self._version, tuple) else self._version
+        storage.write_text(self.path, json.dumps({"version": version, "state": state}))
+
+    def _load_persisted(self, version):
+        """Pakai state dari file jika versi dan threshold-nya cocok"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                persisted = json.load(f)
+        except (OSError, ValueError):
+            return False
+        saved_version = persisted.get("version")
+        if isinstance(saved_version, list):
+            saved_version = tuple(saved_version)
+        state = persisted.get("state", {})
+        if saved_version != version or state.get("threshold") != self.threshold:
+            return False
+        state["lokasi"] = {name: {"count": count, "stok": stok} for name, count, stok in state["lokasi"]}
+        self._state = state
+        self._version = version
+        return True
+
+    # -- maintenance --------------------------------------------------
+
+    def _rebuild(self, df, version):
+        self._state = summarize(df, self.threshold)
+        self._version = version
+        self._persist()
+
+    def rebuild(self, df, version):
+        """Hitung ulang seluruh agregat dari snapshot"""
+        with self._lock:
+            self._rebuild(df, version)
+
+    def _account(self, row, sign):
+        """Tambah (sign=1) atau kurangi (sign=-1) kontribusi satu baris"""
+        state = self._state
+        stok = _number(row.get('Stok Akhir'))
+        state["total_items"] += sign
+        state["total_stok"] += sign * stok
+        state["total_masuk"] += sign * _number(row.get('Jumlah Masuk'))
+        state["total_keluar"] += sign * _number(row.get('Jumlah Keluar'))
+        if stok <= self.threshold:
+            state["stok_rendah"] += sign
+
+        name = _lokasi(row.get('Lokasi Penyimpanan'))
+        lokasi = state["lokasi"].setdefault(name, {"count": 0, "stok": 0.0})
+        lokasi["count"] += sign
+        lokasi["stok"] += sign * stok
+        if lokasi["count"] <= 0:
+            del state["lokasi"][name]
+
+    def apply(self, event):
+        """Listener backend: terapkan satu perubahan secara incremental"""
+        with self._lock:
+            if self._version is None or event['prev_version'] != self._version:
+                self._version = None
+                return
+
+            op = event['op']
+            if op == 'insert':
+                self._account(event['row'], 1)
+            elif op == 'update':
+                self._account(event['old_row'], -1)
+                self._account({**event['old_row'], **event['values']}, 1)
+            elif op == 'update_many':
+                for update in event['updates']:
+                    self._account(update['old_row'], -1)
+                    self._account({**update['old_row'], **update['values']}, 1)
+            elif op in ('delete', 'delete_many'):
+                for row in event['old_rows']:
+                    self._account(row, -1)
+            else:
+                self._version = None
+                return
+            self._version = event['version']
+            if not event.get('replayed'):
+                # Commit proses lain sudah disimpan oleh proses penulisnya
+                self._persist()
+
+    # -- query --------------------------------------------------------
+
+    def snapshot(self, df, version):
+        """Agregat untuk versi data ini; O(jumlah lokasi) jika sudah sinkron"""
+        with self._lock:
+            synced = version is not None and (self._version == version or self._load_persisted(version))
+            if not synced:
+                self._rebuild(df, version)
+            state = dict(self._state)
+            state["lokasi"] = {name: dict(agg) for name, agg in self._state["lokasi"].items()}
+            return state
@@ -0,0 +1,514 @@
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import storage
+from inventory import Inventory, argsort, csv_chunks
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# File secrets yang sama dengan yang dibaca Streamlit
+SECRETS_FILE = os.path.join(".streamlit", "secrets.toml")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8601
+
+# Ukuran body request maksimal (byte)
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Koneksi keep-alive ditutup setelah idle sekian detik
+IDLE_TIMEOUT_SECONDS = 30
+# Thread untuk pemanggilan data (pandas / file IO) di luar event loop
+WORKER_THREADS = 4
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Urutan sort seluruh frame yang di-cache (per versi data)
+SORT_CACHE_SIZE = 8
+
+# Kolom yang boleh dikirim lewat API (ID dialokasikan server, Tanggal diisi otomatis)
+WRITABLE_COLUMNS = [col for col in storage.COLUMNS if col not in ("ID", "Tanggal")]
+
+# ================================
+# HELPER
+# ================================
+
+class HTTPError(Exception):
+    """Error yang dikirim ke client sebagai {"error": message}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class Stream:
+    """Response streaming (chunked) dari iterator teks yang dibuat di thread worker"""
+
+    def __init__(self, chunks, content_type, filename=None):
+        self.chunks = chunks
+        self.content_type = content_type
+        self.filename = filename
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f"{type(value).__name__} tidak bisa dijadikan JSON")
+
+def _records(df):
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in storage.plain_rows(df)]
+
+def _int(value, name):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} harus bilangan bulat")
+    if not number.is_integer():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} harus bilangan bulat")
+    return int(number)
+
+def _query_int(query, name, default, low, high):
+    values = query.get(name)
+    if not values:
+        return default
+    return min(max(_int(values[0], name), low), high)
+
+def _item_values(body, required=False):
+    """Validasi kolom item dari body JSON"""
+    if not isinstance(body, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body harus object JSON")
+    unknown = [col for col in body if col not in WRITABLE_COLUMNS]
+    if unknown:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Kolom tidak dikenal: {unknown}")
+    values = dict(body)
+    for col in storage.NUMERIC_COLUMNS:
+        if col in values:
+            values[col] = _int(values[col], col)
+            if values[col] < 0:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"{col} tidak boleh negatif")
+    # Update parsial: Nama Komponen boleh tidak dikirim, tapi tidak boleh dikosongkan
+    if (required or "Nama Komponen" in values) and not str(values.get("Nama Komponen") or "").strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Nama Komponen wajib diisi")
+    if required:
+        for col in WRITABLE_COLUMNS:
+            values.setdefault(col, 0 if col in storage.NUMERIC_COLUMNS else "")
+    return values
+
+def load_settings(path=SECRETS_FILE):
+    """Setting dari secrets.toml Streamlit, di-override environment variable bernama sama"""
+    import tomllib
+
+    settings = {}
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            settings.update(tomllib.load(f))
+    for key in ["DATA_FILE", "BACKUP_FILE", "API_TOKEN", "API_HOST", "STORAGE_BACKEND",
+                "SQLITE_FILE", "ARROW_FILE", "BACKUP_DIR", "METRICS_LOG_FILE", "METRICS_PROMETHEUS_FILE",
+                "SHARED_CACHE_DIR"]:
+        if key in os.environ:
+            settings[key] = os.environ[key]
+    if "API_PORT" in os.environ:
+        settings["API_PORT"] = int(os.environ["API_PORT"])
+    if "METRICS_ENABLED" in os.environ:
+        settings["METRICS_ENABLED"] = os.environ["METRICS_ENABLED"].lower() in ("1", "true", "yes")
+    if "CHANGE_FEED" in os.environ:
+        settings["CHANGE_FEED"] = os.environ["CHANGE_FEED"].lower() in ("1", "true", "yes")
+    return settings
+
+# ================================
+# API SERVER
+# ================================
+
+class ApiServer:
+    """HTTP/1.1 JSON API minimal di atas asyncio (tanpa dependency tambahan).
+
+    Semua endpoint di bawah /api/ kecuali /api/health memerlukan header
+    "Authorization: Bearer <token>". Pemanggilan ke Inventory (pandas dan
+    file IO) dijalankan di thread pool supaya event loop tetap melayani
+    koneksi lain; locking dan cache snapshot ada di backend, jadi API dan
+    UI Streamlit dalam proses yang sama memakai data yang sama.
+    """
+
+    def __init__(self, inventory, token, workers=WORKER_THREADS):
+        if not token:
+            raise ValueError("API_TOKEN wajib diisi untuk menjalankan API")
+        self.inventory = inventory
+        self.token = token
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._sorted = OrderedDict()  # (version, kolom, ascending) -> posisi
+        self._sorted_lock = threading.Lock()
+        self.routes = [
+            ("GET", r"/api/health", self.health, False),
+            ("GET", r"/api/summary", self.summary, True),
+            ("GET", r"/api/items", self.list_items, True),
+            ("POST", r"/api/items", self.add_item, True),
+            ("POST", r"/api/items/bulk-update", self.update_items, True),
+            ("POST", r"/api/items/bulk-delete", self.delete_items, True),
+            ("GET", r"/api/items/(\d+)", self.get_item, True),
+            ("PATCH", r"/api/items/(\d+)", self.update_item, True),
+            ("DELETE", r"/api/items/(\d+)", self.delete_item, True),
+            ("GET", r"/api/movements", self.list_movements, True),
+            ("POST", r"/api/movements", self.record_movements, True),
+            ("GET", r"/api/export\.csv", self.export_csv, True),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler, auth) for method, pattern, handler, auth in self.routes]
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    # -- endpoint -----------------------------------------------------
+
+    async def health(self, request):
+        return HTTPStatus.OK, {"status": "ok"}
+
+    async def summary(self, request):
+        summary = await self._call(self.inventory.summary)
+        summary["lokasi"] = [
+            {"lokasi": name, "count": agg["count"], "stok": agg["stok"]}
+            for name, agg in summary["lokasi"].items()
+        ]
+        return HTTPStatus.OK, summary
+
+    def _sorted_positions(self, df, version, column, ascending):
+        key = (version, column, ascending)
+        with self._sorted_lock:
+            order = self._sorted.get(key)
+            if order is not None:
+                self._sorted.move_to_end(key)
+                return order
+        order = argsort(df[column], ascending)
+        with self._sorted_lock:
+            self._sorted[key] = order
+            while len(self._sorted) > SORT_CACHE_SIZE:
+                self._sorted.popitem(last=False)
+        return order
+
+    def _page(self, term, lokasi, sort, ascending, page, page_size):
+        df, version = self.inventory.snapshot()
+        positions = self.inventory.filter_positions(df, version, term, lokasi)
+        if sort is None:
+            order = np.arange(len(df)) if positions is None else positions
+        elif positions is None:
+            order = self._sorted_positions(df, version, sort, ascending)
+        else:
+            order = positions[argsort(df[sort].take(positions), ascending)]
+        start = (page - 1) * page_size
+        return {
+            "total": int(len(order)),
+            "page": page,
+            "page_size": page_size,
+            "items": _records(df.take(order[start:start + page_size])),
+        }
+
+    async def list_items(self, request):
+        query = request["query"]
+        sort = query.get("sort", [None])[0]
+        if sort is not None and sort not in storage.COLUMNS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Kolom sort tidak dikenal: {sort}")
+        result = await self._call(
+            self._page,
+            query.get("q", [None])[0],
+            query.get("lokasi", [None])[0],
+            sort,
+            query.get("order", ["asc"])[0] != "desc",
+            _query_int(query, "page", 1, 1, 10 ** 9),
+            _query_int(query, "page_size", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE),
+        )
+        return HTTPStatus.OK, result
+
+    def _item(self, item_id):
+        df, version = self.inventory.snapshot()
+        positions = self.inventory.search_index.locate(df, version, [item_id], sort=False)
+        if len(positions) == 0:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Item {item_id} tidak ditemukan")
+        return _records(df.take(positions[:1]))[0]
+
+    async def get_item(self, request, item_id):
+        return HTTPStatus.OK, await self._call(self._item, int(item_id))
+
+    async def add_item(self, request):
+        values = _item_values(request["json"](), required=True)
+        new_id = await self._call(self.inventory.add_item, values)
+        return HTTPStatus.CREATED, {"id": new_id}
+
+    async def update_item(self, request, item_id):
+        values = _item_values(request["json"]())
+        if not await self._call(self.inventory.update_item, int(item_id), values):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Item {item_id} tidak ditemukan")
+        return HTTPStatus.OK, {"updated": 1}
+
+    async def delete_item(self, request, item_id):
+        if not await self._call(self.inventory.delete_item, int(item_id)):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Item {item_id} tidak ditemukan")
+        return HTTPStatus.OK, {"deleted": 1}
+
+    async def update_items(self, request):
+        """Body: {"changes": [{"ID": 1, "Stok Akhir": 5, ...}, ...], "catatan": "..."}"""
+        body = request["json"]()
+        changes = {}
+        for change in body.get("changes", []) if isinstance(body, dict) else []:
+            if not isinstance(change, dict) or "ID" not in change:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Setiap perubahan harus object dengan ID")
+            values = dict(change)
+            item_id = _int(values.pop("ID"), "ID")
+            changes[item_id] = _item_values(values)
+        if not changes:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "changes kosong")
+        updated = await self._call(self.inventory.update_items, changes, body.get("catatan") or "Edit massal (API)")
+        return HTTPStatus.OK, {"updated": updated}
+
+    async def delete_items(self, request):
+        """Body: {"ids": [1, 2, 3]}"""
+        body = request["json"]()
+        ids = [_int(item_id, "ID") for item_id in (body.get("ids", []) if isinstance(body, dict) else [])]
+        if not ids:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "ids kosong")
+        return HTTPStatus.OK, {"deleted": await self._call(self.inventory.delete_items, ids)}
+
+    async def list_movements(self, request):
+        query = request["query"]
+        item_id = query.get("id", [None])[0]
+        movements = await self._call(
+            self.inventory.recent_movements,
+            _query_int(query, "limit", 50, 1, 1000),
+            _int(item_id, "id") if item_id is not None else None,
+        )
+        return HTTPStatus.OK, {"movements": movements}
+
+    async def record_movements(self, request):
+        """Body: satu pergerakan {"id", "masuk", "keluar", "koreksi", "lokasi", "catatan"}
+        atau {"movements": [...]} untuk banyak pergerakan sekaligus.
+
+        Semua pergerakan dicatat dalam satu commit; jika ada ID yang tidak
+        ditemukan tidak ada yang dicatat (404 dengan daftar missing)."""
+        body = request["json"]()
+        items = body.get("movements") if isinstance(body, dict) and "movements" in body else [body]
+        if not isinstance(items, list) or not items:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "movements harus list pergerakan yang tidak kosong")
+        movements = []
+        for item in items:
+            if not isinstance(item, dict) or "id" not in item:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Setiap pergerakan harus object dengan id")
+            movement = {
+                "id": _int(item["id"], "id"),
+                "masuk": _int(item.get("masuk", 0), "masuk"),
+                "keluar": _int(item.get("keluar", 0), "keluar"),
+                "koreksi": _int(item.get("koreksi", 0), "koreksi"),
+                "lokasi": item.get("lokasi"),
+                "catatan": item.get("catatan") or "",
+            }
+            if movement["masuk"] < 0 or movement["keluar"] < 0:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "masuk/keluar tidak boleh negatif")
+            movements.append(movement)
+        recorded, missing = await self._call(self.inventory.record_movements, movements)
+        status = HTTPStatus.NOT_FOUND if missing else HTTPStatus.OK
+        return status, {"recorded": recorded, "missing": missing}
+
+    async def export_csv(self, request):
+        df, _ = await self._call(self.inventory.snapshot)
+        filename = f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return Stream(csv_chunks(df), "text/csv; charset=utf-8", filename)
+
+    # -- HTTP ---------------------------------------------------------
+
+    def _authorized(self, headers):
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self.token.encode())
+
+    async def _dispatch(self, request):
+        path_matched = False
+        for method, pattern, handler, auth in self.routes:
+            match = pattern.match(request["path"])
+            if match is None:
+                continue
+            path_matched = True
+            if method != request["method"]:
+                continue
+            if auth and not self._authorized(request["headers"]):
+                raise HTTPError(HTTPStatus.UNAUTHORIZED, "Token tidak valid")
+            return await handler(request, *match.groups())
+        if path_matched:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Method tidak didukung")
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Endpoint tidak ditemukan")
+
+    async def _read_request(self, reader):
+        line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECONDS)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request line tidak valid")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length tidak valid")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length tidak valid")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body terlalu besar")
+        body = await reader.readexactly(length) if length else b''
+
+        def parse_json():
+            try:
+                return json.loads(body or b'null')
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Body bukan JSON yang valid")
+
+        url = urlsplit(target)
+        keep_alive = headers.get("connection", "").lower() != "close" if version == "HTTP/1.1" \
+            else headers.get("connection", "").lower() == "keep-alive"
+        return {
+            "method": method.upper(),
+            "path": url.path.rstrip('/') or '/',
+            "query": parse_qs(url.query),
+            "headers": headers,
+            "json": parse_json,
+            "keep_alive": keep_alive,
+        }
+
+    async def _write_json(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def _write_stream(self, writer, stream, keep_alive):
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {stream.content_type}\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if stream.filename:
+            head += f'Content-Disposition: attachment; filename="{stream.filename}"\r\n'
+        writer.write((head + "\r\n").encode('latin-1'))
+        while True:
+            # Potongan berikutnya dibuat di thread worker
+            chunk = await self._call(next, stream.chunks, None)
+            if chunk is None:
+                break
+            data = chunk.encode('utf-8')
+            if data:
+                writer.write(f"{len(data):X}\r\n".encode('latin-1') + data + b"\r\n")
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """Layani satu koneksi; request diproses berurutan (keep-alive)"""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request["keep_alive"]
+                    response = await self._dispatch(request)
+                except HTTPError as e:
+                    response = (e.status, {"error": e.message})
+                except storage.ConflictError as e:
+                    response = (HTTPStatus.CONFLICT, {"error": str(e)})
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    response = (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+                if isinstance(response, Stream):
+                    await self._write_stream(writer, response, keep_alive)
+                else:
+                    await self._write_json(writer, *response, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, started=None):
+        """Jalankan server sampai dibatalkan; started(server) dipanggil setelah bind"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if started is not None:
+            started(server)
+        async with server:
+            await server.serve_forever()
+
+def start_in_thread(inventory, port=DEFAULT_PORT, token="", host=DEFAULT_HOST):
+    """Jalankan ApiServer di thread daemon dengan event loop sendiri.
+
+    Dipakai untuk menjalankan API di dalam proses Streamlit sehingga
+    Inventory (cache, index, agregat) dibagi dengan UI. Mengembalikan
+    ApiServer setelah port berhasil di-bind.
+    """
+    api = ApiServer(inventory, token)
+    ready = threading.Event()
+    failure = []
+
+    def run():
+        try:
+            asyncio.run(api.serve(host, port, started=lambda server: ready.set()))
+        except BaseException as e:
+            failure.append(e)
+            ready.set()
+
+    threading.Thread(target=run, name="inventory-api", daemon=True).start()
+    ready.wait()
+    if failure:
+        raise failure[0]
+    return api
+
+# ================================
+# RUN
+# ================================
+
+def main():
+    """Jalankan API sendiri (tanpa Streamlit), setting dari secrets.toml"""
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Inventory JSON API")
+    parser.add_argument("--host", default=settings.get("API_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=settings.get("API_PORT") or DEFAULT_PORT)
+    args = parser.parse_args()
+
+    metrics.configure(
+        settings.get("METRICS_ENABLED", False),
+        log_path=settings.get("METRICS_LOG_FILE"),
+        prometheus_path=settings.get("METRICS_PROMETHEUS_FILE"),
+    )
+    api = ApiServer(Inventory.from_settings(settings), settings.get("API_TOKEN", ""))
+    print(f"Inventory API di http://{args.host}:{args.port}/api/")
+    asyncio.run(api.serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import sys
+import threading
+import time
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Iterasi PBKDF2-SHA256 untuk hash password baru
+HASH_ITERATIONS = 240000
+HASH_SCHEME = "pbkdf2_sha256"
+
+# Umur token session (detik)
+DEFAULT_SESSION_TTL = 8 * 3600
+
+# Rate limit login: maksimal percobaan beruntun, lalu satu percobaan per sekian detik
+DEFAULT_LOGIN_BURST = 5
+DEFAULT_LOGIN_REFILL_SECONDS = 30
+# Jumlah key (user/IP) yang dilacak rate limiter sebelum yang lama dibuang
+MAX_TRACKED_KEYS = 10000
+
+# Role dan urutan haknya (lebih besar = lebih banyak hak)
+ROLES = {"viewer": 0, "operator": 1, "admin": 2}
+
+# ================================
+# PASSWORD
+# ================================
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def hash_password(password, iterations=HASH_ITERATIONS, salt=None):
+    """Hash password sebagai 'pbkdf2_sha256$iterasi$salt$hash' (untuk secrets.toml)"""
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+def verify_password(password, stored):
+    """True jika password cocok dengan hash dari hash_password()"""
+    try:
+        scheme, iterations, salt, expected = stored.split('$')
+        if scheme != HASH_SCHEME:
+            return False
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), _b64decode(salt), int(iterations))
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(digest, _b64decode(expected))
+
+# Dipakai untuk user yang tidak ada, supaya waktu respon sama dengan password salah.
+# Dibuat saat login pertama, bukan saat import, supaya tidak menunda render pertama.
+_dummy_hash = None
+
+def _get_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+# ================================
+# AKUN
+# ================================
+
+class Accounts:
+    """Daftar user {username: {"password_hash", "role"}} di memory.
+
+    Dibuat sekali per proses dari secrets; login dan verifikasi token
+    tidak menyentuh disk.
+    """
+
+    def __init__(self, users):
+        self.users = {}
+        for username, account in users.items():
+            role = account.get("role", "viewer")
+            if role not in ROLES:
+                raise ValueError(f"Role tidak dikenal untuk {username}: {role}")
+            if not account.get("password_hash"):
+                raise ValueError(f"password_hash kosong untuk {username}")
+            self.users[str(username)] = {"password_hash": account["password_hash"], "role": role}
+
+    @classmethod
+    def single_password(cls, password, username="admin"):
+        """Mode lama: satu password (APP_PASSWORD) untuk satu akun admin"""
+        return cls({username: {"password_hash": hash_password(password), "role": "admin"}})
+
+    def authenticate(self, username, password):
+        """Role user jika password benar, selain itu None"""
+        account = self.users.get(username)
+        stored = account["password_hash"] if account else _get_dummy_hash()
+        if verify_password(password, stored) and account is not None:
+            return account["role"]
+        return None
+
+    def role(self, username):
+        account = self.users.get(username)
+        return account["role"] if account else None
+
+def has_role(role, required):
+    """True jika role memiliki hak minimal required"""
+    return ROLES.get(role, -1) >= ROLES[required]
+
+# ================================
+# TOKEN SESSION
+# ================================
+
+def issue_token(username, secret, ttl=DEFAULT_SESSION_TTL):
+    """Token session bertanda tangan HMAC: payload JSON + signature"""
+    payload = _b64encode(json.dumps({"u": username, "exp": int(time.time() + ttl)}).encode('utf-8'))
+    signature = _b64encode(hmac.new(secret, payload.encode('ascii'), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+def verify_token(token, secret):
+    """Username dari token yang valid dan belum kedaluwarsa, selain itu None"""
+    if not token or '.' not in token:
+        return None
+    payload, _, signature = token.partition('.')
+    try:
+        expected = hmac.new(secret, payload.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            return None
+        data = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if data.get("exp", 0) < time.time():
+        return None
+    return data.get("u")
+
+# ================================
+# RATE LIMIT
+# ================================
+
+class RateLimiter:
+    """Token bucket per key (username, IP) di memory proses"""
+
+    def __init__(self, burst=DEFAULT_LOGIN_BURST, refill_seconds=DEFAULT_LOGIN_REFILL_SECONDS,
+                 max_keys=MAX_TRACKED_KEYS):
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [token, waktu update]
+
+    def _tokens(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) / self.refill_seconds)
+
+    def allow(self, *keys):
+        """Ambil satu token dari setiap key; False (tanpa mengambil) jika ada yang habis"""
+        keys = [key for key in keys if key]
+        now = time.monotonic()
+        with self._lock:
+            levels = [self._tokens(key, now) for key in keys]
+            if any(level < 1 for level in levels):
+                return False
+            for key, level in zip(keys, levels):
+                self._buckets[key] = [level - 1, now]
+            if len(self._buckets) > self.max_keys:
+                # Bucket yang sudah penuh kembali tidak perlu disimpan
+                for key in [key for key in self._buckets if self._tokens(key, now) >= self.burst]:
+                    del self._buckets[key]
+            return True
+
+    def retry_after(self, *keys):
+        """Detik sampai semua key boleh mencoba lagi"""
+        now = time.monotonic()
+        with self._lock:
+            missing = [1 - self._tokens(key, now) for key in keys if key]
+        return max([0.0] + [level * self.refill_seconds for level in missing])
+
+    def reset(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._buckets.pop(key, None)
+
+# ================================
+# RUN
+# ================================
+
+if __name__ == "__main__":
+    # python auth.py hash -> cetak hash untuk [USERS.<nama>] password_hash di secrets.toml
+    if sys.argv[1:] == ["hash"]:
+        import getpass
+
+        password = getpass.getpass("Password: ")
+        if password != getpass.getpass("Ulangi password: "):
+            sys.exit("Password tidak sama")
+        print(hash_password(password))
+    else:
+        sys.exit("Pemakaian: python auth.py hash")
@@ -0,0 +1,325 @@
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import storage
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Lebar rentang ID per chunk (chunk k berisi ID k*CHUNK_ROWS .. (k+1)*CHUNK_ROWS-1)
+CHUNK_ROWS = 1000
+# Jumlah generasi backup yang disimpan
+DEFAULT_RETENTION = 20
+# Backup otomatis setelah sekian commit ...
+DEFAULT_EVERY_WRITES = 50
+# ... atau jika backup terakhir lebih tua dari sekian detik (dan ada commit baru)
+DEFAULT_INTERVAL_SECONDS = 3600
+# Chunk hasil dekompresi yang disimpan di memory (LRU)
+CHUNK_CACHE_SIZE = 256
+
+# ================================
+# HELPER
+# ================================
+
+def _json_version(version):
+    return list(version) if isinstance(version, tuple) else version
+
+def _split(df, chunk_rows):
+    """Bagi df menjadi (key, frame) per rentang ID, urut key.
+
+    Urutan baris di dalam satu chunk dipertahankan. Karena batas chunk
+    ditentukan oleh nilai ID (bukan posisi baris), insert dan delete
+    hanya mengubah chunk rentang ID-nya sendiri.
+    """
+    if len(df) == 0:
+        return []
+    keys = df['ID'].to_numpy(dtype=np.int64) // chunk_rows
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(order)]])
+    return [
+        (int(sorted_keys[start]), df.take(order[start:end]))
+        for start, end in zip(starts, ends)
+    ]
+
+def _id_ranges(ids):
+    """ID unik terurut sebagai rentang [lo, hi) berurutan (int Python)"""
+    if len(ids) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+    starts = ids[np.concatenate([[0], breaks])]
+    ends = ids[np.concatenate([breaks - 1, [len(ids) - 1]])] + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+# ================================
+# BACKUP STORE
+# ================================
+
+class BackupStore:
+    """Backup bergenerasi dengan chunk CSV terkompresi (content-addressed).
+
+    Setiap generasi adalah manifest JSON kecil (`gen-000001.json`) berisi
+    daftar chunk [key, hash, jumlah baris]. Isi chunk disimpan sekali di
+    `chunks/<hash>.csv.gz`, jadi generasi baru hanya menulis chunk yang
+    berubah sejak generasi sebelumnya. Generasi di luar retention dihapus
+    beserta chunk yang tidak dipakai lagi.
+    """
+
+    def __init__(self, directory, retention=DEFAULT_RETENTION, every_writes=DEFAULT_EVERY_WRITES,
+                 interval_seconds=DEFAULT_INTERVAL_SECONDS, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.chunk_directory = os.path.join(directory, "chunks")
+        os.makedirs(self.chunk_directory, exist_ok=True)
+        self.retention = max(int(retention), 1)
+        self.every_writes = every_writes
+        self.interval_seconds = interval_seconds
+        self.chunk_rows = chunk_rows
+        self._lock_path = os.path.join(directory, "generations")
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._cache = OrderedDict()  # hash -> DataFrame
+
+    # -- manifest -----------------------------------------------------
+
+    def _manifest_path(self, gen):
+        return os.path.join(self.directory, f"gen-{gen:06d}.json")
+
+    def _gens(self):
+        paths = glob.glob(os.path.join(self.directory, "gen-*.json"))
+        return sorted(int(os.path.basename(path)[4:-5]) for path in paths)
+
+    def manifest(self, gen):
+        with open(self._manifest_path(gen), encoding='utf-8') as f:
+            return json.load(f)
+
+    def generations(self):
+        """Manifest semua generasi, terbaru dulu"""
+        result = []
+        for gen in reversed(self._gens()):
+            try:
+                result.append(self.manifest(gen))
+            except (OSError, ValueError):
+                # Sedang dihapus oleh proses lain
+                continue
+        return result
+
+    def latest(self):
+        generations = self.generations()
+        return generations[0] if generations else None
+
+    # -- chunk --------------------------------------------------------
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_directory, f"{digest}.csv.gz")
+
+    def _encode(self, frame):
+        raw = frame.to_csv(index=False, date_format=storage.DATE_FORMAT).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest(), raw
+
+    def _store_chunk(self, digest, raw):
+        """Tulis chunk jika belum ada; pemanggil memegang lock generasi.
+
+        Mengembalikan jumlah byte terkompresi yang ditulis (0 jika sudah ada).
+        """
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _read_chunk(self, digest):
+        with self._lock:
+            frame = self._cache.get(digest)
+            if frame is not None:
+                self._cache.move_to_end(digest)
+                return frame
+        with gzip.open(self._chunk_path(digest), 'rb') as f:
+            frame = storage.compact(pd.read_csv(io.BytesIO(f.read())))
+        with self._lock:
+            self._cache[digest] = frame
+            while len(self._cache) > CHUNK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return frame
+
+    # -- backup -------------------------------------------------------
+
+    def snapshot(self, df, version=None, reason="", prune=True):
+        """Simpan df sebagai generasi baru; mengembalikan manifest-nya.
+
+        Jika generasi terakhir berasal dari versi data yang sama, tidak ada
+        yang ditulis dan manifest terakhir dikembalikan. Dengan prune=False
+        generasi lama belum dihapus (lihat prune()).
+        """
+        latest = self.latest()
+        if latest is not None and version is not None and latest.get("version") == _json_version(version):
+            return latest
+
+        # Serialisasi & hash di luar lock; chunk baru ditulis di dalam lock
+        # supaya tidak bentrok dengan pembersihan chunk oleh proses lain
+        with metrics.timed("backup.encode", rows=len(df)) as timer:
+            encoded = [(key, len(frame)) + self._encode(frame) for key, frame in _split(df, self.chunk_rows)]
+            timer.bytes = sum(len(raw) for _, _, _, raw in encoded)
+        with metrics.timed("backup.write", rows=len(df)) as timer, storage.file_lock(self._lock_path):
+            written = 0
+            for _, _, digest, raw in encoded:
+                written += self._store_chunk(digest, raw)
+            timer.bytes = written
+            chunks = [[key, digest, rows] for key, rows, digest, _ in encoded]
+            gens = self._gens()
+            manifest = {
+                "gen": (gens[-1] + 1) if gens else 1,
+                "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "timestamp": time.time(),
+                "reason": reason,
+                "version": _json_version(version),
+                "rows": int(len(df)),
+                "columns": list(df.columns) if len(df.columns) else list(storage.COLUMNS),
+                "chunk_rows": self.chunk_rows,
+                "chunks": chunks,
+            }
+            storage.write_text(self._manifest_path(manifest["gen"]), json.dumps(manifest))
+            if prune:
+                self._prune(gens + [manifest["gen"]])
+        with self._lock:
+            self._writes = 0
+        return manifest
+
+    def _prune(self, gens):
+        """Hapus generasi di luar retention dan chunk yang tidak terpakai.
+
+        Pemanggil memegang lock generasi.
+        """
+        expired = gens[:-self.retention]
+        if not expired:
+            return
+        for gen in expired:
+            os.unlink(self._manifest_path(gen))
+        used = {
+            digest for manifest in self.generations() for _, digest, _ in manifest["chunks"]
+        }
+        for path in glob.glob(os.path.join(self.chunk_directory, "*.csv.gz")):
+            if os.path.basename(path)[:-len(".csv.gz")] not in used:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Terapkan retention sekarang"""
+        with storage.file_lock(self._lock_path):
+            self._prune(self._gens())
+
+    def due(self):
+        """True jika backup otomatis sudah waktunya (jumlah commit atau umur)"""
+        with self._lock:
+            writes = self._writes
+        if writes == 0:
+            return False
+        if self.every_writes and writes >= self.every_writes:
+            return True
+        latest = self.latest()
+        return latest is None or time.time() - latest["timestamp"] >= self.interval_seconds
+
+    def attach(self, backend):
+        """Backup otomatis: hitung commit backend, snapshot jika sudah waktunya"""
+        def on_event(event):
+            if event.get("replayed"):
+                # Commit proses lain dihitung oleh proses penulisnya
+                return
+            with self._lock:
+                self._writes += 1
+            if self.due():
+                df, version = backend.read()
+                self.snapshot(df, version, reason="Otomatis")
+        backend.subscribe(on_event)
+
+    # -- restore ------------------------------------------------------
+
+    @metrics.instrument("backup.load")
+    def load(self, gen):
+        """DataFrame lengkap satu generasi (chunk dibaca lewat cache)"""
+        manifest = self.manifest(gen)
+        frames = [self._read_chunk(digest) for _, digest, _ in manifest["chunks"]]
+        if not frames:
+            return pd.DataFrame(columns=manifest["columns"])
+        # Kategori lokasi tiap chunk berbeda; ringkas ulang setelah digabung
+        return storage.compact(pd.concat(frames, ignore_index=True))
+
+    def changed_keys(self, old, new):
+        """Key chunk yang isinya berbeda antara dua manifest"""
+        old_chunks = {key: digest for key, digest, _ in old["chunks"]}
+        new_chunks = {key: digest for key, digest, _ in new["chunks"]}
+        return sorted(
+            key for key in old_chunks.keys() | new_chunks.keys()
+            if old_chunks.get(key) != new_chunks.get(key)
+        )
+
+    @metrics.instrument("backup.restore")
+    def restore(self, gen, backend):
+        """Kembalikan data ke generasi gen; mengembalikan (chunk, baris) yang ditulis.
+
+        Data saat ini disimpan dulu sebagai generasi baru (restore bisa
+        dibatalkan), lalu hanya rentang ID yang chunk-nya berbeda yang
+        dibaca dari backup dan diganti di backend.
+        """
+        target = self.manifest(gen)
+        if target["chunk_rows"] != self.chunk_rows:
+            raise ValueError("Ukuran chunk backup berbeda dengan konfigurasi saat ini")
+        df, version = backend.read()
+        # Retention ditunda supaya chunk generasi target tidak ikut terhapus
+        current = self.snapshot(df, version, reason=f"Sebelum restore #{gen}", prune=False)
+        try:
+            keys = self.changed_keys(current, target)
+            digests = {key: digest for key, digest, _ in target["chunks"]}
+            frames = [self._read_chunk(digests[key]) for key in keys if key in digests]
+            rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=target["columns"])
+            ranges = [(key * self.chunk_rows, (key + 1) * self.chunk_rows) for key in keys]
+            if ranges:
+                backend.replace_id_ranges(ranges, rows)
+        finally:
+            self.prune()
+        return len(keys), len(rows)
+
+    @metrics.instrument("backup.restore_rows")
+    def restore_rows(self, gen, ids, backend):
+        """Kembalikan hanya ID di ids ke isi generasi gen; mengembalikan (ID, baris) yang ditulis.
+
+        ID yang tidak ada di generasi itu dihapus. Data saat ini disimpan
+        dulu sebagai generasi baru, hanya chunk yang memuat ID tersebut yang
+        dibaca, dan semua ID diganti dalam satu commit backend.
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if len(ids) == 0:
+            return 0, 0
+        target = self.manifest(gen)
+        df, version = backend.read()
+        # Retention ditunda supaya chunk generasi target tidak ikut terhapus
+        self.snapshot(df, version, reason=f"Sebelum restore sebagian #{gen}", prune=False)
+        try:
+            keys = set((ids // target["chunk_rows"]).tolist())
+            frames = [self._read_chunk(digest) for key, digest, _ in target["chunks"] if key in keys]
+            rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=target["columns"])
+            rows = rows[rows['ID'].isin(ids).to_numpy()]
+            backend.replace_id_ranges(_id_ranges(ids), rows)
+        finally:
+            self.prune()
+        return len(ids), len(rows)
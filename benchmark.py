@@ -0,0 +1,356 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import storage
+from inventory import Inventory, argsort, csv_chunks, write_excel
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+DEFAULT_SIZES = "1k,10k,100k,1m"
+DEFAULT_BACKENDS = "csv"
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 42
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Regresi jika median waktu / peak memory lebih dari TOLERANCE x baseline ...
+DEFAULT_TOLERANCE = 1.5
+# ... dan selisihnya di atas batas noise ini
+NOISE_SECONDS = 0.005
+NOISE_MB = 1.0
+
+# Filter tab1 yang diukur: teks + lokasi, urut Stok Akhir, satu halaman
+FILTER_TERM = "resis"
+FILTER_PAGE_SIZE = 50
+
+# ================================
+# DATA SINTETIS
+# ================================
+
+COMPONENTS = {
+    "Resistor": ["1k", "4.7k", "10k", "22k", "47k", "100k", "220R", "330R", "470R", "1M"],
+    "Kapasitor": ["22pF", "100nF", "1uF", "10uF", "100uF", "470uF", "1000uF"],
+    "IC": ["LM358", "NE555", "ATmega328P", "74HC595", "LM7805", "LM317", "CD4017", "ULN2003"],
+    "Transistor": ["BC547", "BC557", "2N2222", "TIP120", "IRF540", "IRFZ44N"],
+    "LED": ["Merah 5mm", "Hijau 5mm", "Biru 3mm", "Putih 5mm", "RGB 5mm"],
+    "Dioda": ["1N4007", "1N4148", "1N5819", "Zener 5V1", "Zener 12V"],
+    "Konektor": ["JST 2P", "JST 4P", "Header 40P", "USB-C", "DC Jack", "Terminal 2P"],
+    "Sensor": ["DHT22", "HC-SR04", "LDR", "DS18B20", "MPU6050", "PIR HC-SR501"],
+    "Modul": ["ESP32", "ESP8266", "Arduino Nano", "Relay 2CH", "L298N", "Buck LM2596"],
+}
+PACKAGES = ["THT", "SMD 0805", "SMD 0603", "DIP", "SOT-23"]
+KETERANGAN = ["", "baik", "baik", "baik", "perlu cek", "rusak sebagian", "sisa proyek"]
+
+def _locations():
+    racks = [f"Rak {rack}-{shelf:02d}" for rack in "ABCDEF" for shelf in range(1, 11)]
+    drawers = [f"Laci {drawer}" for drawer in range(1, 21)]
+    return racks + drawers + ["Gudang", "Lab Elektronika", "Meja Kerja"]
+
+def generate(rows, seed=DEFAULT_SEED):
+    """DataFrame inventory sintetis sebanyak rows baris (deterministik per seed)"""
+    rng = np.random.default_rng(seed)
+    names, descriptions = [], []
+    for family, parts in COMPONENTS.items():
+        for part in parts:
+            for package in PACKAGES:
+                names.append(f"{family} {part} {package}")
+                descriptions.append(f"{family} {part}, kemasan {package}")
+    names = np.array(names, dtype=object)
+    descriptions = np.array(descriptions, dtype=object)
+    kind = rng.integers(0, len(names), rows)
+
+    masuk = rng.integers(0, 500, rows)
+    keluar = (masuk * rng.random(rows)).astype(np.int64)
+    # Sebagian item stoknya rendah supaya dashboard "stok rendah" terisi
+    low = rng.random(rows) < 0.1
+    keluar[low] = np.maximum(masuk[low] - rng.integers(0, 10, low.sum()), 0)
+
+    start = pd.Timestamp("2024-01-01").value // 10 ** 9
+    seconds = rng.integers(0, 2 * 365 * 24 * 3600, rows)
+    tanggal = pd.to_datetime(np.sort(start + seconds), unit='s').strftime("%Y-%m-%d %H:%M:%S")
+
+    return pd.DataFrame({
+        "ID": np.arange(1, rows + 1),
+        "Tanggal": tanggal,
+        "Nama Komponen": names[kind],
+        "Deskripsi": descriptions[kind],
+        "Jumlah Masuk": masuk,
+        "Jumlah Keluar": keluar,
+        "Stok Akhir": masuk - keluar,
+        "Lokasi Penyimpanan": np.array(_locations(), dtype=object)[rng.integers(0, len(_locations()), rows)],
+        "Keterangan": np.array(KETERANGAN, dtype=object)[rng.integers(0, len(KETERANGAN), rows)],
+    })[storage.COLUMNS]
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000 * 1000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+# ================================
+# WORKSPACE
+# ================================
+
+def open_inventory(directory, backend):
+    return Inventory(
+        os.path.join(directory, "data.csv"),
+        backup_dir=os.path.join(directory, "backups"),
+        backup_every_writes=0,
+        backup_interval_seconds=10 ** 9,
+        storage_backend=backend,
+        sqlite_file=os.path.join(directory, "data.db"),
+        arrow_file=os.path.join(directory, "data.arrow"),
+    )
+
+def make_template(df, directory, backend):
+    """Direktori data awal (CSV dimigrasikan ke backend) dengan satu generasi backup"""
+    os.makedirs(directory)
+    df.to_csv(os.path.join(directory, "data.csv"), index=False)
+    open_inventory(directory, backend).create_backup("Template benchmark")
+    return directory
+
+class Workspace:
+    """Salinan data template untuk satu operasi, supaya operasi tidak saling mempengaruhi.
+
+    Template (CSV + file backend + satu generasi backup) dibuat sekali per
+    ukuran dan backend; setiap operasi memakai salinan direktori baru.
+    Backup otomatis tidak ikut terukur: generasi sudah ada dan interval
+    dibuat sangat panjang.
+    """
+
+    def __init__(self, template, directory, backend):
+        shutil.copytree(template, directory)
+        self.directory = directory
+        self.backend = backend
+        self.inventory = self.open()
+
+    def open(self):
+        return open_inventory(self.directory, self.backend)
+
+# ================================
+# OPERASI
+# ================================
+
+def _sample_item(i):
+    return {
+        "Nama Komponen": f"Resistor 10k THT batch {i}",
+        "Deskripsi": "Resistor 10k, kemasan THT",
+        "Jumlah Masuk": 100,
+        "Jumlah Keluar": 0,
+        "Stok Akhir": 100,
+        "Lokasi Penyimpanan": "Rak A-01",
+        "Keterangan": "baik",
+    }
+
+def op_load(ws, i, ctx):
+    """Baca dingin: Inventory baru + parse file (load_data di main.py)"""
+    ws.open().snapshot()
+
+def op_load_warm(ws, i, ctx):
+    """Snapshot dari cache proses (rerun Streamlit tanpa perubahan data)"""
+    ws.inventory.snapshot()
+
+def op_add_item(ws, i, ctx):
+    ws.inventory.add_item(_sample_item(i))
+
+def op_update_item(ws, i, ctx):
+    item_id = ctx["ids"][i % len(ctx["ids"])]
+    ws.inventory.update_item(item_id, {"Stok Akhir": 42 + i, "Keterangan": f"benchmark {i}"})
+
+def op_delete_item(ws, i, ctx):
+    ws.inventory.delete_item(ctx["ids"][i % len(ctx["ids"])])
+
+def op_import_csv(ws, i, ctx):
+    with open(ctx["import_file"], 'rb') as f:
+        ws.inventory.import_csv(f, mode='replace')
+
+def op_export_excel(ws, i, ctx):
+    df, _ = ws.inventory.snapshot()
+    write_excel(df, ctx["excel_file"])
+
+def op_export_csv(ws, i, ctx):
+    df, _ = ws.inventory.snapshot()
+    for _ in csv_chunks(df):
+        pass
+
+def op_filter(ws, i, ctx):
+    """Filter tab1: teks + lokasi, urut Stok Akhir menurun, ambil satu halaman"""
+    df, version = ws.inventory.snapshot()
+    positions = ws.inventory.filter_positions(df, version, FILTER_TERM, ctx["lokasi"])
+    order = positions[argsort(df['Stok Akhir'].take(positions), False)]
+    df.take(order[:FILTER_PAGE_SIZE])
+
+# Nama -> (fungsi, perlu pemanasan cache sebelum diukur)
+OPERATIONS = {
+    "load": (op_load, False),
+    "load_warm": (op_load_warm, True),
+    "add_item": (op_add_item, True),
+    "update_item": (op_update_item, True),
+    "delete_item": (op_delete_item, True),
+    "import_csv": (op_import_csv, True),
+    "export_excel": (op_export_excel, True),
+    "export_csv": (op_export_csv, True),
+    "filter": (op_filter, True),
+}
+
+# ================================
+# PENGUKURAN
+# ================================
+
+def measure(fn, repeat):
+    """Jalankan fn(i) repeat kali untuk waktu, lalu sekali lagi dengan tracemalloc.
+
+    Peak memory dihitung terpisah karena tracemalloc memperlambat kode
+    Python. Alokasi memory pool pyarrow tidak terlihat oleh tracemalloc.
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn(repeat)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak / (1024 * 1024)
+
+def run(sizes, backends, operations, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, workdir=None, log=print):
+    """Jalankan benchmark; list hasil per (backend, op, rows)"""
+    root = tempfile.mkdtemp(prefix="inventory-bench-", dir=workdir)
+    results = []
+    try:
+        for rows in sizes:
+            df = generate(rows, seed)
+            import_file = os.path.join(root, f"import-{rows}.csv")
+            df.to_csv(import_file, index=False)
+            rng = np.random.default_rng(seed)
+            ctx = {
+                "import_file": import_file,
+                "excel_file": os.path.join(root, f"export-{rows}.xlsx"),
+                "ids": [int(item_id) for item_id in rng.choice(df['ID'].to_numpy(), size=repeat + 1, replace=False)],
+                "lokasi": "Rak A-01",
+            }
+            for backend in backends:
+                template = make_template(df, os.path.join(root, f"template-{backend}-{rows}"), backend)
+                for name in operations:
+                    fn, warm = OPERATIONS[name]
+                    ws = Workspace(template, os.path.join(root, f"{backend}-{rows}-{name}"), backend)
+                    if warm:
+                        ws.inventory.snapshot()
+                        if name == "filter":
+                            fn(ws, 0, ctx)
+                    times, peak = measure(lambda i: fn(ws, i, ctx), repeat)
+                    result = {
+                        "backend": backend,
+                        "op": name,
+                        "rows": rows,
+                        "repeat": repeat,
+                        "seconds_min": min(times),
+                        "seconds_median": statistics.median(times),
+                        "peak_mb": peak,
+                    }
+                    results.append(result)
+                    log(f"{backend:7} {name:13} {rows:>9,} rows  "
+                        f"{result['seconds_median'] * 1000:10.1f} ms  {peak:9.1f} MB")
+                    shutil.rmtree(ws.directory, ignore_errors=True)
+                shutil.rmtree(template, ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def environment():
+    return {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Bandingkan dengan baseline; list regresi (dict) untuk waktu atau memory"""
+    previous = {(r["backend"], r["op"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result["backend"], result["op"], result["rows"]))
+        if base is None:
+            continue
+        for metric, noise in (("seconds_median", NOISE_SECONDS), ("peak_mb", NOISE_MB)):
+            old, new = base[metric], result[metric]
+            if new > old * tolerance and new - old > noise:
+                regressions.append({
+                    "backend": result["backend"], "op": result["op"], "rows": result["rows"],
+                    "metric": metric, "baseline": old, "current": new,
+                    "ratio": new / old if old else float('inf'),
+                })
+    return regressions
+
+# ================================
+# RUN
+# ================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark layer data inventory")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="mis. 1k,10k,100k,1m")
+    parser.add_argument("--backends", default=DEFAULT_BACKENDS, help="csv,sqlite,arrow")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="operasi, dipisah koma")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workdir", default=None, help="direktori untuk file sementara")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="file JSON hasil")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="file JSON baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="simpan hasil sebagai baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    operations = [op.strip() for op in args.ops.split(",") if op.strip()]
+    unknown = [op for op in operations if op not in OPERATIONS]
+    if unknown:
+        parser.error(f"Operasi tidak dikenal: {unknown}")
+
+    results = run(
+        [parse_size(size) for size in args.sizes.split(",")],
+        [backend.strip() for backend in args.backends.split(",")],
+        operations,
+        repeat=args.repeat,
+        seed=args.seed,
+        workdir=args.workdir,
+    )
+    report = {"environment": environment(), "results": results, "regressions": []}
+
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            report["regressions"] = compare(results, json.load(f), args.tolerance)
+        for regression in report["regressions"]:
+            print(f"REGRESI {regression['backend']} {regression['op']} {regression['rows']:,} rows "
+                  f"{regression['metric']}: {regression['baseline']:.4g} -> {regression['current']:.4g} "
+                  f"({regression['ratio']:.2f}x)")
+        if not report["regressions"]:
+            print(f"Tidak ada regresi dibanding {args.baseline}")
+
+    storage.write_text(args.output, json.dumps(report, indent=2))
+    if args.save_baseline:
+        storage.write_text(args.baseline, json.dumps(report, indent=2))
+        print(f"Baseline disimpan ke {args.baseline}")
+    return 1 if report["regressions"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
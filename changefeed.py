@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from storage import file_lock, write_text
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Jumlah event terakhir yang disimpan di memory (dan di file setelah dipotong)
+KEEP_EVENTS = 1000
+# File feed dipotong ke KEEP_EVENTS event terakhir jika lebih besar dari ini
+MAX_BYTES = 4 * 1024 * 1024
+# Maksimal event yang diterapkan ke snapshot lama; lebih dari itu parse ulang
+MAX_CATCH_UP = 200
+
+# Field event backend yang tidak dicatat: baris lama diambil penerima
+# dari snapshot-nya sendiri
+_LOCAL_FIELDS = ("old_row", "old_rows", "replayed")
+
+# ================================
+# HELPER
+# ================================
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _json_default(value):
+    """Nilai numpy/pandas di event sebagai nilai JSON"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return None
+
+def _version(value):
+    """Versi dari JSON: versi CSV (tuple) tersimpan sebagai list"""
+    return tuple(value) if isinstance(value, list) else value
+
+def _record(event):
+    """Event backend menjadi record feed (tanpa baris lama)"""
+    record = {key: value for key, value in event.items() if key not in _LOCAL_FIELDS}
+    if event['op'] == 'update_many':
+        record['updates'] = [{"id": update['id'], "values": update['values']} for update in event['updates']]
+    return record
+
+# ================================
+# CHANGE FEED
+# ================================
+
+class ChangeFeed:
+    """Log commit (JSON lines) di samping file data, dibaca semua proses.
+
+    Setiap commit backend (lihat storage.Backend) dicatat sebagai satu
+    record {"seq", "waktu", "op", "version", "prev_version", ...} dengan
+    patch-nya: 'row' (insert), 'values' (update, termasuk pergerakan
+    stok), 'updates' (update_many), 'id'/'ids' (delete). Import dan
+    restore dicatat sebagai 'replace' tanpa isi.
+
+    Proses lain membaca ekor file (tail) dan memakai rantai
+    prev_version -> version untuk memperbarui snapshot di memory tanpa
+    membaca ulang seluruh data; session UI memakai seq untuk menampilkan
+    perubahan sejak terakhir dilihat. File dipotong ke event terakhir
+    jika terlalu besar; pembaca mendeteksinya dari inode yang berubah.
+    """
+
+    def __init__(self, path, keep=KEEP_EVENTS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._seq = 0
+        self._events = deque(maxlen=keep)
+
+    # -- baca ekor file -----------------------------------------------
+
+    def _apply(self, record):
+        if record["seq"] <= self._seq:
+            return
+        record["version"] = _version(record["version"])
+        record["prev_version"] = _version(record["prev_version"])
+        self._seq = record["seq"]
+        self._events.append(record)
+
+    def _poll(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        if stat.st_ino != self._inode:
+            # File baru atau sudah dipotong: baca dari awal, seq lama dilewati
+            self._inode, self._offset = stat.st_ino, 0
+        if stat.st_size <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(stat.st_size - self._offset)
+        # Hanya baris lengkap; sisa baris setengah jadi dibaca berikutnya
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+
+    def poll(self):
+        """Baca record baru sejak terakhir; mengembalikan seq terbaru"""
+        with self._lock:
+            self._poll()
+            return self._seq
+
+    # -- tulis --------------------------------------------------------
+
+    def append(self, event):
+        """Listener backend: catat satu commit.
+
+        Event yang diterapkan ulang dari feed (replayed) tidak dicatat lagi.
+        """
+        if event.get("replayed"):
+            return
+        record = _record(event)
+        with file_lock(self.path), self._lock:
+            self._poll()
+            record = {"seq": self._seq + 1, "waktu": _now(), **record}
+            line = json.dumps(record, default=_json_default) + "\n"
+            with open(self.path, 'ab') as f:
+                f.write(line.encode('utf-8'))
+            self._poll()
+            if self._offset > self.max_bytes:
+                self._truncate()
+
+    def _truncate(self):
+        """Tulis ulang file hanya dengan event terakhir; pemanggil memegang lock"""
+        lines = [json.dumps(record, default=_json_default) + "\n" for record in self._events]
+        write_text(self.path, "".join(lines))
+        stat = os.stat(self.path)
+        self._inode, self._offset = stat.st_ino, stat.st_size
+
+    # -- query --------------------------------------------------------
+
+    def latest_seq(self):
+        return self.poll()
+
+    def since(self, seq, limit=50):
+        """Record setelah seq (terlama dulu), maksimal limit terakhir"""
+        with self._lock:
+            self._poll()
+            records = [record for record in self._events if record["seq"] > seq]
+        return records[-limit:]
+
+    def chain(self, from_version, to_version, limit=MAX_CATCH_UP):
+        """Record yang membawa data dari from_version ke to_version, atau None.
+
+        None jika ada commit yang tidak tercatat (mis. proses penulis mati
+        sebelum mencatat, atau event sudah terbuang) atau rantainya lebih
+        panjang dari limit; pemanggil lalu membaca ulang data.
+        """
+        with self._lock:
+            self._poll()
+            by_prev = {
+                record["prev_version"]: record for record in self._events
+                if record["prev_version"] is not None
+            }
+        records, current = [], from_version
+        while current != to_version:
+            record = by_prev.get(current)
+            if record is None or len(records) >= limit:
+                return None
+            records.append(record)
+            current = record["version"]
+        return records
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+import metrics
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Kolom identitas yang ikut ditampilkan di daftar perubahan per sel
+LABEL_COLUMN = "Nama Komponen"
+
+# ================================
+# HELPER
+# ================================
+
+def _first_rows(df):
+    """Baris pertama setiap ID (sama seperti update()), urutan asli"""
+    return df[~df['ID'].duplicated(keep='first').to_numpy()]
+
+def _values(series):
+    """Kolom sebagai array numpy yang bisa dibandingkan elemen per elemen.
+
+    Angka menjadi float (kosong = NaN), tanggal datetime64 (kosong = NaT),
+    selain itu object dengan teks kosong dan NaN dianggap sama.
+    """
+    kind = series.dtype.kind
+    if kind in 'iufb':
+        return series.to_numpy(dtype='float64', na_value=np.nan)
+    if kind == 'M':
+        return series.to_numpy()
+    return series.astype(object).fillna("").to_numpy()
+
+def _differs(old, new):
+    """Mask posisi yang nilainya berbeda; kosong di kedua sisi dianggap sama"""
+    equal = old == new
+    if old.dtype.kind in 'fM' and new.dtype.kind in 'fM':
+        equal |= pd.isna(old) & pd.isna(new)
+    return ~np.asarray(equal, dtype=bool)
+
+def _display(values):
+    """Nilai sel untuk tabel perubahan (teks, kosong = "")"""
+    values = pd.Series(values, dtype=object)
+    return values.where(values.notna(), "").astype(str).to_numpy()
+
+def _labels(columns, masks):
+    """Daftar kolom berubah per baris ("Kolom A, Kolom B").
+
+    Baris dengan pola kolom yang sama berbagi satu teks: dihitung per
+    pola unik, bukan per baris.
+    """
+    if not columns:
+        return np.array([], dtype=object)
+    matrix = np.column_stack(masks)
+    codes = matrix.astype(np.int64) @ (np.int64(1) << np.arange(len(columns), dtype=np.int64))
+    patterns, inverse = np.unique(codes, return_inverse=True)
+    bits = np.arange(len(columns))
+    texts = np.array(
+        [", ".join(col for col, hit in zip(columns, (pattern >> bits) & 1) if hit) for pattern in patterns],
+        dtype=object
+    )
+    return texts[inverse]
+
+# ================================
+# DIFF
+# ================================
+
+@metrics.instrument("diff.frames")
+def diff_frames(old, new):
+    """Bandingkan dua frame inventory per ID (baris pertama setiap ID).
+
+    Semua perbandingan dilakukan per kolom sekaligus, tanpa loop per
+    baris. Mengembalikan dict:
+    - added: baris new yang ID-nya tidak ada di old
+    - removed: baris old yang ID-nya tidak ada di new
+    - changed: baris new yang isinya berbeda dari old, dengan kolom
+      "Kolom Berubah" setelah ID
+    - changes: satu baris per sel yang berbeda (ID, Nama Komponen,
+      Kolom, Lama, Baru)
+    """
+    old_rows, new_rows = _first_rows(old), _first_rows(new)
+    old_ids = pd.Index(old_rows['ID'].to_numpy())
+    new_ids = pd.Index(new_rows['ID'].to_numpy())
+
+    # Posisi setiap baris new di old (-1 = tidak ada)
+    lookup = old_ids.get_indexer(new_ids)
+    in_old = lookup >= 0
+    added = new_rows[~in_old].reset_index(drop=True)
+    removed = old_rows[~old_ids.isin(new_ids)].reset_index(drop=True)
+
+    new_positions = np.flatnonzero(in_old)
+    old_positions = lookup[in_old]
+    columns = [col for col in new_rows.columns if col != 'ID' and col in old_rows.columns]
+    masks = [
+        _differs(_values(old_rows[col])[old_positions], _values(new_rows[col])[new_positions])
+        for col in columns
+    ]
+    changed_rows = np.logical_or.reduce(masks) if masks else np.zeros(len(new_positions), dtype=bool)
+    new_positions, old_positions = new_positions[changed_rows], old_positions[changed_rows]
+    masks = [mask[changed_rows] for mask in masks]
+
+    changed = new_rows.take(new_positions).reset_index(drop=True)
+    changed.insert(1, "Kolom Berubah", _labels(columns, masks))
+
+    ids = changed['ID'].to_numpy()
+    labels = changed[LABEL_COLUMN].to_numpy(dtype=object) if LABEL_COLUMN in changed.columns else None
+    parts = []
+    for col, mask in zip(columns, masks):
+        if not mask.any():
+            continue
+        parts.append(pd.DataFrame({
+            "ID": ids[mask],
+            LABEL_COLUMN: labels[mask] if labels is not None else "",
+            "Kolom": col,
+            "Lama": _display(old_rows[col].take(old_positions[mask]).to_numpy(dtype=object)),
+            "Baru": _display(new_rows[col].take(new_positions[mask]).to_numpy(dtype=object)),
+        }))
+    changes = (
+        pd.concat(parts, ignore_index=True) if parts
+        else pd.DataFrame(columns=["ID", LABEL_COLUMN, "Kolom", "Lama", "Baru"])
+    )
+    return {"added": added, "removed": removed, "changed": changed, "changes": changes}
@@ -0,0 +1,174 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import storage
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Jumlah baris yang dibaca, divalidasi dan ditulis per batch
+IMPORT_CHUNK_ROWS = 10000
+# Maksimal error per baris yang disimpan untuk ditampilkan
+MAX_REPORTED_ERRORS = 1000
+
+# Mode import: ganti semua data, tambah sebagai item baru, atau update per ID
+IMPORT_MODES = ('replace', 'append', 'upsert')
+
+# Kolom wajib per mode (append memberi ID baru, jadi ID tidak wajib)
+REQUIRED_COLUMNS = ["ID", "Nama Komponen", "Jumlah Masuk", "Jumlah Keluar", "Stok Akhir"]
+
+# ================================
+# PREVIEW
+# ================================
+
+def preview_csv(file, rows=5):
+    """Baca hanya beberapa baris pertama untuk preview"""
+    file.seek(0)
+    try:
+        return pd.read_csv(file, nrows=rows)
+    finally:
+        file.seek(0)
+
+def estimate_rows(file, block_size=1024 * 1024):
+    """Perkiraan jumlah baris data dari jumlah newline, tanpa parse CSV"""
+    file.seek(0)
+    newlines = 0
+    last = b''
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        if isinstance(block, str):
+            block = block.encode('utf-8')
+        newlines += block.count(b'\n')
+        last = block[-1:]
+    file.seek(0)
+    # Baris terakhir tanpa newline tetap dihitung, header tidak
+    if last and last != b'\n':
+        newlines += 1
+    return max(newlines - 1, 0)
+
+# ================================
+# VALIDASI
+# ================================
+
+def required_columns(mode):
+    if mode == 'append':
+        return [col for col in REQUIRED_COLUMNS if col != 'ID']
+    return list(REQUIRED_COLUMNS)
+
+def validate_chunk(chunk, first_line, mode='replace'):
+    """Validasi dan konversi tipe satu potongan CSV.
+
+    first_line adalah nomor baris file untuk baris pertama potongan.
+    Mengembalikan (clean_df, errors) dengan errors berupa list
+    (nomor_baris, pesan); baris yang error tidak ikut di clean_df.
+    """
+    chunk = chunk.reset_index(drop=True)
+    lines = np.arange(first_line, first_line + len(chunk))
+    invalid = np.zeros(len(chunk), dtype=bool)
+    errors = []
+
+    def reject(mask, message):
+        nonlocal invalid
+        mask = np.asarray(mask, dtype=bool) & ~invalid
+        errors.extend((int(line), message) for line in lines[mask])
+        invalid |= mask
+
+    if mode != 'append':
+        ids = pd.to_numeric(chunk['ID'], errors='coerce')
+        reject(ids.isna() | (ids % 1 != 0), "ID harus bilangan bulat")
+        chunk['ID'] = ids
+
+    nama = chunk['Nama Komponen']
+    reject(nama.isna() | (nama.astype(str).str.strip() == ""), "Nama Komponen kosong")
+
+    for col in storage.NUMERIC_COLUMNS:
+        raw = chunk[col]
+        values = pd.to_numeric(raw, errors='coerce')
+        reject(values.isna() & raw.notna(), f"{col} bukan angka")
+        chunk[col] = values.fillna(0)
+
+    # Pastikan semua kolom ada
+    for col in storage.COLUMNS:
+        if col not in chunk.columns:
+            if col == "Tanggal":
+                chunk[col] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                chunk[col] = ""
+
+    clean = chunk.loc[~invalid, storage.COLUMNS]
+    if mode != 'append':
+        clean = clean.assign(ID=clean['ID'].astype('int64'))
+    return clean.reset_index(drop=True), errors
+
+# ================================
+# IMPORT
+# ================================
+
+def _clean_chunks(file, mode, chunk_rows, result, progress=None):
+    """Potongan valid dari file; result (rows, error_count, errors) diperbarui"""
+    first_line = 2  # baris 1 adalah header
+    for chunk in pd.read_csv(file, chunksize=chunk_rows):
+        clean, errors = validate_chunk(chunk, first_line, mode)
+        first_line += len(chunk)
+        result["rows"] += len(chunk)
+        result["error_count"] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(result["errors"])
+        result["errors"].extend(errors[:max(room, 0)])
+        if progress is not None:
+            progress(result["rows"])
+        if len(clean) > 0:
+            yield clean
+
+def import_csv(backend, file, mode='replace', chunk_rows=IMPORT_CHUNK_ROWS, progress=None, accept_partial=False):
+    """Import CSV ke backend per potongan.
+
+    Setiap potongan dibaca, divalidasi lalu langsung diteruskan ke
+    backend.import_chunks(), sehingga file besar tidak pernah menjadi satu
+    frame penuh (kecuali mode upsert pada backend CSV, yang harus menulis
+    ulang file). progress(rows_read) dipanggil setelah setiap potongan.
+
+    Mode replace mengganti seluruh data, jadi file divalidasi penuh dulu:
+    jika ada baris yang error (kecuali accept_partial) atau tidak ada baris
+    valid sama sekali, import dibatalkan tanpa menulis apa pun.
+
+    Mengembalikan dict ringkasan: rows, inserted, updated, error_count,
+    errors (maksimal MAX_REPORTED_ERRORS) dan aborted.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Mode import tidak dikenal: {mode}")
+
+    file.seek(0)
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    missing_columns = [col for col in required_columns(mode) if col not in header]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {missing_columns}")
+
+    def new_result():
+        return {"rows": 0, "inserted": 0, "updated": 0, "error_count": 0, "errors": [], "aborted": False}
+
+    if mode == 'replace':
+        result = new_result()
+        with metrics.timed("import.validate") as timer:
+            valid_rows = sum(len(clean) for clean in _clean_chunks(file, mode, chunk_rows, result))
+            timer.rows = result["rows"]
+        file.seek(0)
+        if valid_rows == 0 or (result["error_count"] > 0 and not accept_partial):
+            result["aborted"] = True
+            return result
+
+    result = new_result()
+    with metrics.timed("import.csv") as timer:
+        result["inserted"], result["updated"] = backend.import_chunks(
+            _clean_chunks(file, mode, chunk_rows, result, progress), mode
+        )
+        timer.rows = result["rows"]
+        timer.bytes = file.tell()
+    return result
@@ -0,0 +1,331 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import diff
+import importer
+import metrics
+import storage
+from aggregates import AggregateStore
+from backups import BackupStore
+from changefeed import ChangeFeed
+from search_index import SearchIndex
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Nilai default untuk setting yang tidak ada di secrets (lihat from_settings())
+DEFAULT_SETTINGS = {
+    "BACKUP_DIR": "backups",
+    "BACKUP_RETENTION": 20,
+    "BACKUP_EVERY_WRITES": 50,
+    "BACKUP_INTERVAL_SECONDS": 3600,
+    "STORAGE_BACKEND": "csv",
+    "SQLITE_FILE": "inventory.db",
+    "ARROW_FILE": "inventory.arrow",
+    "LOW_STOCK_THRESHOLD": 10,
+    "SHARED_CACHE_DIR": "",
+    "CHANGE_FEED": True,
+}
+
+# Kolom yang dicari oleh pencarian teks
+SEARCH_COLUMNS = ["Nama Komponen"]
+
+# Jumlah baris per batch saat menulis file Excel / potongan CSV
+EXPORT_CHUNK_ROWS = 5000
+
+# ================================
+# HELPER
+# ================================
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def argsort(series, ascending):
+    """Posisi baris series terurut (stabil, NaN di akhir)"""
+    order = series.reset_index(drop=True).sort_values(
+        ascending=ascending, kind='stable', na_position='last'
+    )
+    return order.index.to_numpy()
+
+def write_excel(df, output, chunk_rows=EXPORT_CHUNK_ROWS, progress=None):
+    """Tulis DataFrame ke xlsx secara streaming (openpyxl write-only).
+
+    output berupa path atau file object milik pemanggil; workbook langsung
+    disimpan ke sana tanpa dibaca ulang ke memory. progress(rows_written)
+    dipanggil setelah setiap batch. Mengembalikan ukuran file (byte).
+    """
+    from openpyxl import Workbook
+
+    with metrics.timed("export.excel", rows=len(df)) as timer:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Inventory')
+        sheet.append(list(df.columns))
+
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            # NaN ditulis sebagai cell kosong, sama seperti df.to_excel
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+            if progress is not None:
+                progress(start + len(chunk))
+
+        workbook.save(output)
+        size = os.path.getsize(output) if isinstance(output, (str, os.PathLike)) else output.tell()
+        timer.bytes = size
+    return size
+
+def csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Isi CSV df per potongan teks (header di potongan pertama)"""
+    yield df.iloc[:0].to_csv(index=False, date_format=storage.DATE_FORMAT)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False, date_format=storage.DATE_FORMAT)
+
+# ================================
+# INVENTORY
+# ================================
+
+class Inventory:
+    """Layer data inventory tanpa Streamlit.
+
+    Menggabungkan backend penyimpanan, agregat dashboard, index pencarian
+    dan backup bergenerasi. Satu instance bisa dibagi oleh UI Streamlit dan
+    API HTTP dalam proses yang sama; locking ada di backend, jadi semua
+    method aman dipanggil dari banyak thread. Error tidak ditangkap di sini,
+    pemanggil yang memutuskan cara menampilkannya.
+    """
+
+    def __init__(self, data_file, backup_file=None, backup_dir=DEFAULT_SETTINGS["BACKUP_DIR"],
+                 backup_retention=DEFAULT_SETTINGS["BACKUP_RETENTION"],
+                 backup_every_writes=DEFAULT_SETTINGS["BACKUP_EVERY_WRITES"],
+                 backup_interval_seconds=DEFAULT_SETTINGS["BACKUP_INTERVAL_SECONDS"],
+                 storage_backend=DEFAULT_SETTINGS["STORAGE_BACKEND"],
+                 sqlite_file=DEFAULT_SETTINGS["SQLITE_FILE"], arrow_file=DEFAULT_SETTINGS["ARROW_FILE"],
+                 low_stock_threshold=DEFAULT_SETTINGS["LOW_STOCK_THRESHOLD"], search_columns=SEARCH_COLUMNS,
+                 shared_cache_dir=DEFAULT_SETTINGS["SHARED_CACHE_DIR"],
+                 change_feed=DEFAULT_SETTINGS["CHANGE_FEED"]):
+        # Backup ditangani BackupStore, bukan salinan penuh per commit
+        self.backend = storage.open_backend(storage_backend, data_file, sqlite_file=sqlite_file, arrow_file=arrow_file)
+        if shared_cache_dir:
+            # Beberapa proses server berbagi satu snapshot memory-mapped
+            self.backend.share(storage.SharedSnapshots(shared_cache_dir))
+        self.low_stock_threshold = low_stock_threshold
+
+        self.aggregates = AggregateStore(low_stock_threshold, path=f"{self.backend.path}.agg.json")
+        self.backend.subscribe(self.aggregates.apply)
+
+        self.search_index = SearchIndex(search_columns)
+        self.backend.subscribe(self.search_index.apply)
+
+        self.feed = None
+        if change_feed:
+            # Commit dicatat ke feed; proses lain menerapkannya ke snapshot masing-masing
+            self.feed = ChangeFeed(f"{self.backend.path}.changes.jsonl")
+            self.backend.attach_feed(self.feed)
+
+        self.backups = BackupStore(
+            backup_dir,
+            retention=backup_retention,
+            every_writes=backup_every_writes,
+            interval_seconds=backup_interval_seconds
+        )
+        if self.backups.latest() is None and backup_file and os.path.exists(backup_file):
+            # Migrasi satu kali dari backup file tunggal versi lama
+            legacy_df, _ = storage.read_csv(backup_file)
+            self.backups.snapshot(storage.compact(legacy_df), reason=f"Migrasi {backup_file}")
+        self.backups.attach(self.backend)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Buat Inventory dari mapping setting (st.secrets atau isi secrets.toml)"""
+        def get(key):
+            return settings.get(key, DEFAULT_SETTINGS.get(key))
+        return cls(
+            settings["DATA_FILE"],
+            backup_file=settings.get("BACKUP_FILE"),
+            backup_dir=get("BACKUP_DIR"),
+            backup_retention=get("BACKUP_RETENTION"),
+            backup_every_writes=get("BACKUP_EVERY_WRITES"),
+            backup_interval_seconds=get("BACKUP_INTERVAL_SECONDS"),
+            storage_backend=get("STORAGE_BACKEND"),
+            sqlite_file=get("SQLITE_FILE"),
+            arrow_file=get("ARROW_FILE"),
+            low_stock_threshold=get("LOW_STOCK_THRESHOLD"),
+            shared_cache_dir=get("SHARED_CACHE_DIR"),
+            change_feed=get("CHANGE_FEED"),
+        )
+
+    # -- baca ---------------------------------------------------------
+
+    def init_data_file(self):
+        """Buat file data kosong jika belum ada; df baru atau None"""
+        if not self.backend.exists():
+            df = pd.DataFrame(columns=storage.COLUMNS)
+            # Jika proses lain sudah membuat file lebih dulu, biarkan
+            if self.backend.create(df):
+                return df
+        return None
+
+    @metrics.instrument("inventory.snapshot")
+    def snapshot(self):
+        """Snapshot data bersama sebagai (df, version) - read-only, jangan diubah"""
+        if not self.backend.exists():
+            self.init_data_file()
+        return self.backend.read()
+
+    @metrics.instrument("inventory.count_items")
+    def count_items(self):
+        """Jumlah baris data (hanya membaca kolom ID)"""
+        if not self.backend.exists():
+            return 0
+        return len(self.backend.read_columns(["ID"]))
+
+    @metrics.instrument("inventory.summary")
+    def summary(self, df=None, version=None):
+        """Agregat dashboard untuk snapshot (default: snapshot terbaru)"""
+        if df is None:
+            df, version = self.snapshot()
+        return self.aggregates.snapshot(df, version)
+
+    @metrics.instrument("inventory.filter_positions")
+    def filter_positions(self, df, version, term=None, lokasi=None):
+        """Posisi baris yang cocok dengan teks dan/atau lokasi; None jika tanpa filter"""
+        positions = None
+        if term:
+            positions = self.search_index.search(df, version, term)
+        if lokasi is not None:
+            lokasi_positions = np.flatnonzero((df['Lokasi Penyimpanan'] == lokasi).to_numpy())
+            positions = lokasi_positions if positions is None else np.intersect1d(positions, lokasi_positions)
+        return positions
+
+    def item(self, item_id, df=None, version=None):
+        """Baris pertama dengan ID tersebut, atau None"""
+        if df is None:
+            df, version = self.snapshot()
+        return self.search_index.row(df, version, item_id)
+
+    @metrics.instrument("inventory.stock_at")
+    def stock_at(self, df, waktu):
+        """Stok Akhir setiap item pada waktu tertentu (Stok Akhir - pergerakan setelahnya)"""
+        changes = self.backend.stock_changes_since(waktu)
+        stok = df['Stok Akhir'] - df['ID'].map(changes).fillna(0)
+        return pd.DataFrame({
+            "ID": df['ID'],
+            "Nama Komponen": df['Nama Komponen'],
+            "Lokasi Penyimpanan": df['Lokasi Penyimpanan'],
+            "Stok Akhir": stok,
+        })
+
+    @metrics.instrument("inventory.recent_movements")
+    def recent_movements(self, limit=50, item_id=None):
+        """Pergerakan terbaru (terbaru dulu), opsional untuk satu ID"""
+        return self.backend.recent_movements(limit, item_id)
+
+    def change_seq(self):
+        """Nomor urut commit terakhir di change feed (0 jika feed mati)"""
+        if self.feed is None:
+            return 0
+        return self.feed.latest_seq()
+
+    def changes_since(self, seq, limit=50):
+        """Commit setelah change_seq() tertentu (terlama dulu)"""
+        if self.feed is None:
+            return []
+        return self.feed.since(seq, limit)
+
+    # -- tulis --------------------------------------------------------
+
+    @metrics.instrument("inventory.add_item")
+    def add_item(self, values):
+        """Tambah item baru (kolom tanpa ID); mengembalikan ID baru"""
+        self.init_data_file()
+        # CSV: append satu baris; SQLite: satu INSERT. Kolom yang tidak
+        # diisi menjadi 0 / kosong di backend (lihat storage.row_values())
+        return self.backend.insert({"Tanggal": _now(), **values})
+
+    @metrics.instrument("inventory.update_item")
+    def update_item(self, item_id, values):
+        """Ubah item; perubahan jumlah dicatat sebagai pergerakan supaya riwayat stok utuh"""
+        values = {"Tanggal": _now(), **values}
+        # Satu commit: selisih jumlah dihitung di dalam transaksi dari baris
+        # terbaru dan pergerakannya ditulis bersama perubahan baris
+        return self.backend.update_many({item_id: values}, catatan="Edit barang") > 0
+
+    @metrics.instrument("inventory.record_movement")
+    def record_movement(self, item_id, masuk=0, keluar=0, koreksi=0, lokasi=None, catatan=""):
+        """Catat barang masuk/keluar/koreksi stok; record pergerakan atau None jika ID tidak ada"""
+        # CSV: satu append ke ledger; SQLite: satu INSERT + satu UPDATE
+        return self.backend.record_movement(item_id, masuk, keluar, koreksi, lokasi, catatan)
+
+    @metrics.instrument("inventory.record_movements")
+    def record_movements(self, movements):
+        """Catat banyak pergerakan dalam satu commit; (records, missing).
+
+        movements berisi dict id/masuk/keluar/koreksi/lokasi/catatan. Jika
+        ada ID yang tidak ditemukan tidak ada yang dicatat.
+        """
+        return self.backend.record_movements(movements)
+
+    @metrics.instrument("inventory.delete_item")
+    def delete_item(self, item_id):
+        """Hapus item; False jika ID tidak ditemukan"""
+        return self.backend.delete(item_id)
+
+    @metrics.instrument("inventory.update_items")
+    def update_items(self, changes, catatan="Edit massal"):
+        """Update banyak item ({ID: {kolom: nilai}}) dalam satu commit; jumlah item"""
+        now = _now()
+        changes = {item_id: {"Tanggal": now, **values} for item_id, values in changes.items()}
+        # Perubahan jumlah ikut dicatat sebagai pergerakan di commit yang sama
+        return self.backend.update_many(changes, catatan=catatan)
+
+    @metrics.instrument("inventory.delete_items")
+    def delete_items(self, item_ids):
+        """Hapus banyak item dalam satu commit; jumlah item yang dihapus"""
+        return self.backend.delete_many(item_ids)
+
+    @metrics.instrument("inventory.save")
+    def save(self, df):
+        """Ganti seluruh data"""
+        return self.backend.save(df)
+
+    @metrics.instrument("inventory.import_csv")
+    def import_csv(self, file, mode='replace', progress=None, accept_partial=False):
+        """Import CSV per batch (lihat importer.import_csv()); dict ringkasan"""
+        self.init_data_file()
+        return importer.import_csv(
+            self.backend, file, mode=mode, progress=progress, accept_partial=accept_partial
+        )
+
+    # -- backup -------------------------------------------------------
+
+    @metrics.instrument("inventory.create_backup")
+    def create_backup(self, reason="Manual"):
+        """Simpan data saat ini sebagai generasi backup baru; manifest-nya"""
+        df, version = self.backend.read()
+        return self.backups.snapshot(df, version, reason=reason)
+
+    @metrics.instrument("inventory.restore_backup")
+    def restore_backup(self, gen):
+        """Pulihkan data ke generasi backup; (chunk, baris) yang ditulis"""
+        return self.backups.restore(gen, self.backend)
+
+    @metrics.instrument("inventory.restore_rows")
+    def restore_rows(self, gen, ids):
+        """Pulihkan hanya ID tertentu ke generasi backup; (ID, baris) yang ditulis"""
+        return self.backups.restore_rows(gen, ids, self.backend)
+
+    @metrics.instrument("inventory.diff_backup")
+    def diff_backup(self, gen, other=None):
+        """Perbedaan generasi gen dengan generasi other, atau dengan data saat ini
+        jika other None (lihat diff.diff_frames())"""
+        if other is None:
+            new, _ = self.snapshot()
+        else:
+            new = self.backups.load(other)
+        return diff.diff_frames(self.backups.load(gen), new)
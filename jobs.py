@@ -0,0 +1,491 @@
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import metrics
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Jumlah job yang berjalan bersamaan
+DEFAULT_WORKERS = 2
+# Jumlah job selesai yang disimpan (beserta artifact-nya)
+DEFAULT_RETENTION = 50
+# Jarak minimal (detik) antar penulisan progress ke tabel job
+PROGRESS_FLUSH_SECONDS = 1.0
+# Jarak (detik) pengecekan pembatalan saat menunggu proses anak
+POLL_SECONDS = 0.2
+
+# Status job yang belum selesai
+ACTIVE = ("queued", "running")
+
+FIELDS = (
+    "id", "kind", "key", "label", "owner", "status", "created", "started", "finished",
+    "rows_done", "rows_total", "message", "result", "artifact", "artifact_name", "mime",
+    "host", "pid",
+)
+INTEGER_FIELDS = ("rows_done", "rows_total", "pid")
+
+# Proses pemilik job yang dibuat di sini (beberapa proses server bisa berbagi jobs.db)
+HOST = socket.gethostname()
+
+# ================================
+# HELPER
+# ================================
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _json_default(value):
+    # Angka numpy (mis. nomor baris error) -> angka Python
+    return value.item() if hasattr(value, "item") else str(value)
+
+def _alive(pid):
+    """True jika proses dengan pid ini masih ada di host ini"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobCancelled(Exception):
+    """Dilempar oleh Job.progress() / Job.check() setelah job dibatalkan"""
+
+# ================================
+# JOB
+# ================================
+
+class Job:
+    """Handle yang diterima fungsi job.
+
+    progress(rows, total) melaporkan baris yang sudah diproses dan
+    sekaligus titik pembatalan; artifact_path adalah tempat menulis file
+    hasil (jika job punya artifact).
+    """
+
+    def __init__(self, runner, job_id, artifact_path):
+        self.runner = runner
+        self.id = job_id
+        self.artifact_path = artifact_path
+
+    def check(self):
+        """Lempar JobCancelled jika job sudah dibatalkan"""
+        if self.runner._cancel_event(self.id).is_set():
+            raise JobCancelled()
+
+    def progress(self, rows, total=None):
+        self.runner._progress(self.id, rows, total)
+        self.check()
+
+    def run_process(self, args):
+        """Jalankan perintah di proses terpisah (tanpa GIL proses ini).
+
+        Setiap baris stdout berupa angka dianggap progress baris. Proses
+        dihentikan jika job dibatalkan. Error proses menjadi RuntimeError
+        dengan isi stderr.
+        """
+        process = subprocess.Popen(
+            args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8'
+        )
+        cancel = self.runner._cancel_event(self.id)
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+        reader.start()
+
+        def watch():
+            # Hentikan proses anak segera setelah dibatalkan, walau stdout sedang diam
+            while process.poll() is None:
+                if cancel.wait(POLL_SECONDS):
+                    process.terminate()
+                    return
+        threading.Thread(target=watch, daemon=True).start()
+
+        for line in process.stdout:
+            line = line.strip()
+            if line.isdigit() and not cancel.is_set():
+                self.runner._progress(self.id, int(line))
+        process.wait()
+        reader.join()
+        self.check()
+        if process.returncode != 0:
+            lines = ''.join(stderr).strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"Proses keluar dengan kode {process.returncode}")
+
+# ================================
+# JOB RUNNER
+# ================================
+
+class JobRunner:
+    """Menjalankan operasi panjang di thread pool, di luar rerun Streamlit.
+
+    Setiap job dicatat di tabel SQLite (directory/jobs.db) beserta status,
+    progress dan hasilnya, jadi job tetap berjalan dan hasilnya tetap bisa
+    diambil walaupun browser yang memulainya terputus. Artifact (mis. file
+    Excel) disimpan di directory sampai job tersebut terdorong keluar oleh
+    retention. Status terkini dibaca dari memory; tabel hanya untuk
+    persistensi.
+
+    Beberapa proses server boleh berbagi satu folder job. Setiap job
+    mencatat host dan pid prosesnya; hanya proses itu yang menjalankan,
+    menyelesaikan dan menghapus job-nya. Job proses lain dibaca ulang dari
+    tabel selama masih berjalan. Saat proses dimulai, job aktif yang
+    pemiliknya sudah mati (host sama, pid tidak ada lagi) ditandai gagal.
+    """
+
+    def __init__(self, directory, workers=DEFAULT_WORKERS, retention=DEFAULT_RETENTION):
+        self.directory = directory
+        self.retention = retention
+        self.upload_directory = os.path.join(directory, "uploads")
+        os.makedirs(self.upload_directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "jobs.db")
+        self.host, self.pid = HOST, os.getpid()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._jobs = {}     # id -> dict field (urutan dibuat)
+        self._cancel = {}   # id -> threading.Event
+        self._flushed = {}  # id -> waktu progress terakhir ditulis
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="job")
+        self._init_db()
+        self._load()
+
+    # -- tabel job ----------------------------------------------------
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _init_db(self):
+        def column(field):
+            return f'{field} INTEGER' if field in INTEGER_FIELDS else f'{field} TEXT'
+        columns = ', '.join(column(field) for field in FIELDS).replace('id TEXT', 'id TEXT PRIMARY KEY', 1)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS jobs ({columns})')
+            # Tabel dari versi sebelumnya: tambahkan kolom yang belum ada
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for field in FIELDS:
+                if field not in existing:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {column(field)}')
+
+    def _save(self, job):
+        placeholders = ', '.join('?' for _ in FIELDS)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                f'INSERT OR REPLACE INTO jobs ({", ".join(FIELDS)}) VALUES ({placeholders})',
+                [job[field] for field in FIELDS]
+            )
+
+    def _load(self):
+        with self._db_lock, self._connect() as conn:
+            rows = conn.execute(f'SELECT {", ".join(FIELDS)} FROM jobs ORDER BY created, rowid').fetchall()
+        for row in rows:
+            job = dict(zip(FIELDS, row))
+            self._jobs[job["id"]] = job
+            if job["status"] in ACTIVE and self._orphaned(job):
+                # Proses pemiliknya berhenti di tengah job
+                self._finish(job["id"], "failed", message="Terhenti karena server dimulai ulang")
+
+    def _owned(self, job):
+        """True jika job dibuat proses ini"""
+        return job["host"] == self.host and job["pid"] == self.pid
+
+    def _orphaned(self, job):
+        """True jika proses pemilik job sudah tidak ada.
+
+        Job tanpa pemilik (versi lama) atau dengan pid proses ini (pid
+        dipakai ulang setelah restart) dianggap yatim; job host lain tidak
+        bisa dicek dan dibiarkan.
+        """
+        if job["pid"] is None:
+            return True
+        if job["host"] != self.host:
+            return False
+        return job["pid"] == self.pid or not _alive(job["pid"])
+
+    def _refresh(self, jobs):
+        """Baca ulang dari tabel job proses lain yang masih berjalan"""
+        foreign = [job["id"] for job in jobs if job["status"] in ACTIVE and not self._owned(job)]
+        if not foreign:
+            return jobs
+        placeholders = ', '.join('?' for _ in foreign)
+        with self._db_lock, self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT {", ".join(FIELDS)} FROM jobs WHERE id IN ({placeholders})', foreign
+            ).fetchall()
+        fresh = {row[0]: dict(zip(FIELDS, row)) for row in rows}
+        with self._lock:
+            for job_id, job in fresh.items():
+                if job_id in self._jobs:
+                    self._jobs[job_id] = job
+        return [dict(fresh.get(job["id"], job)) for job in jobs]
+
+    # -- status -------------------------------------------------------
+
+    def _cancel_event(self, job_id):
+        with self._lock:
+            return self._cancel.setdefault(job_id, threading.Event())
+
+    def _update(self, job_id, save=True, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            snapshot = dict(job)
+        if save:
+            self._save(snapshot)
+
+    def _progress(self, job_id, rows, total=None):
+        fields = {"rows_done": int(rows)}
+        if total is not None:
+            fields["rows_total"] = int(total)
+        now = time.monotonic()
+        # Progress di memory selalu terkini; tabel cukup diperbarui sesekali
+        save = now - self._flushed.get(job_id, 0.0) >= PROGRESS_FLUSH_SECONDS
+        if save:
+            self._flushed[job_id] = now
+        self._update(job_id, save=save, **fields)
+
+    def _finish(self, job_id, status, message="", result=None):
+        job = self.get(job_id)
+        artifact = job["artifact"]
+        if status != "done" and artifact and os.path.exists(artifact):
+            os.remove(artifact)
+        self._update(
+            job_id, status=status, message=message, finished=_now(),
+            result=json.dumps(result, default=_json_default) if result is not None else job["result"],
+            artifact=artifact if status == "done" else None
+        )
+        with self._lock:
+            self._cancel.pop(job_id, None)
+            self._flushed.pop(job_id, None)
+
+    # -- API ----------------------------------------------------------
+
+    def submit(self, kind, fn, label="", owner=None, key=None, rows_total=None,
+               artifact_name=None, mime=None):
+        """Jadwalkan fn(job) di thread pool; dict job yang baru dibuat.
+
+        fn mengembalikan dict hasil (disimpan sebagai JSON). Jika key
+        diberikan dan ada job kind yang sama dengan key itu yang masih
+        berjalan atau sudah selesai (dan artifact-nya masih ada), job itu
+        yang dikembalikan dan fn tidak dijalankan lagi.
+        """
+        if key is not None:
+            existing = self.find(kind, key)
+            if existing is not None:
+                return existing
+
+        job_id = uuid.uuid4().hex
+        artifact = None
+        if artifact_name:
+            artifact = os.path.join(self.directory, f"{job_id}{os.path.splitext(artifact_name)[1]}")
+        job = {
+            "id": job_id, "kind": kind, "key": key, "label": label, "owner": owner,
+            "status": "queued", "created": _now(), "started": None, "finished": None,
+            "rows_done": 0, "rows_total": rows_total, "message": "", "result": None,
+            "artifact": artifact, "artifact_name": artifact_name, "mime": mime,
+            "host": self.host, "pid": self.pid,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._cancel[job_id] = threading.Event()
+        self._save(job)
+        self._executor.submit(self._run, job_id, fn)
+        return dict(job)
+
+    def _run(self, job_id, fn):
+        if self._cancel_event(job_id).is_set():
+            self._finish(job_id, "cancelled", message="Dibatalkan sebelum dimulai")
+            return
+        kind = self.get(job_id)["kind"]
+        self._update(job_id, status="running", started=_now())
+        handle = Job(self, job_id, self.get(job_id)["artifact"])
+        try:
+            with metrics.timed(f"job.{kind}") as timer:
+                result = fn(handle)
+                timer.rows = self.get(job_id)["rows_done"]
+        except JobCancelled:
+            self._finish(job_id, "cancelled", message="Dibatalkan")
+        except Exception as e:
+            self._finish(job_id, "failed", message=str(e))
+        else:
+            job = self.get(job_id)
+            if job["rows_total"] is not None:
+                self._update(job_id, save=False, rows_done=max(job["rows_done"], job["rows_total"]))
+            self._finish(job_id, "done", result=result)
+        self.prune()
+
+    def cancel(self, job_id):
+        """Minta job berhenti; job yang sedang berjalan berhenti di progress() berikutnya.
+
+        Hanya job proses ini yang bisa dibatalkan.
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] not in ACTIVE or not self._owned(job):
+            return False
+        self._cancel_event(job_id).set()
+        return True
+
+    def get(self, job_id):
+        """Salinan dict job, atau None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job is not None else None
+        return self._refresh([job])[0] if job is not None else None
+
+    def find(self, kind, key):
+        """Job terbaru kind/key yang masih berjalan atau selesai dengan artifact utuh"""
+        with self._lock:
+            candidates = [dict(job) for job in self._jobs.values() if job["kind"] == kind and job["key"] == key]
+        for job in reversed(self._refresh(candidates)):
+            if job["status"] in ACTIVE:
+                return job
+            if job["status"] == "done" and (not job["artifact_name"] or
+                                            (job["artifact"] and os.path.exists(job["artifact"]))):
+                return job
+        return None
+
+    def list(self, owner=None, kinds=None, limit=20):
+        """Job terbaru (yang terbaru dulu), opsional difilter owner dan kind"""
+        with self._lock:
+            jobs = [
+                dict(job) for job in self._jobs.values()
+                if (owner is None or job["owner"] == owner) and (kinds is None or job["kind"] in kinds)
+            ]
+        return self._refresh(jobs[::-1][:limit])
+
+    def result(self, job):
+        """Dict hasil job (dari JSON), atau None"""
+        return json.loads(job["result"]) if job["result"] else None
+
+    def read_artifact(self, job_id):
+        """Isi artifact job yang sudah selesai, atau None"""
+        job = self.get(job_id)
+        if job is None or not job["artifact"] or not os.path.exists(job["artifact"]):
+            return None
+        with open(job["artifact"], 'rb') as f:
+            return f.read()
+
+    def save_upload(self, file, suffix=".csv"):
+        """Salin file upload ke disk supaya job tidak bergantung pada session"""
+        fd, path = tempfile.mkstemp(dir=self.upload_directory, suffix=suffix)
+        file.seek(0)
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(file, f)
+        file.seek(0)
+        return path
+
+    def prune(self):
+        """Hapus job selesai (dan artifact-nya) di luar retention.
+
+        Job proses lain yang masih hidup tidak disentuh; proses itu yang
+        menghapusnya.
+        """
+        with self._lock:
+            finished = [
+                job for job in self._jobs.values()
+                if job["status"] not in ACTIVE and (self._owned(job) or self._orphaned(job))
+            ]
+            stale = finished[:max(len(finished) - self.retention, 0)]
+            for job in stale:
+                del self._jobs[job["id"]]
+        for job in stale:
+            if job["artifact"] and os.path.exists(job["artifact"]):
+                os.remove(job["artifact"])
+        if stale:
+            with self._db_lock, self._connect() as conn:
+                conn.executemany('DELETE FROM jobs WHERE id = ?', [(job["id"],) for job in stale])
+
+def eta(job):
+    """Perkiraan sisa waktu (detik) dari laju baris sejauh ini, atau None"""
+    if job["status"] != "running" or not job["started"] or not job["rows_total"] or not job["rows_done"]:
+        return None
+    elapsed = (datetime.now() - datetime.strptime(job["started"], "%Y-%m-%d %H:%M:%S")).total_seconds()
+    remaining = max(job["rows_total"] - job["rows_done"], 0)
+    return elapsed * remaining / job["rows_done"]
+
+# ================================
+# TASK
+# ================================
+
+def import_task(inventory, path, mode, accept_partial=False):
+    """Job import CSV dari file upload yang sudah disalin (lihat save_upload())"""
+    def run(job):
+        try:
+            with open(path, 'rb') as f:
+                return inventory.import_csv(f, mode=mode, progress=job.progress, accept_partial=accept_partial)
+        finally:
+            os.remove(path)
+    return run
+
+def excel_task(inventory, separate_process=True):
+    """Job export Excel; file ditulis ke artifact job.
+
+    Dengan separate_process, data diserahkan lewat file pickle ke proses
+    Python terpisah (`python jobs.py excel ...`) sehingga pembuatan xlsx
+    tidak memegang GIL proses server.
+    """
+    def run(job):
+        df, _ = inventory.backend.read()
+        job.progress(0, total=len(df))
+        if not separate_process:
+            _write_excel_file(df, job.artifact_path, job.progress)
+            return {"rows": len(df), "bytes": os.path.getsize(job.artifact_path)}
+
+        fd, data_path = tempfile.mkstemp(dir=job.runner.upload_directory, suffix=".pkl")
+        os.close(fd)
+        try:
+            df.to_pickle(data_path)
+            job.run_process([sys.executable, os.path.abspath(__file__), "excel", data_path, job.artifact_path])
+        finally:
+            os.remove(data_path)
+        return {"rows": len(df), "bytes": os.path.getsize(job.artifact_path)}
+    return run
+
+def restore_task(inventory, gen):
+    """Job restore ke generasi backup (hanya bisa dibatalkan sebelum mulai)"""
+    def run(job):
+        job.progress(0, total=inventory.backups.manifest(gen)["rows"])
+        chunks, rows = inventory.restore_backup(gen)
+        return {"gen": gen, "chunks": chunks, "rows": rows}
+    return run
+
+def restore_rows_task(inventory, gen, ids):
+    """Job restore sebagian: hanya ID terpilih dikembalikan ke generasi backup"""
+    def run(job):
+        job.progress(0, total=len(ids))
+        restored, rows = inventory.restore_rows(gen, ids)
+        return {"gen": gen, "ids": restored, "rows": rows}
+    return run
+
+def _write_excel_file(df, path, progress=None):
+    # Import lokal: proses anak hanya perlu layer data saat menulis Excel
+    from inventory import write_excel
+
+    write_excel(df, path, progress=progress)
+
+# ================================
+# RUN
+# ================================
+
+if __name__ == "__main__":
+    # python jobs.py excel <data.pkl> <output.xlsx>: dipakai excel_task(); progress baris ke stdout
+    if len(sys.argv) == 4 and sys.argv[1] == "excel":
+        import pandas as pd
+
+        _write_excel_file(pd.read_pickle(sys.argv[2]), sys.argv[3], lambda rows: print(rows, flush=True))
+    else:
+        sys.exit("Pemakaian: python jobs.py excel <data.pkl> <output.xlsx>")
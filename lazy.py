@@ -0,0 +1,42 @@
+import importlib
+import sys
+import types
+
+import metrics
+
+
+# ================================
+# LAZY IMPORT
+# ================================
+
+class LazyModule(types.ModuleType):
+    """Pengganti modul yang baru meng-import modul aslinya saat atribut pertama dipakai.
+
+    Tidak didaftarkan di sys.modules: modul lain yang meng-import nama
+    yang sama tetap mendapat modul asli. Waktu import dicatat di metrics
+    sebagai "import.<nama>".
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = sys.modules.get(self.__name__)
+            if module is None:
+                with metrics.timed(f"import.{self.__name__}"):
+                    module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name):
+    """Modul name; jika belum di-import, LazyModule yang meng-import saat dipakai"""
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Checkpoint saldo kumulatif ditulis setiap N pergerakan
+CHECKPOINT_EVERY = 500
+# Jumlah checkpoint terakhir yang disimpan
+CHECKPOINT_RETENTION = 50
+
+# ================================
+# HELPER
+# ================================
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def stok_delta(movement):
+    """Perubahan Stok Akhir dari satu pergerakan"""
+    return movement["masuk"] - movement["keluar"] + movement["koreksi"]
+
+def _add(table, item_id, masuk, keluar, stok):
+    entry = table.setdefault(item_id, [0, 0, 0])
+    entry[0] += masuk
+    entry[1] += keluar
+    entry[2] += stok
+
+# ================================
+# LEDGER
+# ================================
+
+class Ledger:
+    """Log pergerakan stok append-only (JSON lines) di samping file CSV.
+
+    Jenis record:
+    - pergerakan: {"seq", "waktu", "id", "masuk", "keluar", "koreksi", "lokasi", "catatan"}
+    - fold: {"seq", "waktu", "fold": inode} - file data dengan inode itu
+      sudah memuat semua pergerakan sebelum record ini.
+
+    State di memory (saldo pending per ID sejak fold terakhir, saldo
+    kumulatif untuk query per waktu) diperbarui dengan membaca ekor log
+    saja. Checkpoint saldo kumulatif ditulis berkala supaya query stok
+    pada waktu tertentu tidak perlu replay dari awal.
+
+    Penulisan (append_movement(s)/append_fold) harus dilakukan sambil
+    memegang storage.file_lock() file data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoints.jsonl"
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._seq = 0
+        self._pending = {}       # ID -> [masuk, keluar, stok] sejak fold terakhir
+        self._pending_prev = {}  # ID -> [...] antara fold sebelumnya dan fold terakhir
+        self._fold_inode = None
+        self._prev_fold_inode = None
+        self._cumulative = {}    # ID -> total perubahan stok sejak awal log
+        self._since_checkpoint = 0
+
+    # -- baca ekor log ------------------------------------------------
+
+    def version(self):
+        """Versi log = ukuran file (append-only), 0 jika belum ada"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _apply(self, record):
+        self._seq = record["seq"]
+        if "fold" in record:
+            self._prev_fold_inode, self._fold_inode = self._fold_inode, record["fold"]
+            self._pending_prev, self._pending = self._pending, {}
+            return
+        delta = stok_delta(record)
+        _add(self._pending, record["id"], record["masuk"], record["keluar"], delta)
+        self._cumulative[record["id"]] = self._cumulative.get(record["id"], 0) + delta
+        self._since_checkpoint += 1
+
+    def _sync(self, upto=None):
+        size = self.version() if upto is None else upto
+        if size <= self._offset:
+            return self._offset
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        # Hanya baris lengkap; sisa baris setengah jadi dibaca berikutnya
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+        return self._offset
+
+    def sync(self, upto=None):
+        """Terapkan record baru sejak offset terakhir (maksimal s.d. upto).
+
+        Mengembalikan offset yang sudah diterapkan.
+        """
+        with self._lock:
+            return self._sync(upto)
+
+    def _append(self, record):
+        self._append_lines([record])
+
+    def _append_lines(self, records):
+        data = "".join(json.dumps(record) + "\n" for record in records).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # -- tulis --------------------------------------------------------
+
+    def append_movement(self, item_id, masuk=0, keluar=0, koreksi=0, lokasi=None, catatan=""):
+        """Catat satu pergerakan; mengembalikan record yang ditulis"""
+        return self.append_movements([{
+            "id": item_id, "masuk": masuk, "keluar": keluar, "koreksi": koreksi,
+            "lokasi": lokasi, "catatan": catatan,
+        }])[0]
+
+    def append_movements(self, movements):
+        """Catat banyak pergerakan dengan satu write + fsync.
+
+        movements berisi dict dengan key id, masuk, keluar, koreksi dan
+        opsional lokasi/catatan. Mengembalikan record yang ditulis.
+        """
+        if not movements:
+            return []
+        self.sync()
+        waktu = _now()
+        records = [
+            {
+                "seq": self._seq + offset + 1,
+                "waktu": waktu,
+                "id": int(movement["id"]),
+                "masuk": movement.get("masuk", 0),
+                "keluar": movement.get("keluar", 0),
+                "koreksi": movement.get("koreksi", 0),
+                "lokasi": movement.get("lokasi"),
+                "catatan": movement.get("catatan", ""),
+            }
+            for offset, movement in enumerate(movements)
+        ]
+        self._append_lines(records)
+        self.sync()
+        if self._since_checkpoint >= CHECKPOINT_EVERY:
+            self._write_checkpoint()
+        return records
+
+    def append_fold(self, inode):
+        """Tandai bahwa file data dengan inode ini memuat semua pergerakan"""
+        self.sync()
+        self._append({"seq": self._seq + 1, "waktu": _now(), "fold": inode})
+        self.sync()
+
+    # -- query --------------------------------------------------------
+
+    def pending(self, base_inode, upto=None):
+        """Saldo pergerakan yang belum termuat di file data dengan inode ini.
+
+        Mengembalikan (tabel, offset); tabel berisi ID -> [masuk, keluar,
+        stok] untuk semua record sampai offset (minimal upto).
+        """
+        with self._lock:
+            offset = self._sync(upto)
+            if base_inode == self._prev_fold_inode and base_inode != self._fold_inode:
+                # Fold terakhir tidak pernah menjadi file data (rename gagal)
+                combined = {}
+                for table in (self._pending_prev, self._pending):
+                    for item_id, (masuk, keluar, stok) in table.items():
+                        _add(combined, item_id, masuk, keluar, stok)
+                return combined, offset
+            return {item_id: list(entry) for item_id, entry in self._pending.items()}, offset
+
+    def _write_checkpoint(self):
+        with self._lock:
+            checkpoint = {
+                "seq": self._seq,
+                "waktu": _now(),
+                "offset": self._offset,
+                "cumulative": self._cumulative,
+            }
+            self._since_checkpoint = 0
+            line = json.dumps(checkpoint) + "\n"
+        lines = []
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                lines = f.readlines()[-(CHECKPOINT_RETENTION - 1):]
+        # Import lokal: storage sendiri mengimpor modul ini
+        from storage import write_text
+        write_text(self.checkpoint_path, "".join(lines) + line)
+
+    def _checkpoints(self):
+        if not os.path.exists(self.checkpoint_path):
+            return []
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def cumulative_at(self, waktu):
+        """Total perubahan stok per ID untuk semua pergerakan s.d. waktu.
+
+        Mulai dari checkpoint terakhir sebelum waktu, lalu replay log
+        hanya dari offset checkpoint itu.
+        """
+        checkpoints = self._checkpoints()
+        times = [checkpoint["waktu"] for checkpoint in checkpoints]
+        position = bisect_right(times, waktu)
+        if position > 0:
+            base = checkpoints[position - 1]
+            totals = {int(item_id): value for item_id, value in base["cumulative"].items()}
+            offset = base["offset"]
+        else:
+            totals, offset = {}, 0
+
+        if not os.path.exists(self.path):
+            return totals
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["waktu"] > waktu:
+                    break
+                if "fold" not in record:
+                    totals[record["id"]] = totals.get(record["id"], 0) + stok_delta(record)
+        return totals
+
+    def cumulative(self):
+        """Total perubahan stok per ID untuk semua pergerakan sampai sekarang"""
+        with self._lock:
+            self._sync()
+            return dict(self._cumulative)
+
+    def recent(self, limit=50, item_id=None):
+        """Pergerakan terbaru (terbaru dulu), opsional untuk satu ID"""
+        if not os.path.exists(self.path):
+            return []
+        result = []
+        with open(self.path, 'rb') as f:
+            # Baca dari belakang per blok sampai cukup
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            while position > 0 and len(result) < limit:
+                step = min(64 * 1024, position)
+                position -= step
+                f.seek(position)
+                buffer = f.read(step) + buffer
+                lines = buffer.split(b'\n')
+                buffer = lines[0]
+                for line in reversed(lines[1:]):
+                    if line.strip():
+                        record = json.loads(line)
+                        if "fold" not in record and (item_id is None or record["id"] == item_id):
+                            result.append(record)
+            if position == 0 and buffer.strip() and len(result) < limit:
+                record = json.loads(buffer)
+                if "fold" not in record and (item_id is None or record["id"] == item_id):
+                    result.append(record)
+        return result[:limit]
@@ -1,12 +1,27 @@
 import streamlit as st
-import pandas as pd
+import time
 import os
 from datetime import datetime
-import json
-import io
-import os 
 # from dotenv import load_dotenv
-import random
+import functools
+
+import auth
+import metrics
+from lazy import lazy_import
+
+# Awal eksekusi script (untuk mengukur waktu render pertama)
+SCRIPT_START = time.perf_counter()
+
+# Modul berat (pandas, layer data, importer, API) baru di-import saat pertama
+# dipakai, jadi halaman login tidak perlu memuatnya
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+api = lazy_import("api")
+importer = lazy_import("importer")
+storage = lazy_import("storage")
+aggregates = lazy_import("aggregates")
+inventory = lazy_import("inventory")
+jobs = lazy_import("jobs")
 
 
 
@@ -16,118 +31,329 @@ import random
 
 # st.write(st.secrets["nonexistent_key"])
 
-# Password untuk mengakses aplikasi
-APP_PASSWORD = st.secrets["APP_PASSWORD"]  # Ganti dengan password yang diinginkan
+# Password untuk mengakses aplikasi (mode lama: satu akun "admin").
+# Diabaikan jika USERS diisi.
+APP_PASSWORD = st.secrets.get("APP_PASSWORD", "")  # Ganti dengan password yang diinginkan
+
+# Akun per user: [USERS.<nama>] password_hash = "..." (dari `python auth.py hash`),
+# role = "admin" | "operator" | "viewer"
+USERS = st.secrets.get("USERS", {})
+# Kunci tanda tangan token session; kosong = acak per proses (login ulang setelah restart)
+AUTH_SECRET = st.secrets.get("AUTH_SECRET", "")
+# Umur token session (detik)
+SESSION_TTL_SECONDS = st.secrets.get("SESSION_TTL_SECONDS", auth.DEFAULT_SESSION_TTL)
+# Rate limit login per username dan per IP: percobaan beruntun, lalu satu per N detik
+LOGIN_BURST = st.secrets.get("LOGIN_BURST", auth.DEFAULT_LOGIN_BURST)
+LOGIN_REFILL_SECONDS = st.secrets.get("LOGIN_REFILL_SECONDS", auth.DEFAULT_LOGIN_REFILL_SECONDS)
 
 # File untuk menyimpan data
 DATA_FILE = st.secrets["DATA_FILE"]
 BACKUP_FILE = st.secrets["BACKUP_FILE"]
 
+# Folder backup bergenerasi; BACKUP_FILE lama dimigrasikan sebagai generasi pertama
+BACKUP_DIR = st.secrets.get("BACKUP_DIR", "backups")
+# Jumlah generasi backup yang disimpan
+BACKUP_RETENTION = st.secrets.get("BACKUP_RETENTION", 20)
+# Backup otomatis setiap N perubahan, atau jika backup terakhir lebih tua dari sekian detik
+BACKUP_EVERY_WRITES = st.secrets.get("BACKUP_EVERY_WRITES", 50)
+BACKUP_INTERVAL_SECONDS = st.secrets.get("BACKUP_INTERVAL_SECONDS", 3600)
+
+# Backend penyimpanan: "csv" (default), "sqlite" atau "arrow" (kolom, memory-mapped)
+STORAGE_BACKEND = st.secrets.get("STORAGE_BACKEND", "csv")
+# Database SQLite; saat pertama dibuka diisi otomatis dari DATA_FILE
+SQLITE_FILE = st.secrets.get("SQLITE_FILE", "inventory.db")
+# File Arrow (STORAGE_BACKEND = "arrow"); saat pertama dibuka diisi dari DATA_FILE
+ARROW_FILE = st.secrets.get("ARROW_FILE", "inventory.arrow")
+
+# Folder snapshot bersama (Arrow, memory-mapped) untuk beberapa proses server di
+# mesin yang sama; kosong = setiap proses menyimpan salinannya sendiri
+SHARED_CACHE_DIR = st.secrets.get("SHARED_CACHE_DIR", "")
+
+# Change feed: setiap commit dicatat di `<file data>.changes.jsonl`; proses lain
+# menerapkan perubahannya ke snapshot di memory tanpa membaca ulang seluruh data
+CHANGE_FEED = st.secrets.get("CHANGE_FEED", True)
+# Interval (detik) pengecekan perubahan dari user lain di sidebar; 0 = mati
+LIVE_POLL_SECONDS = st.secrets.get("LIVE_POLL_SECONDS", 5)
+# Jumlah maksimal perubahan yang ditampilkan di sidebar
+LIVE_CHANGES_LIMIT = 10
+
 # Google Sheets URL untuk sync (optional)
 GOOGLE_SHEET_URL = st.secrets["GOOGLE_SHEET_URL"]  # Ganti dengan URL sheet Anda
 
+# Batas "stok rendah" di dashboard (Stok Akhir <= batas)
+LOW_STOCK_THRESHOLD = st.secrets.get("LOW_STOCK_THRESHOLD", 10)
+
+# Kolom yang dicari oleh kotak "Cari komponen"
+SEARCH_COLUMNS = ["Nama Komponen"]
+
+# Jumlah maksimal kandidat di item picker (tab Edit & Hapus)
+PICKER_LIMIT = 50
+
+# Jumlah maksimal baris di grid edit massal dan daftar hapus massal
+BULK_LIMIT = 500
+# Kolom yang boleh diubah di grid edit massal
+BULK_EDIT_COLUMNS = [
+    "Nama Komponen", "Deskripsi", "Jumlah Masuk", "Jumlah Keluar",
+    "Stok Akhir", "Lokasi Penyimpanan", "Keterangan"
+]
+
+# Pilihan jumlah baris per halaman tabel
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250, 500]
+
+# API JSON (api.py) di dalam proses Streamlit; 0 = tidak dijalankan.
+# Request wajib membawa header "Authorization: Bearer <API_TOKEN>".
+API_PORT = st.secrets.get("API_PORT", 0)
+API_HOST = st.secrets.get("API_HOST", "127.0.0.1")
+API_TOKEN = st.secrets.get("API_TOKEN", "")
+
+# Instrumentasi latency (panel performa di sidebar untuk admin); mati = tanpa overhead berarti
+METRICS_ENABLED = st.secrets.get("METRICS_ENABLED", False)
+# Opsional: log JSON per pemanggilan, dan dump teks format Prometheus
+METRICS_LOG_FILE = st.secrets.get("METRICS_LOG_FILE", "")
+METRICS_PROMETHEUS_FILE = st.secrets.get("METRICS_PROMETHEUS_FILE", "")
+
+# Mode hemat untuk cold start: hanya tab aktif yang dihitung, info data di
+# sidebar dihitung setelah tab, dan export CSV baru dibuat setelah diminta
+LAZY_LOADING = st.secrets.get("LAZY_LOADING", False)
+
+# Job latar belakang (import, export Excel, restore): tabel job dan artifact di folder ini
+# (boleh dibagi beberapa proses server; setiap job dicatat dengan proses pemiliknya)
+JOBS_DIR = st.secrets.get("JOBS_DIR", "jobs")
+JOBS_WORKERS = st.secrets.get("JOBS_WORKERS", 2)
+# Jumlah job selesai (beserta file hasilnya) yang disimpan
+JOBS_RETENTION = st.secrets.get("JOBS_RETENTION", 50)
+# File Excel dibuat di proses Python terpisah supaya tidak memegang GIL server
+JOBS_EXCEL_PROCESS = st.secrets.get("JOBS_EXCEL_PROCESS", True)
+# Interval (detik) pembaruan progress job di halaman
+JOBS_POLL_SECONDS = st.secrets.get("JOBS_POLL_SECONDS", 1)
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 # ================================
 # FUNGSI AUTHENTICATION
 # ================================
 
+@st.cache_resource(show_spinner=False)
+def get_accounts():
+    """Akun user, di-hash sekali per proses (APP_PASSWORD jika USERS kosong)"""
+    if USERS:
+        return auth.Accounts({name: dict(account) for name, account in USERS.items()})
+    if not APP_PASSWORD:
+        raise ValueError("Isi USERS atau APP_PASSWORD di secrets.toml")
+    return auth.Accounts.single_password(APP_PASSWORD)
+
+@st.cache_resource(show_spinner=False)
+def get_auth_secret():
+    """Kunci HMAC token session"""
+    return AUTH_SECRET.encode('utf-8') if AUTH_SECRET else os.urandom(32)
+
+@st.cache_resource(show_spinner=False)
+def get_login_limiter():
+    """Rate limiter login, dibagi ke semua session dalam proses"""
+    return auth.RateLimiter(LOGIN_BURST, LOGIN_REFILL_SECONDS)
+
+def current_user():
+    """Username dari token session yang valid, selain itu None.
+
+    Hanya verifikasi HMAC di memory: tidak ada hash password dan tidak ada
+    akses storage di setiap rerun.
+    """
+    username = auth.verify_token(st.session_state.get('auth_token'), get_auth_secret())
+    if username is None or get_accounts().role(username) is None:
+        st.session_state.pop('auth_token', None)
+        return None
+    return username
+
+def current_role():
+    """Role user yang login (dibaca dari akun, jadi perubahan role langsung berlaku)"""
+    username = current_user()
+    return get_accounts().role(username) if username else None
+
 def check_password():
     """Cek apakah user sudah login atau belum"""
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-    
-    if not st.session_state.authenticated:
-        st.title("🔐 Login - Inventory Management System")
-        st.markdown("---")
-        
-        with st.form("login_form"):
-            password = st.text_input("Password:", type="password", placeholder="Masukkan password")
-            submit_button = st.form_submit_button("Login")
-            
-            if submit_button:
-                if password == APP_PASSWORD:
-                    st.session_state.authenticated = True
-                    st.success("✅ Login berhasil!")
-                    st.rerun()
-                else:
-                    st.error("❌ Password salah!")
-        
-        st.info("💡 **Petunjuk:** Masukkan password untuk mengakses sistem inventory")
-        return False
-    
-    return True
+    if current_user() is not None:
+        return True
+
+    st.title("🔐 Login - Inventory Management System")
+    st.markdown("---")
+
+    # Mode lama (hanya APP_PASSWORD): form cukup berisi password
+    multi_user = bool(USERS)
+    with st.form("login_form"):
+        username = st.text_input("Username:", placeholder="Masukkan username") if multi_user else "admin"
+        password = st.text_input("Password:", type="password", placeholder="Masukkan password")
+        submit_button = st.form_submit_button("Login")
+
+        if submit_button:
+            limiter = get_login_limiter()
+            ip_address = getattr(st.context, "ip_address", None)
+            keys = (f"user:{username}", f"ip:{ip_address}" if ip_address else None)
+            if not limiter.allow(*keys):
+                st.error(f"⏳ Terlalu banyak percobaan login. Coba lagi dalam {limiter.retry_after(*keys):.0f} detik.")
+            elif get_accounts().authenticate(username, password):
+                limiter.reset(keys[0])
+                st.session_state.auth_token = auth.issue_token(username, get_auth_secret(), SESSION_TTL_SECONDS)
+                st.success("✅ Login berhasil!")
+                st.rerun()
+            else:
+                st.error("❌ Username atau password salah!" if multi_user else "❌ Password salah!")
+
+    st.info("💡 **Petunjuk:** Masukkan password untuk mengakses sistem inventory")
+    return False
 
 def logout():
     """Logout user"""
-    st.session_state.authenticated = False
+    st.session_state.pop('auth_token', None)
     st.rerun()
 
+def is_admin():
+    """True jika user yang login memiliki role admin"""
+    return current_role() == "admin"
+
 # ================================
 # FUNGSI DATA MANAGEMENT
 # ================================
 
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    """Recorder instrumentasi proses, dikonfigurasi sekali dari secrets"""
+    metrics.configure(METRICS_ENABLED, log_path=METRICS_LOG_FILE, prometheus_path=METRICS_PROMETHEUS_FILE)
+    return metrics.RECORDER
+
+@st.cache_resource(show_spinner=False)
+def get_inventory():
+    """Layer data (backend, agregat, index, backup), dibagi ke semua session dalam proses"""
+    return inventory.Inventory(
+        DATA_FILE,
+        backup_file=BACKUP_FILE,
+        backup_dir=BACKUP_DIR,
+        backup_retention=BACKUP_RETENTION,
+        backup_every_writes=BACKUP_EVERY_WRITES,
+        backup_interval_seconds=BACKUP_INTERVAL_SECONDS,
+        storage_backend=STORAGE_BACKEND,
+        sqlite_file=SQLITE_FILE,
+        arrow_file=ARROW_FILE,
+        low_stock_threshold=LOW_STOCK_THRESHOLD,
+        search_columns=SEARCH_COLUMNS,
+        shared_cache_dir=SHARED_CACHE_DIR,
+        change_feed=CHANGE_FEED
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_api_server():
+    """API JSON di thread terpisah dengan Inventory yang sama (jika API_PORT diisi)"""
+    if not API_PORT:
+        return None
+    return api.start_in_thread(get_inventory(), API_PORT, API_TOKEN, host=API_HOST)
+
+def get_backend():
+    """Backend penyimpanan, dibagi ke semua session dalam proses"""
+    return get_inventory().backend
+
+def get_aggregates():
+    """Agregat dashboard, diperbarui incremental dan disimpan di samping data"""
+    return get_inventory().aggregates
+
+def get_search_index():
+    """Index pencarian, diperbarui incremental oleh setiap commit backend"""
+    return get_inventory().search_index
+
+def get_backups():
+    """Backup bergenerasi, diambil otomatis dari event backend"""
+    return get_inventory().backups
+
+@st.cache_resource(show_spinner=False)
+def get_jobs():
+    """Runner job latar belakang, dibagi ke semua session dalam proses"""
+    return jobs.JobRunner(JOBS_DIR, workers=JOBS_WORKERS, retention=JOBS_RETENTION)
+
 def init_data_file():
     """Inisialisasi file data jika belum ada"""
-    if not os.path.exists(DATA_FILE):
-        # Buat DataFrame kosong dengan struktur yang benar
-        columns = [
-            "ID", "Tanggal", "Nama Komponen", "Deskripsi", 
-            "Jumlah Masuk", "Jumlah Keluar", "Stok Akhir", 
-            "Lokasi Penyimpanan", "Keterangan"
-        ]
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(DATA_FILE, index=False)
-        
-        return df
-    return None
+    return get_inventory().init_data_file()
 
-def load_data():
-    """Load data dari CSV file"""
+def load_snapshot():
+    """Snapshot data bersama sebagai (df, version) - read-only, jangan diubah"""
     try:
-        if os.path.exists(DATA_FILE):
-            df = pd.read_csv(DATA_FILE)
-            # Pastikan kolom numerik dalam format yang benar
-            if 'Jumlah Masuk' in df.columns:
-                df['Jumlah Masuk'] = pd.to_numeric(df['Jumlah Masuk'], errors='coerce').fillna(0)
-            if 'Jumlah Keluar' in df.columns:
-                df['Jumlah Keluar'] = pd.to_numeric(df['Jumlah Keluar'], errors='coerce').fillna(0)
-            if 'Stok Akhir' in df.columns:
-                df['Stok Akhir'] = pd.to_numeric(df['Stok Akhir'], errors='coerce').fillna(0)
-            return df
-        else:
-            return init_data_file()
+        return get_inventory().snapshot()
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
 
-def load_backup_data():
-    """Load data dari backup file"""
+def count_items():
+    """Jumlah baris data (hanya membaca kolom ID)"""
     try:
-        if os.path.exists(BACKUP_FILE):
-            df = pd.read_csv(BACKUP_FILE)
-            # Pastikan kolom numerik dalam format yang benar
-            if 'Jumlah Masuk' in df.columns:
-                df['Jumlah Masuk'] = pd.to_numeric(df['Jumlah Masuk'], errors='coerce').fillna(0)
-            if 'Jumlah Keluar' in df.columns:
-                df['Jumlah Keluar'] = pd.to_numeric(df['Jumlah Keluar'], errors='coerce').fillna(0)
-            if 'Stok Akhir' in df.columns:
-                df['Stok Akhir'] = pd.to_numeric(df['Stok Akhir'], errors='coerce').fillna(0)
-            return df
-        else:
-            return pd.DataFrame()
+        return get_inventory().count_items()
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return 0
+
+def format_bytes(size):
+    """Ukuran byte yang mudah dibaca (B, KB, MB, GB)"""
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+    return f"{size:,.1f} GB"
+
+def format_duration(seconds):
+    """Durasi yang mudah dibaca (detik, menit, jam)"""
+    if seconds < 60:
+        return f"{seconds:.0f} detik"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} menit"
+    return f"{seconds / 3600:.1f} jam"
+
+def load_data():
+    """Load data dari storage backend"""
+    # Snapshot dibagi antar session, kembalikan salinan
+    df, _ = load_snapshot()
+    return df.copy()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_generation(gen):
+    """Isi satu generasi backup (generasi tidak pernah berubah)"""
+    return get_backups().load(gen)
+
+def load_backup_snapshot(gen):
+    """Snapshot generasi backup sebagai (df, gen) - read-only, jangan diubah"""
+    try:
+        return _load_generation(gen), gen
     except Exception as e:
         st.error(f"Error loading backup data: {str(e)}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _backup_diff(gen, other, version):
+    """Diff generasi gen dengan generasi other, atau dengan data saat ini
+    (versi version) jika other None; di-cache per pasangan"""
+    return get_inventory().diff_backup(gen, other)
+
+def load_backup_diff(gen, other=None):
+    """Hasil diff.diff_frames() generasi gen vs other / data saat ini, atau None"""
+    try:
+        version = load_snapshot()[1] if other is None else None
+        return _backup_diff(gen, other, version)
+    except Exception as e:
+        st.error(f"Error comparing backup: {str(e)}")
+        return None
+
+def load_backup_data(gen):
+    """Load data dari satu generasi backup"""
+    df, _ = load_backup_snapshot(gen)
+    return df.copy()
+
+def create_backup(reason="Manual"):
+    """Simpan data saat ini sebagai generasi backup baru"""
+    try:
+        return get_inventory().create_backup(reason)
+    except Exception as e:
+        st.error(f"Error creating backup: {str(e)}")
+        return None
 
 def save_data(df):
-    """Simpan data ke CSV file"""
+    """Simpan seluruh data ke storage backend"""
     try:
-        # Backup data lama
-        if os.path.exists(DATA_FILE):
-            df_backup = pd.read_csv(DATA_FILE)
-            df_backup.to_csv(BACKUP_FILE, index=False)
-        
-        # Simpan data baru
-        df.to_csv(DATA_FILE, index=False)
+        get_inventory().save(df)
         return True
     except Exception as e:
         st.error(f"Error saving data: {str(e)}")
@@ -139,33 +365,23 @@ def get_next_id(df):
         return 1
     return int(df['ID'].max()) + 1
 
+def _item_values(item_data):
+    """Mapping field form ke kolom inventory (tanpa ID dan Tanggal)"""
+    return {
+        "Nama Komponen": item_data['nama'],
+        "Deskripsi": item_data['deskripsi'],
+        "Jumlah Masuk": item_data['jumlah_masuk'],
+        "Jumlah Keluar": item_data['jumlah_keluar'],
+        "Stok Akhir": item_data['stok_akhir'],
+        "Lokasi Penyimpanan": item_data['lokasi'],
+        "Keterangan": item_data['keterangan']
+    }
+
 def add_item(item_data):
     """Tambah item baru"""
     try:
-        df = load_data()
-        new_id = get_next_id(df)
-        
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_row = {
-            "ID": new_id,
-            "Tanggal": now,
-            "Nama Komponen": item_data['nama'],
-            "Deskripsi": item_data['deskripsi'],
-            "Jumlah Masuk": item_data['jumlah_masuk'],
-            "Jumlah Keluar": item_data['jumlah_keluar'],
-            "Stok Akhir": item_data['stok_akhir'],
-            "Lokasi Penyimpanan": item_data['lokasi'],
-            "Keterangan": item_data['keterangan']
-        }
-        
-        # Tambah row baru
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        
-        # Simpan data
-        if save_data(df):
-            return True, new_id
-        else:
-            return False, None
+        new_id = get_inventory().add_item(_item_values(item_data))
+        return True, new_id
             
     except Exception as e:
         st.error(f"Error adding item: {str(e)}")
@@ -174,163 +390,447 @@ def add_item(item_data):
 def update_item(item_id, item_data):
     """Update item yang sudah ada"""
     try:
-        df = load_data()
-        
-        # Find row dengan ID yang sesuai
-        row_index = df[df['ID'] == item_id].index
-        
-        if len(row_index) == 0:
-            return False
-        
-        # Update data
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        idx = row_index[0]
-        
-        df.loc[idx, 'Tanggal'] = now
-        df.loc[idx, 'Nama Komponen'] = item_data['nama']
-        df.loc[idx, 'Deskripsi'] = item_data['deskripsi']
-        df.loc[idx, 'Jumlah Masuk'] = item_data['jumlah_masuk']
-        df.loc[idx, 'Jumlah Keluar'] = item_data['jumlah_keluar']
-        df.loc[idx, 'Stok Akhir'] = item_data['stok_akhir']
-        df.loc[idx, 'Lokasi Penyimpanan'] = item_data['lokasi']
-        df.loc[idx, 'Keterangan'] = item_data['keterangan']
-        
-        # Simpan data
-        return save_data(df)
+        return get_inventory().update_item(item_id, _item_values(item_data))
         
     except Exception as e:
         st.error(f"Error updating item: {str(e)}")
         return False
 
+def record_movement(item_id, masuk=0, keluar=0, koreksi=0, lokasi=None, catatan=""):
+    """Catat barang masuk/keluar/koreksi stok untuk satu item"""
+    try:
+        return get_inventory().record_movement(item_id, masuk, keluar, koreksi, lokasi, catatan) is not None
+        
+    except Exception as e:
+        st.error(f"Error recording movement: {str(e)}")
+        return False
+
+def stock_at(df, waktu):
+    """Stok Akhir setiap item pada waktu tertentu (Stok Akhir - pergerakan setelahnya)"""
+    try:
+        return get_inventory().stock_at(df, waktu)
+    except Exception as e:
+        st.error(f"Error loading movements: {str(e)}")
+        return None
+
 def delete_item(item_id):
     """Hapus item"""
     try:
-        df = load_data()
-        
-        # Filter out item dengan ID yang sesuai
-        df_filtered = df[df['ID'] != item_id]
-        
-        if len(df_filtered) == len(df):
-            return False  # Item tidak ditemukan
-        
-        # Simpan data
-        return save_data(df_filtered)
+        return get_inventory().delete_item(item_id)
         
     except Exception as e:
         st.error(f"Error deleting item: {str(e)}")
         return False
 
+def update_items(changes):
+    """Update banyak item ({ID: {kolom: nilai}}) dalam satu commit; jumlah item"""
+    try:
+        return get_inventory().update_items(changes)
+        
+    except Exception as e:
+        st.error(f"Error updating items: {str(e)}")
+        return None
+
+def delete_items(item_ids):
+    """Hapus banyak item dalam satu commit; jumlah item yang dihapus"""
+    try:
+        return get_inventory().delete_items(item_ids)
+        
+    except Exception as e:
+        st.error(f"Error deleting items: {str(e)}")
+        return None
+
+# ================================
+# FRAGMENT
+# ================================
+
+def fragment(name, run_every=None):
+    """Decorator: st.fragment yang waktunya dicatat ke metrics sebagai "render.<name>".
+
+    Interaksi widget di dalam fragment hanya menjalankan ulang fungsi itu,
+    bukan seluruh main(); waktu rerun parsial tersebut dicatat sebagai
+    "rerun.fragment" (bandingkan dengan "rerun" untuk rerun penuh).
+    Perubahan data tetap memanggil st.rerun() sehingga semua tab dan
+    sidebar dihitung ulang dengan versi data baru. run_every diteruskan ke
+    st.fragment (rerun otomatis berkala).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def timed_fn(*args, **kwargs):
+            recorder = get_metrics()
+            if recorder.in_run():
+                with metrics.timed(f"render.{name}"):
+                    return fn(*args, **kwargs)
+            # Rerun fragment saja: main() tidak berjalan
+            recorder.begin_run()
+            try:
+                with metrics.timed(f"render.{name}"):
+                    return fn(*args, **kwargs)
+            finally:
+                recorder.end_run("rerun.fragment")
+        return st.fragment(timed_fn, run_every=run_every)
+    return decorator
+
 # ================================
 # FUNGSI EXPORT/IMPORT
 # ================================
 
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _build_csv_export(kind, version):
+    """Buat isi CSV sekali per versi data"""
+    df, _ = get_backend().read()
+    with metrics.timed("export.csv", rows=len(df)) as timer:
+        data = df.to_csv(index=False)
+        timer.bytes = len(data)
+    return data
+
 def export_to_csv():
     """Export data ke CSV untuk download"""
     try:
-        df = load_data()
-        return df.to_csv(index=False)
+        backend = get_backend()
+        if not backend.exists():
+            return load_data().to_csv(index=False)
+        return _build_csv_export(backend.kind, backend.version())
     except Exception as e:
         st.error(f"Error exporting data: {str(e)}")
         return None
 
-def export_to_excel():
-    """Export data ke Excel untuk download"""
-    try:
-        df = load_data()
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Inventory', index=False)
-        return output.getvalue()
-    except Exception as e:
-        st.error(f"Error exporting to Excel: {str(e)}")
+def download_on_request(key, label, prepare_label, build, extension, mime):
+    """Tombol download yang isinya baru dibuat (build()) setelah diminta user"""
+    requested_key = f"{key}_requested"
+    if not st.session_state.get(requested_key):
+        # Langsung dibuat di run yang sama: tanpa st.rerun(), jadi di dalam
+        # fragment klik ini tidak menjalankan ulang seluruh aplikasi
+        if not st.button(prepare_label, key=f"{key}_prepare", width='stretch'):
+            return
+        st.session_state[requested_key] = True
+
+    data = build()
+    if data:
+        st.download_button(
+            label=label,
+            data=data,
+            file_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+            mime=mime,
+            key=key,
+            width='stretch'
+        )
+
+def excel_download_button(key, label, prepare_label):
+    """Tombol download Excel; file dibuat oleh job latar belakang setelah diminta"""
+    job_key = f"{key}_job"
+    job = get_jobs().get(st.session_state[job_key]) if job_key in st.session_state else None
+    if job is None or job["status"] in ("failed", "cancelled"):
+        if job is not None:
+            render_job(job["id"], key)
+        if not st.button(prepare_label, key=f"{key}_prepare", width='stretch'):
+            return
+        try:
+            job = start_excel_job()
+        except Exception as e:
+            st.error(f"Error exporting to Excel: {str(e)}")
+            return
+        st.session_state[job_key] = job["id"]
+    render_job(job["id"], key, download_label=label)
+
+# ================================
+# FUNGSI JOB
+# ================================
+
+def start_excel_job():
+    """Job export Excel; dipakai ulang jika versi data yang sama sudah/sedang dibuat"""
+    backend = get_backend()
+    return get_jobs().submit(
+        "excel",
+        jobs.excel_task(get_inventory(), separate_process=JOBS_EXCEL_PROCESS),
+        label="Export Excel",
+        owner=current_user(),
+        key=f"{backend.kind}:{backend.version()}",
+        artifact_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        mime=EXCEL_MIME
+    )
+
+def start_import_job(uploaded_file, mode, accept_partial=False):
+    """Job import CSV; file upload disalin dulu supaya job tidak bergantung pada session"""
+    path = get_jobs().save_upload(uploaded_file)
+    return get_jobs().submit(
+        "import",
+        jobs.import_task(get_inventory(), path, mode, accept_partial),
+        label=f"Import {uploaded_file.name} ({mode})",
+        owner=current_user(),
+        rows_total=importer.estimate_rows(uploaded_file)
+    )
+
+def start_restore_job(gen):
+    """Job restore ke generasi backup"""
+    return get_jobs().submit(
+        "restore",
+        jobs.restore_task(get_inventory(), gen),
+        label=f"Restore ke #{gen}",
+        owner=current_user()
+    )
+
+def start_restore_rows_job(gen, ids):
+    """Job restore sebagian: hanya ID terpilih dari generasi backup"""
+    return get_jobs().submit(
+        "restore",
+        jobs.restore_rows_task(get_inventory(), gen, ids),
+        label=f"Restore {len(ids)} ID dari #{gen}",
+        owner=current_user()
+    )
+
+@fragment("job_progress", run_every=JOBS_POLL_SECONDS)
+def render_job_progress(job_id, key):
+    """Progress bar job yang berjalan; diperbarui sendiri setiap JOBS_POLL_SECONDS"""
+    job = get_jobs().get(job_id)
+    if job is None or job["status"] not in jobs.ACTIVE:
+        # Job selesai: rerun penuh supaya semua tab melihat hasil dan versi data baru
+        st.rerun()
+
+    done, total = job["rows_done"] or 0, job["rows_total"]
+    if job["status"] == "queued":
+        text = f"⏳ {job['label']}: menunggu giliran..."
+    else:
+        text = f"⚙️ {job['label']}: {done:,} baris" + (f" dari {total:,}" if total else "")
+        remaining = jobs.eta(job)
+        if remaining is not None:
+            text += f" · sisa ±{format_duration(remaining)}"
+    st.progress(min(done / total, 1.0) if total else 0.0, text=text)
+    if st.button("⏹️ Batalkan", key=f"{key}_cancel", width='stretch'):
+        get_jobs().cancel(job_id)
+
+def render_job(job_id, key, download_label=None):
+    """Status satu job: progress, error, atau tombol download artifact; dict job"""
+    job = get_jobs().get(job_id)
+    if job is None:
         return None
+    if job["status"] in jobs.ACTIVE:
+        render_job_progress(job_id, key)
+    elif job["status"] == "failed":
+        st.error(f"❌ {job['label']} gagal: {job['message']}")
+    elif job["status"] == "cancelled":
+        st.warning(f"⏹️ {job['label']} dibatalkan.")
+    elif download_label and job["artifact"]:
+        data = get_jobs().read_artifact(job_id)
+        if data:
+            st.download_button(
+                label=download_label,
+                data=data,
+                file_name=job["artifact_name"],
+                mime=job["mime"],
+                key=f"{key}_download",
+                width='stretch'
+            )
+    return job
 
-def import_from_csv(uploaded_file):
-    """Import data dari CSV file"""
-    try:
-        df = pd.read_csv(uploaded_file)
-        
-        # Validasi kolom yang diperlukan
-        required_columns = ["ID", "Nama Komponen", "Jumlah Masuk", "Jumlah Keluar", "Stok Akhir"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            st.error(f"Missing columns: {missing_columns}")
-            return False
-        
-        # Pastikan kolom numerik
-        df['Jumlah Masuk'] = pd.to_numeric(df['Jumlah Masuk'], errors='coerce').fillna(0)
-        df['Jumlah Keluar'] = pd.to_numeric(df['Jumlah Keluar'], errors='coerce').fillna(0)
-        df['Stok Akhir'] = pd.to_numeric(df['Stok Akhir'], errors='coerce').fillna(0)
-        
-        # Pastikan semua kolom ada
-        all_columns = [
-            "ID", "Tanggal", "Nama Komponen", "Deskripsi", 
-            "Jumlah Masuk", "Jumlah Keluar", "Stok Akhir", 
-            "Lokasi Penyimpanan", "Keterangan"
-        ]
-        
-        for col in all_columns:
-            if col not in df.columns:
-                if col == "Tanggal":
-                    df[col] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    df[col] = ""
-        
-        # Reorder columns
-        df = df[all_columns]
-        
-        # Simpan data
-        return save_data(df)
-        
-    except Exception as e:
-        st.error(f"Error importing data: {str(e)}")
-        return False
+def render_job_history():
+    """Job terakhir user ini (admin: semua user) beserta file hasilnya"""
+    owner = None if is_admin() else current_user()
+    recent = get_jobs().list(owner=owner, limit=10)
+    with st.expander(f"🗂️ Riwayat Job ({len(recent)})"):
+        if not recent:
+            st.caption("Belum ada job.")
+        icons = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "⏹️"}
+        for job in recent:
+            rows = f" · {job['rows_done']:,} baris" if job["rows_done"] else ""
+            owner_label = f" · {job['owner']}" if owner is None and job["owner"] else ""
+            st.write(f"{icons.get(job['status'], '')} **{job['label']}** · {job['created']}{rows}{owner_label}")
+            if job["status"] == "failed":
+                st.caption(job["message"])
+            elif job["status"] == "done" and job["artifact"]:
+                render_job(job["id"], f"history_{job['id']}", download_label=f"⬇️ {job['artifact_name']}")
 
 # ================================
-# MAIN APPLICATION
+# FUNGSI TABEL & STATISTIK
 # ================================
 
-def main():
-    """Aplikasi utama"""
-    
-    # Initialize data file
-    init_data_file()
-    
-    # Cek authentication
-    if not check_password():
+def inventory_column_config():
+    """Konfigurasi kolom untuk tabel inventory"""
+    return {
+        "ID": st.column_config.NumberColumn("ID", width="small"),
+        "Jumlah Masuk": st.column_config.NumberColumn("Jumlah Masuk"),
+        "Jumlah Keluar": st.column_config.NumberColumn("Jumlah Keluar"),
+        "Stok Akhir": st.column_config.NumberColumn("Stok Akhir"),
+    }
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _sorted_positions(source, version, column, ascending, _df):
+    """Urutan sort seluruh frame, di-cache per versi data"""
+    return inventory.argsort(_df[column], ascending)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _backup_summary(version, _df):
+    """Statistik generasi backup, di-cache per generasi"""
+    return aggregates.summarize(_df, LOW_STOCK_THRESHOLD)
+
+def render_paged_table(df, key, positions=None, source=None, version=None):
+    """Tampilkan df per halaman dengan sort di server.
+
+    Hanya baris di halaman aktif yang dikirim ke browser. positions
+    membatasi baris yang ditampilkan (hasil filter); jika source dan
+    version diberikan, urutan sort seluruh frame di-cache per versi.
+    """
+    total_rows = len(df) if positions is None else len(positions)
+    if total_rows == 0:
+        st.info("📝 Tidak ada data yang sesuai dengan filter.")
         return
-    
-    # Header aplikasi
-    st.title("📦 Inventory Management System - Komponen")
-    st.markdown("### Sistem Manajemen Inventory Komponen - Full CRUD + Local Storage")
-    
-    # Sidebar untuk logout dan info
-    with st.sidebar:
-        st.markdown("### Menu")
-        if st.button("🚪 Logout", width='stretch'):
-            logout()
-        
-        st.markdown("---")
-        st.markdown("**Status:** ✅ Ready")
-        st.markdown("**Storage:** 📁 Local CSV File")
-        st.markdown("**Mode:** 🔄 Full CRUD")
-        
-        # Data info
-        df = load_data()
-        st.markdown("---")
-        st.markdown("### 📊 Data Info")
-        st.write(f"**Total Items:** {len(df)}")
-        if os.path.exists(DATA_FILE):
-            file_size = os.path.getsize(DATA_FILE)
-            st.write(f"**File Size:** {file_size} bytes")
-            
-        # Export section
-        st.markdown("---")
-        st.markdown("### 📤 Export Data")
+
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        sort_column = st.selectbox("↕️ Urutkan:", ["(Urutan asli)"] + list(df.columns), key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("Arah:", ["Naik", "Turun"], horizontal=True, key=f"{key}_direction") == "Naik"
+    with col3:
+        page_size = st.selectbox("Baris/halaman:", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_page_size")
+
+    n_pages = max(1, -(-total_rows // page_size))
+    page_key = f"{key}_page"
+    # Jumlah halaman bisa menyusut setelah filter berubah
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    with col4:
+        page = st.number_input(f"Halaman (dari {n_pages}):", min_value=1, max_value=n_pages, step=1, key=page_key)
+
+    # Tentukan urutan baris tanpa menyentuh kolom lain
+    if sort_column == "(Urutan asli)":
+        order = np.arange(len(df)) if positions is None else positions
+    elif positions is None:
+        if source is not None and version is not None:
+            order = _sorted_positions(source, version, sort_column, ascending, df)
+        else:
+            order = inventory.argsort(df[sort_column], ascending)
+    else:
+        order = positions[inventory.argsort(df[sort_column].take(positions), ascending)]
+
+    start = (int(page) - 1) * page_size
+    page_df = df.take(order[start:start + page_size])
+    with metrics.timed("render.table", rows=len(page_df)):
+        st.dataframe(
+            page_df,
+            width='stretch',
+            hide_index=True,
+            column_config=inventory_column_config()
+        )
+    st.caption(f"Menampilkan baris {start + 1}–{start + len(page_df)} dari {total_rows}")
+
+def item_picker(label, key, df, version, show_stock=False):
+    """Typeahead: cari ID/awalan nama, pilih dari kandidat terbatas.
+
+    Mengembalikan baris terpilih (lookup per ID lewat index) atau None.
+    """
+    index = get_search_index()
+    query = st.text_input("🔎 Cari ID atau awalan nama:", key=f"{key}_query", placeholder="Contoh: 12 atau Motherboard")
+    if query:
+        ids = index.suggest(df, version, query, PICKER_LIMIT)
+        positions = index.locate(df, version, ids, sort=False)
+    else:
+        positions = np.arange(min(len(df), PICKER_LIMIT))
+
+    candidates = df.take(positions)
+    labels = {}
+    for item_id, nama, stok in zip(candidates['ID'].tolist(), candidates['Nama Komponen'].tolist(), candidates['Stok Akhir'].tolist()):
+        item_id = int(item_id)
+        labels.setdefault(item_id, f"{item_id} - {nama} (Stok: {int(stok)})" if show_stock else f"{item_id} - {nama}")
+
+    if query and not labels:
+        st.caption("Tidak ada komponen yang cocok.")
+    elif len(labels) >= PICKER_LIMIT:
+        st.caption(f"Menampilkan {PICKER_LIMIT} kandidat pertama, ketik lebih spesifik untuk mempersempit.")
+
+    item_id = st.selectbox(
+        label,
+        [None] + list(labels),
+        format_func=lambda option: "Pilih komponen..." if option is None else labels[option],
+        key=f"{key}_select"
+    )
+    if item_id is None:
+        return None
+    return index.row(df, version, item_id)
+
+def bulk_candidates(key, df, version):
+    """Filter cari + lokasi untuk operasi massal; posisi baris (maksimal BULK_LIMIT)"""
+    summary = get_aggregates().snapshot(df, version)
+    col1, col2 = st.columns(2)
+    with col1:
+        search_term = st.text_input("🔍 Cari komponen:", key=f"{key}_search", placeholder="Masukkan nama komponen...")
+    with col2:
+        lokasi_options = ['Semua'] + sorted(name for name in summary['lokasi'] if name is not None)
+        selected_lokasi = st.selectbox("📍 Filter lokasi:", lokasi_options, key=f"{key}_lokasi")
+
+    positions = np.arange(len(df))
+    if search_term:
+        positions = get_search_index().search(df, version, search_term)
+    if selected_lokasi != 'Semua':
+        lokasi_positions = np.flatnonzero((df['Lokasi Penyimpanan'] == selected_lokasi).to_numpy())
+        positions = np.intersect1d(positions, lokasi_positions)
+
+    if len(positions) > BULK_LIMIT:
+        st.caption(f"{len(positions)} item cocok, hanya {BULK_LIMIT} pertama yang ditampilkan. Persempit filter untuk item lainnya.")
+    return positions[:BULK_LIMIT]
+
+def bulk_changes(original, edited):
+    """{ID: {kolom: nilai baru}} untuk sel yang diubah di grid (satu pass per kolom)"""
+    changes = {}
+    item_ids = original['ID'].tolist()
+    for col in BULK_EDIT_COLUMNS:
+        before = original[col].astype(object)
+        after = edited[col].astype(object)
+        differs = ~((before == after) | (before.isna() & after.isna())).to_numpy(dtype=bool)
+        for position in np.flatnonzero(differs):
+            changes.setdefault(int(item_ids[position]), {})[col] = after.iat[position]
+    return changes
+
+def bulk_errors(changes):
+    """Pesan validasi untuk perubahan grid (nama wajib, jumlah tidak negatif)"""
+    errors = []
+    for item_id, values in changes.items():
+        if "Nama Komponen" in values and (pd.isna(values["Nama Komponen"]) or not str(values["Nama Komponen"]).strip()):
+            errors.append(f"ID {item_id}: Nama Komponen kosong")
+        for col in storage.NUMERIC_COLUMNS:
+            if col in values and (pd.isna(values[col]) or values[col] < 0):
+                errors.append(f"ID {item_id}: {col} harus angka ≥ 0")
+    return errors
+
+# ================================
+# SIDEBAR
+# ================================
+
+@fragment("sidebar_data")
+def render_sidebar_data():
+    """Info data (jumlah item, ukuran, memory) dan tombol export di sidebar"""
+    backend = get_backend()
+    # Data info (cukup kolom ID, tanpa menyalin seluruh data)
+    st.markdown("---")
+    st.markdown("### 📊 Data Info")
+    st.write(f"**Total Items:** {count_items()}")
+    if os.path.exists(backend.path):
+        file_size = os.path.getsize(backend.path)
+        st.write(f"**File Size:** {file_size} bytes")
+    # Snapshot bertipe ringkas dipakai bersama oleh semua session
+    snapshot_df, _ = load_snapshot()
+    memory = storage.memory_usage(snapshot_df)
+    st.write(f"**Memory Data:** {format_bytes(memory.sum())}")
+    with st.expander("🧮 Memory per kolom"):
+        st.dataframe(
+            pd.DataFrame({
+                "Kolom": memory.index,
+                "Tipe": [str(snapshot_df[col].dtype) for col in memory.index],
+                "Memory": [format_bytes(size) for size in memory],
+            }),
+            width='stretch',
+            hide_index=True
+        )
+        st.caption("Snapshot dibagi ke semua session dalam proses ini, bukan disalin per session")
         
-        col1, col2 = st.columns(2)
-        with col1:
+    # Export section
+    st.markdown("---")
+    st.markdown("### 📤 Export Data")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if LAZY_LOADING:
+            download_on_request("sidebar_csv", "📄 CSV", "📄 CSV...", export_to_csv, "csv", "text/csv")
+        else:
             csv_data = export_to_csv()
             if csv_data:
                 st.download_button(
@@ -340,411 +840,864 @@ def main():
                     mime="text/csv",
                     width='stretch'
                 )
+    
+    with col2:
+        # Excel hanya dibuat setelah diminta
+        excel_download_button("sidebar_excel", "📊 Excel", "📊 Excel...")
+
+def describe_change(record):
+    """Satu baris teks untuk satu record change feed"""
+    op = record['op']
+    if op == 'insert':
+        text = f"➕ #{record['id']} {record['row'].get('Nama Komponen', '')} ditambahkan"
+    elif op == 'update':
+        text = f"📦 Stok #{record['id']} berubah" if record.get('movement') else f"✏️ #{record['id']} diubah"
+    elif op == 'update_many':
+        text = f"✏️ {len(record['updates'])} item diubah"
+    elif op == 'delete':
+        text = f"🗑️ #{record['id']} dihapus"
+    elif op == 'delete_many':
+        text = f"🗑️ {len(record['ids'])} item dihapus"
+    else:
+        text = "🔁 Data diganti (import/restore)"
+    return f"{record['waktu'][11:]} {text}"
+
+@fragment("live_changes", run_every=LIVE_POLL_SECONDS or None)
+def render_live_changes():
+    """Perubahan dari session lain sejak halaman ini terakhir dihitung ulang.
+
+    Dicek berkala tanpa rerun penuh; snapshot proses cukup ditambal dari
+    change feed, jadi angka di sini dan tombol perbarui tidak membaca
+    ulang seluruh data.
+    """
+    changes = get_inventory().changes_since(st.session_state.get('live_seq', 0), LIVE_CHANGES_LIMIT)
+    if not changes:
+        st.caption("🟢 Tampilan sesuai data terbaru")
+        return
+    try:
+        summary = get_inventory().summary()
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return
+    st.warning(f"🔔 Ada perubahan baru • {summary['total_items']} item, stok {summary['total_stok']:,.0f}")
+    for record in reversed(changes):
+        st.caption(describe_change(record))
+    if st.button("🔄 Perbarui tampilan", key="live_refresh", width='stretch'):
+        st.rerun()
+
+# ================================
+# FUNGSI PERFORMA
+# ================================
+
+@st.cache_resource(show_spinner=False)
+def get_startup():
+    """Waktu render pertama proses ini (diisi oleh record_first_render())"""
+    return {"first_render": None}
+
+def record_first_render():
+    """Catat waktu render pertama (proses dan session) ke metrics"""
+    elapsed = time.perf_counter() - SCRIPT_START
+    startup = get_startup()
+    if startup["first_render"] is None:
+        startup["first_render"] = elapsed
+        get_metrics().record("startup.first_render", elapsed)
+    if not st.session_state.get("first_render_recorded"):
+        st.session_state.first_render_recorded = True
+        get_metrics().record("session.first_render", elapsed)
+
+def render_perf_panel(run):
+    """Rincian rerun ini dan persentil bergulir per operasi"""
+    with st.expander("⏱️ Performa"):
+        first_render = get_startup()["first_render"]
+        if first_render is not None:
+            st.write(f"**Render pertama proses:** {first_render * 1000:.0f} ms")
+        if run is not None:
+            st.write(f"**Rerun ini:** {run['seconds'] * 1000:.0f} ms")
+            st.dataframe(
+                pd.DataFrame({
+                    "Operasi": ["· " * call["depth"] + call["name"] for call in run["calls"]],
+                    "ms": [round(call["seconds"] * 1000, 1) for call in run["calls"]],
+                    "Baris": pd.array([call["rows"] for call in run["calls"]], dtype="Int64"),
+                    "Byte": [format_bytes(call["bytes"]) if call["bytes"] else "" for call in run["calls"]],
+                }),
+                width='stretch',
+                hide_index=True
+            )
+
+        stats = get_metrics().stats()
+        if stats:
+            st.markdown("**Persentil (ms, jendela bergulir)**")
+            st.dataframe(
+                pd.DataFrame({
+                    "Operasi": [stat["name"] for stat in stats],
+                    "n": [stat["count"] for stat in stats],
+                    "p50": [round(stat["p50"] * 1000, 1) for stat in stats],
+                    "p95": [round(stat["p95"] * 1000, 1) for stat in stats],
+                    "p99": [round(stat["p99"] * 1000, 1) for stat in stats],
+                    "max": [round(stat["max"] * 1000, 1) for stat in stats],
+                    "Baris": [stat["rows"] for stat in stats],
+                    "Byte": [format_bytes(stat["bytes"]) for stat in stats],
+                }),
+                width='stretch',
+                hide_index=True
+            )
+        if st.button("🔄 Reset statistik", key="perf_reset", width='stretch'):
+            get_metrics().reset()
+            st.rerun()
+
+# ================================
+# TAB
+# ================================
+
+@fragment("tab1")
+def render_tab_inventory():
+    """Tab 1: Lihat Inventory"""
+    st.header("📋 Daftar Inventory Komponen")
+    
+    # Load dan tampilkan data (snapshot bersama, tanpa salinan)
+    df, data_version = load_snapshot()
+    
+    if len(df) > 0:
+        # Filter dan search
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            search_term = st.text_input("🔍 Cari komponen:", placeholder="Masukkan nama komponen...")
+        
+        summary = get_aggregates().snapshot(df, data_version)
         
         with col2:
-            excel_data = export_to_excel()
-            if excel_data:
-                st.download_button(
-                    label="📊 Excel",
-                    data=excel_data,
-                    file_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    width='stretch'
-                )
+            lokasi_options = ['Semua'] + sorted(name for name in summary['lokasi'] if name is not None)
+            selected_lokasi = st.selectbox("📍 Filter lokasi:", lokasi_options)
+        
+        # Apply filters sebagai posisi baris, tanpa menyalin frame
+        positions = None
+        
+        if search_term:
+            # Lookup lewat index
+            positions = get_search_index().search(df, data_version, search_term)
+        
+        if selected_lokasi != 'Semua':
+            lokasi_positions = np.flatnonzero((df['Lokasi Penyimpanan'] == selected_lokasi).to_numpy())
+            positions = lokasi_positions if positions is None else np.intersect1d(positions, lokasi_positions)
+        
+        # Tampilkan statistik
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Item", summary['total_items'])
+        
+        with col2:
+            st.metric("Total Stok Akhir", f"{summary['total_stok']:,.0f}")
+        
+        with col3:
+            stok_rendah = summary['stok_rendah']
+            st.metric(f"Stok Rendah (≤{LOW_STOCK_THRESHOLD})", stok_rendah, delta=-stok_rendah if stok_rendah > 0 else None)
+        
+        with col4:
+            st.metric("Total Masuk", f"{summary['total_masuk']:,.0f}")
+        
+        # Ringkasan per lokasi dari agregat, tanpa scan data
+        with st.expander("📍 Ringkasan per lokasi"):
+            lokasi_summary = pd.DataFrame(
+                [
+                    {"Lokasi": name if name is not None else "-", "Jumlah Item": agg["count"], "Total Stok": agg["stok"]}
+                    for name, agg in summary['lokasi'].items()
+                ],
+                columns=["Lokasi", "Jumlah Item", "Total Stok"]
+            )
+            st.dataframe(lokasi_summary, width='stretch', hide_index=True)
+        
+        st.markdown("---")
+        
+        # Tampilkan tabel per halaman
+        render_paged_table(df, "inventory_table", positions=positions, source='data', version=data_version)
     
-    # Tab menu
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📋 Lihat Inventory", "➕ Tambah Barang", "✏️ Edit Barang", "🗑️ Hapus Barang", "📊 Import/Export", "💾 Backup Data"])
+    else:
+        st.info("📝 Belum ada data inventory. Silakan tambah komponen baru di tab 'Tambah Barang'.")
+
+@fragment("tab2")
+def render_tab_add():
+    """Tab 2: Tambah Barang"""
+    st.header("➕ Tambah Komponen Baru")
     
-    # Tab 1: Lihat Inventory
-    with tab1:
-        st.header("📋 Daftar Inventory Komponen")
+    with st.form("add_item_form"):
+        col1, col2 = st.columns(2)
         
-        # Load dan tampilkan data
-        df = load_data()
+        with col1:
+            nama = st.text_input("Nama Komponen *", placeholder="Contoh: Motherboard ASUS")
+            deskripsi = st.text_area("Deskripsi", placeholder="Deskripsi detail komponen")
+            jumlah_masuk = st.number_input("Jumlah Masuk *", min_value=0, step=1, value=0)
+            jumlah_keluar = st.number_input("Jumlah Keluar", min_value=0, step=1, value=0)
         
-        if len(df) > 0:
-            # Filter dan search
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                search_term = st.text_input("🔍 Cari komponen:", placeholder="Masukkan nama komponen...")
-            
-            with col2:
-                lokasi_options = ['Semua'] + list(df['Lokasi Penyimpanan'].unique()) if 'Lokasi Penyimpanan' in df.columns else ['Semua']
-                selected_lokasi = st.selectbox("📍 Filter lokasi:", lokasi_options)
-            
-            # Apply filters
-            filtered_df = df.copy()
-            
-            if search_term:
-                filtered_df = filtered_df[
-                    filtered_df['Nama Komponen'].str.contains(search_term, case=False, na=False)
-                ]
-            
-            if selected_lokasi != 'Semua':
-                filtered_df = filtered_df[filtered_df['Lokasi Penyimpanan'] == selected_lokasi]
-            
-            # Tampilkan statistik
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Item", len(df))
-            
-            with col2:
-                total_stok_akhir = df['Stok Akhir'].sum() if 'Stok Akhir' in df.columns else 0
-                st.metric("Total Stok Akhir", f"{total_stok_akhir:,.0f}")
-            
-            with col3:
-                stok_rendah = len(df[df['Stok Akhir'] <= 10]) if 'Stok Akhir' in df.columns else 0
-                st.metric("Stok Rendah (≤10)", stok_rendah, delta=-stok_rendah if stok_rendah > 0 else None)
-            
-            with col4:
-                total_masuk = df['Jumlah Masuk'].sum() if 'Jumlah Masuk' in df.columns else 0
-                st.metric("Total Masuk", f"{total_masuk:,.0f}")
+        with col2:
+            stok_akhir = st.number_input("Stok Akhir *", min_value=0, step=1, value=0)
+            lokasi = st.text_input("Lokasi Penyimpanan", placeholder="Contoh: Gudang A - Rak 1")
+            keterangan = st.text_area("Keterangan", placeholder="Catatan tambahan")
+        
+        submitted = st.form_submit_button("➕ Tambah Komponen", width='stretch')
+        
+        if submitted:
+            if nama and jumlah_masuk >= 0 and stok_akhir >= 0:
+                item_data = {
+                    'nama': nama,
+                    'deskripsi': deskripsi,
+                    'jumlah_masuk': jumlah_masuk,
+                    'jumlah_keluar': jumlah_keluar,
+                    'stok_akhir': stok_akhir,
+                    'lokasi': lokasi,
+                    'keterangan': keterangan
+                }
+                
+                with st.spinner('Menambahkan komponen...'):
+                    success, new_id = add_item(item_data)
+                    if success:
+                        st.success(f"✅ Komponen '{nama}' berhasil ditambahkan dengan ID {new_id}!")
+                        st.balloons()
+                        st.rerun()
+                    else:
+                        st.error("❌ Gagal menambahkan komponen.")
+            else:
+                st.error("❌ Mohon isi semua field yang wajib (*)")
+
+@fragment("tab3")
+def render_tab_edit():
+    """Tab 3: Edit Barang"""
+    st.header("✏️ Edit Barang")
+    
+    df, data_version = load_snapshot()
+    
+    if len(df) > 0:
+        # Select item to edit
+        selected_row = item_picker("Pilih komponen yang akan diedit:", "edit_picker", df, data_version)
+        
+        if selected_row is not None:
+            item_id = int(selected_row['ID'])
             
-            st.markdown("---")
+            st.markdown(f"**Edit komponen:** {selected_row['Nama Komponen']}")
             
-            # Tampilkan tabel
-            if len(filtered_df) > 0:
-                st.dataframe(
-                    filtered_df,
+            with st.form("edit_item_form"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    nama = st.text_input("Nama Komponen *", value=selected_row['Nama Komponen'])
+                    deskripsi = st.text_area("Deskripsi", value=selected_row['Deskripsi'] if pd.notna(selected_row['Deskripsi']) else "")
+                    jumlah_masuk = st.number_input("Jumlah Masuk *", min_value=0, step=1, value=int(selected_row['Jumlah Masuk']))
+                    jumlah_keluar = st.number_input("Jumlah Keluar", min_value=0, step=1, value=int(selected_row['Jumlah Keluar']))
+                
+                with col2:
+                    stok_akhir = st.number_input("Stok Akhir *", min_value=0, step=1, value=int(selected_row['Stok Akhir']))
+                    lokasi = st.text_input("Lokasi Penyimpanan", value=selected_row['Lokasi Penyimpanan'] if pd.notna(selected_row['Lokasi Penyimpanan']) else "")
+                    keterangan = st.text_area("Keterangan", value=selected_row['Keterangan'] if pd.notna(selected_row['Keterangan']) else "")
+                
+                submitted = st.form_submit_button("💾 Simpan Perubahan", width='stretch')
+                
+                if submitted:
+                    if nama and jumlah_masuk >= 0 and stok_akhir >= 0:
+                        item_data = {
+                            'nama': nama,
+                            'deskripsi': deskripsi,
+                            'jumlah_masuk': jumlah_masuk,
+                            'jumlah_keluar': jumlah_keluar,
+                            'stok_akhir': stok_akhir,
+                            'lokasi': lokasi,
+                            'keterangan': keterangan
+                        }
+                        
+                        with st.spinner('Menyimpan perubahan...'):
+                            if update_item(item_id, item_data):
+                                st.success(f"✅ Komponen '{nama}' berhasil diperbarui!")
+                                st.rerun()
+                            else:
+                                st.error("❌ Gagal memperbarui komponen.")
+                    else:
+                        st.error("❌ Mohon isi semua field yang wajib (*)")
+        
+        # Edit massal: semua perubahan grid disimpan dalam satu commit
+        st.markdown("---")
+        bulk_result = st.session_state.pop('bulk_edit_result', None)
+        if bulk_result is not None:
+            st.success(f"✅ {bulk_result} komponen berhasil diperbarui!")
+        
+        if st.toggle("📝 Edit massal (grid)", key="bulk_edit_open"):
+            positions = bulk_candidates("bulk_edit", df, data_version)
+            if len(positions) == 0:
+                st.info("📝 Tidak ada data yang sesuai dengan filter.")
+            else:
+                original = df.take(positions).reset_index(drop=True)
+                edited = st.data_editor(
+                    # Lokasi sebagai teks supaya lokasi baru bisa diketik
+                    original.astype({"Lokasi Penyimpanan": object}),
+                    key=f"bulk_editor_{st.session_state.get('bulk_round', 0)}",
                     width='stretch',
                     hide_index=True,
-                    column_config={
-                        "ID": st.column_config.NumberColumn("ID", width="small"),
-                        "Jumlah Masuk": st.column_config.NumberColumn("Jumlah Masuk"),
-                        "Jumlah Keluar": st.column_config.NumberColumn("Jumlah Keluar"),
-                        "Stok Akhir": st.column_config.NumberColumn("Stok Akhir"),
-                    }
+                    num_rows="fixed",
+                    disabled=["ID", "Tanggal"],
+                    column_config=inventory_column_config()
                 )
-            else:
-                st.info("📝 Tidak ada data yang sesuai dengan filter.")
-        
-        else:
-            st.info("📝 Belum ada data inventory. Silakan tambah komponen baru di tab 'Tambah Barang'.")
+                changes = bulk_changes(original, edited)
+                errors = bulk_errors(changes)
+                for error in errors[:10]:
+                    st.error(f"❌ {error}")
+                st.caption(f"{len(changes)} komponen berubah")
+                
+                if st.button("💾 Simpan Semua Perubahan", disabled=not changes or bool(errors), width='stretch', key="bulk_edit_save"):
+                    with st.spinner('Menyimpan perubahan...'):
+                        updated = update_items(changes)
+                        if updated is not None:
+                            st.session_state.bulk_edit_result = updated
+                            st.session_state.bulk_round = st.session_state.get('bulk_round', 0) + 1
+                            st.rerun()
+                        else:
+                            st.error("❌ Gagal memperbarui komponen.")
+    else:
+        st.info("📝 Belum ada data komponen untuk diedit.")
+
+@fragment("tab4")
+def render_tab_delete():
+    """Tab 4: Hapus Barang"""
+    st.header("🗑️ Hapus Barang")
+    
+    df, data_version = load_snapshot()
     
-    # Tab 2: Tambah Barang
-    with tab2:
-        st.header("➕ Tambah Komponen Baru")
+    if len(df) > 0:
+        # Select item to delete
+        selected_row = item_picker("Pilih komponen yang akan dihapus:", "delete_picker", df, data_version, show_stock=True)
         
-        with st.form("add_item_form"):
-            col1, col2 = st.columns(2)
+        if selected_row is not None:
+            item_id = int(selected_row['ID'])
             
+            st.markdown("### ⚠️ Konfirmasi Penghapusan")
+            st.warning(f"Anda akan menghapus: **{selected_row['Nama Komponen']}**")
+            
+            # Show item details
+            col1, col2 = st.columns(2)
             with col1:
-                nama = st.text_input("Nama Komponen *", placeholder="Contoh: Motherboard ASUS")
-                deskripsi = st.text_area("Deskripsi", placeholder="Deskripsi detail komponen")
-                jumlah_masuk = st.number_input("Jumlah Masuk *", min_value=0, step=1, value=0)
-                jumlah_keluar = st.number_input("Jumlah Keluar", min_value=0, step=1, value=0)
+                st.write(f"**ID:** {int(selected_row['ID'])}")
+                st.write(f"**Deskripsi:** {selected_row['Deskripsi'] if pd.notna(selected_row['Deskripsi']) else '-'}")
+                st.write(f"**Stok Akhir:** {int(selected_row['Stok Akhir'])}")
             
             with col2:
-                stok_akhir = st.number_input("Stok Akhir *", min_value=0, step=1, value=0)
-                lokasi = st.text_input("Lokasi Penyimpanan", placeholder="Contoh: Gudang A - Rak 1")
-                keterangan = st.text_area("Keterangan", placeholder="Catatan tambahan")
+                st.write(f"**Jumlah Masuk:** {int(selected_row['Jumlah Masuk'])}")
+                st.write(f"**Jumlah Keluar:** {int(selected_row['Jumlah Keluar'])}")
+                st.write(f"**Lokasi:** {selected_row['Lokasi Penyimpanan'] if pd.notna(selected_row['Lokasi Penyimpanan']) else '-'}")
+            
+            st.markdown("---")
             
-            submitted = st.form_submit_button("➕ Tambah Komponen", width='stretch')
+            # Confirmation
+            confirm = st.checkbox("✅ Saya yakin ingin menghapus komponen ini")
             
-            if submitted:
-                if nama and jumlah_masuk >= 0 and stok_akhir >= 0:
-                    item_data = {
-                        'nama': nama,
-                        'deskripsi': deskripsi,
-                        'jumlah_masuk': jumlah_masuk,
-                        'jumlah_keluar': jumlah_keluar,
-                        'stok_akhir': stok_akhir,
-                        'lokasi': lokasi,
-                        'keterangan': keterangan
-                    }
-                    
-                    with st.spinner('Menambahkan komponen...'):
-                        success, new_id = add_item(item_data)
-                        if success:
-                            st.success(f"✅ Komponen '{nama}' berhasil ditambahkan dengan ID {new_id}!")
-                            st.balloons()
+            if confirm:
+                if st.button("🗑️ Hapus Komponen", type="secondary", width='stretch'):
+                    with st.spinner('Menghapus komponen...'):
+                        if delete_item(item_id):
+                            st.success(f"✅ Komponen '{selected_row['Nama Komponen']}' berhasil dihapus!")
                             st.rerun()
                         else:
-                            st.error("❌ Gagal menambahkan komponen.")
-                else:
-                    st.error("❌ Mohon isi semua field yang wajib (*)")
-    
-    # Tab 3: Edit Barang
-    with tab3:
-        st.header("✏️ Edit Barang")
+                            st.error("❌ Gagal menghapus komponen.")
         
-        df = load_data()
+        # Hapus massal: semua item terpilih dihapus dalam satu commit
+        st.markdown("---")
+        bulk_result = st.session_state.pop('bulk_delete_result', None)
+        if bulk_result is not None:
+            st.success(f"✅ {bulk_result} komponen berhasil dihapus!")
         
-        if len(df) > 0:
-            # Select item to edit
-            item_options = []
-            for _, row in df.iterrows():
-                item_options.append(f"{int(row['ID'])} - {row['Nama Komponen']}")
+        if st.toggle("🗑️ Hapus massal", key="bulk_delete_open"):
+            positions = bulk_candidates("bulk_delete", df, data_version)
+            candidates = df.take(positions)
+            labels = {}
+            for item_id, nama, stok in zip(candidates['ID'].tolist(), candidates['Nama Komponen'].tolist(), candidates['Stok Akhir'].tolist()):
+                labels.setdefault(int(item_id), f"{int(item_id)} - {nama} (Stok: {int(stok)})")
             
-            selected_item = st.selectbox("Pilih komponen yang akan diedit:", ["Pilih komponen..."] + item_options)
+            bulk_round = st.session_state.get('bulk_round', 0)
+            if st.checkbox(f"Pilih semua {len(labels)} hasil filter", key=f"bulk_delete_all_{bulk_round}"):
+                selected_ids = list(labels)
+            else:
+                selected_ids = st.multiselect(
+                    "Pilih komponen yang akan dihapus:",
+                    list(labels),
+                    format_func=labels.get,
+                    key=f"bulk_delete_select_{bulk_round}"
+                )
             
-            if selected_item != "Pilih komponen...":
-                item_id = int(selected_item.split(" - ")[0])
-                selected_row = df[df['ID'] == item_id].iloc[0]
-                
-                st.markdown(f"**Edit komponen:** {selected_row['Nama Komponen']}")
-                
-                with st.form("edit_item_form"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        nama = st.text_input("Nama Komponen *", value=selected_row['Nama Komponen'])
-                        deskripsi = st.text_area("Deskripsi", value=selected_row['Deskripsi'] if pd.notna(selected_row['Deskripsi']) else "")
-                        jumlah_masuk = st.number_input("Jumlah Masuk *", min_value=0, step=1, value=int(selected_row['Jumlah Masuk']))
-                        jumlah_keluar = st.number_input("Jumlah Keluar", min_value=0, step=1, value=int(selected_row['Jumlah Keluar']))
-                    
-                    with col2:
-                        stok_akhir = st.number_input("Stok Akhir *", min_value=0, step=1, value=int(selected_row['Stok Akhir']))
-                        lokasi = st.text_input("Lokasi Penyimpanan", value=selected_row['Lokasi Penyimpanan'] if pd.notna(selected_row['Lokasi Penyimpanan']) else "")
-                        keterangan = st.text_area("Keterangan", value=selected_row['Keterangan'] if pd.notna(selected_row['Keterangan']) else "")
-                    
-                    submitted = st.form_submit_button("💾 Simpan Perubahan", width='stretch')
-                    
-                    if submitted:
-                        if nama and jumlah_masuk >= 0 and stok_akhir >= 0:
-                            item_data = {
-                                'nama': nama,
-                                'deskripsi': deskripsi,
-                                'jumlah_masuk': jumlah_masuk,
-                                'jumlah_keluar': jumlah_keluar,
-                                'stok_akhir': stok_akhir,
-                                'lokasi': lokasi,
-                                'keterangan': keterangan
-                            }
-                            
-                            with st.spinner('Menyimpan perubahan...'):
-                                if update_item(item_id, item_data):
-                                    st.success(f"✅ Komponen '{nama}' berhasil diperbarui!")
-                                    st.rerun()
-                                else:
-                                    st.error("❌ Gagal memperbarui komponen.")
-                        else:
-                            st.error("❌ Mohon isi semua field yang wajib (*)")
-        else:
-            st.info("📝 Belum ada data komponen untuk diedit.")
+            if selected_ids:
+                st.warning(f"Anda akan menghapus **{len(selected_ids)}** komponen.")
+                if st.checkbox("✅ Saya yakin ingin menghapus semua komponen terpilih", key=f"bulk_delete_confirm_{bulk_round}"):
+                    if st.button(f"🗑️ Hapus {len(selected_ids)} Komponen", type="secondary", width='stretch', key="bulk_delete_button"):
+                        with st.spinner('Menghapus komponen...'):
+                            deleted = delete_items(selected_ids)
+                            if deleted is not None:
+                                st.session_state.bulk_delete_result = deleted
+                                st.session_state.bulk_round = bulk_round + 1
+                                st.rerun()
+                            else:
+                                st.error("❌ Gagal menghapus komponen.")
+    else:
+        st.info("📝 Belum ada data komponen untuk dihapus.")
+
+@fragment("tab5")
+def render_tab_import_export():
+    """Tab 5: Import/Export"""
+    st.header("📊 Import/Export Data")
     
-    # Tab 4: Hapus Barang
-    with tab4:
-        st.header("🗑️ Hapus Barang")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📤 Export Data")
+        st.markdown("Download data inventory dalam berbagai format:")
         
-        df = load_data()
+        # CSV Export
+        csv_data = export_to_csv()
+        if csv_data:
+            st.download_button(
+                label="📄 Download CSV",
+                data=csv_data,
+                file_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                width='stretch'
+            )
         
-        if len(df) > 0:
-            # Select item to delete
-            item_options = []
-            for _, row in df.iterrows():
-                item_options.append(f"{int(row['ID'])} - {row['Nama Komponen']} (Stok: {int(row['Stok Akhir'])})")
-            
-            selected_item = st.selectbox("Pilih komponen yang akan dihapus:", ["Pilih komponen..."] + item_options)
+        # Excel Export (dibuat job latar belakang saat diminta, dipakai ulang per versi data)
+        excel_download_button("tab5_excel", "📊 Download Excel", "📊 Siapkan Excel")
+        render_job_history()
+        
+        # Google Sheets link
+        st.markdown("---")
+        st.markdown("**📋 Google Sheets Integration:**")
+        st.info("""
+        1. Download CSV dari tombol di atas
+        2. Buka Google Sheets
+        3. File → Import → Upload CSV
+        4. Pilih "Replace spreadsheet"
+        5. Share spreadsheet dengan tim
+        """)
+        
+        if GOOGLE_SHEET_URL != "https://docs.google.com/spreadsheets/d/YOUR_SHEET_ID/edit":
+            st.markdown(f"[🔗 Buka Google Sheets]({GOOGLE_SHEET_URL})")
+    
+    with col2:
+        st.subheader("📥 Import Data")
+        st.markdown("Upload file CSV untuk mengganti atau menambah data inventory:")
+        
+        # Import berjalan sebagai job; hasilnya ditampilkan sekali setelah selesai
+        import_job = render_job(st.session_state['import_job'], "import") if 'import_job' in st.session_state else None
+        import_running = import_job is not None and import_job["status"] in jobs.ACTIVE
+        if import_job is not None and not import_running:
+            del st.session_state['import_job']
+        import_result = get_jobs().result(import_job) if import_job is not None and import_job["status"] == "done" else None
+        if import_result is not None and import_result.get('aborted'):
+            st.error(
+                f"❌ Import dibatalkan, data tidak diubah: {import_result['error_count']} baris error "
+                f"dari {import_result['rows']} baris."
+            )
+            if import_result['error_count'] > 0:
+                st.dataframe(
+                    pd.DataFrame(import_result['errors'], columns=["Baris", "Error"]),
+                    width='stretch',
+                    hide_index=True
+                )
+        elif import_result is not None:
+            st.success(
+                f"✅ Data berhasil diimport! {import_result['inserted']} baris ditambahkan, "
+                f"{import_result['updated']} baris diperbarui."
+            )
+            if import_result['error_count'] > 0:
+                st.warning(f"⚠️ {import_result['error_count']} baris dilewati karena error:")
+                st.dataframe(
+                    pd.DataFrame(import_result['errors'], columns=["Baris", "Error"]),
+                    width='stretch',
+                    hide_index=True
+                )
+        
+        uploaded_file = st.file_uploader("Pilih file CSV", type=['csv'])
+        
+        if uploaded_file is not None:
+            st.markdown("**Preview data yang akan diimport:**")
             
-            if selected_item != "Pilih komponen...":
-                item_id = int(selected_item.split(" - ")[0])
-                selected_row = df[df['ID'] == item_id].iloc[0]
+            # Preview hanya dari baris pertama, tanpa membaca seluruh file
+            try:
+                preview_df = importer.preview_csv(uploaded_file)
+                st.dataframe(preview_df, width='stretch')
                 
-                st.markdown("### ⚠️ Konfirmasi Penghapusan")
-                st.warning(f"Anda akan menghapus: **{selected_row['Nama Komponen']}**")
+                st.markdown(f"**Total rows (perkiraan):** {importer.estimate_rows(uploaded_file)}")
+                st.markdown(f"**Columns:** {', '.join(preview_df.columns)}")
+                
+                import_mode = st.radio(
+                    "Mode import:",
+                    importer.IMPORT_MODES,
+                    format_func={
+                        'replace': "Ganti semua data",
+                        'append': "Tambah sebagai item baru",
+                        'upsert': "Update per ID, tambah yang belum ada",
+                    }.get,
+                    horizontal=True
+                )
+                # Mode replace dibatalkan jika ada baris error, kecuali diizinkan di sini
+                accept_partial = import_mode == 'replace' and st.checkbox(
+                    "Lewati baris yang error (data lama tetap diganti dengan baris yang valid)"
+                )
                 
-                # Show item details
                 col1, col2 = st.columns(2)
+                
                 with col1:
-                    st.write(f"**ID:** {int(selected_row['ID'])}")
-                    st.write(f"**Deskripsi:** {selected_row['Deskripsi'] if pd.notna(selected_row['Deskripsi']) else '-'}")
-                    st.write(f"**Stok Akhir:** {int(selected_row['Stok Akhir'])}")
+                    if st.button("✅ Import Data", width='stretch', disabled=import_running):
+                        try:
+                            st.session_state.import_job = start_import_job(uploaded_file, import_mode, accept_partial)["id"]
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error importing data: {str(e)}")
                 
                 with col2:
-                    st.write(f"**Jumlah Masuk:** {int(selected_row['Jumlah Masuk'])}")
-                    st.write(f"**Jumlah Keluar:** {int(selected_row['Jumlah Keluar'])}")
-                    st.write(f"**Lokasi:** {selected_row['Lokasi Penyimpanan'] if pd.notna(selected_row['Lokasi Penyimpanan']) else '-'}")
-                
-                st.markdown("---")
-                
-                # Confirmation
-                confirm = st.checkbox("✅ Saya yakin ingin menghapus komponen ini")
-                
-                if confirm:
-                    if st.button("🗑️ Hapus Komponen", type="secondary", width='stretch'):
-                        with st.spinner('Menghapus komponen...'):
-                            if delete_item(item_id):
-                                st.success(f"✅ Komponen '{selected_row['Nama Komponen']}' berhasil dihapus!")
-                                st.rerun()
-                            else:
-                                st.error("❌ Gagal menghapus komponen.")
-        else:
-            st.info("📝 Belum ada data komponen untuk dihapus.")
+                    if st.button("❌ Batal", width='stretch'):
+                        st.rerun()
+                        
+            except Exception as e:
+                st.error(f"Error reading file: {str(e)}")
+        
+        st.markdown("---")
+        st.markdown("**📋 Format CSV yang diperlukan:**")
+        st.code("""
+ID,Tanggal,Nama Komponen,Deskripsi,Jumlah Masuk,Jumlah Keluar,Stok Akhir,Lokasi Penyimpanan,Keterangan
+1,2024-10-06 18:00:00,Motherboard ASUS,ASUS B450M Pro4,10,2,8,Labor 1.3 Thehok,Komponen utama PC
+        """)
+
+@fragment("tab6")
+def render_tab_backup():
+    """Tab 6: Backup Data"""
+    st.header("💾 Backup Data Management")
+    
+    backups = get_backups()
+    generations = {manifest['gen']: manifest for manifest in backups.generations()}
     
-    # Tab 5: Import/Export
-    with tab5:
-        st.header("📊 Import/Export Data")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📊 Lihat Data Backup")
         
-        col1, col2 = st.columns(2)
+        if generations:
+            selected_gen = st.selectbox(
+                "Pilih generasi backup:",
+                list(generations),
+                format_func=lambda gen: f"#{gen} - {generations[gen]['created']} - {generations[gen]['rows']} item - {generations[gen]['reason'] or '-'}",
+                key="backup_generation"
+            )
+            backup_df, backup_version = load_backup_snapshot(selected_gen)
+        else:
+            selected_gen = None
+            backup_df, backup_version = pd.DataFrame(), None
         
-        with col1:
-            st.subheader("📤 Export Data")
-            st.markdown("Download data inventory dalam berbagai format:")
+        if len(backup_df) > 0:
+            render_paged_table(backup_df, "backup_table", source='backup', version=backup_version)
             
-            # CSV Export
-            csv_data = export_to_csv()
-            if csv_data:
-                st.download_button(
-                    label="📄 Download CSV",
-                    data=csv_data,
-                    file_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
-                    width='stretch'
-                )
-            
-            # Excel Export  
-            excel_data = export_to_excel()
-            if excel_data:
-                st.download_button(
-                    label="📊 Download Excel",
-                    data=excel_data,
-                    file_name=f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    width='stretch'
-                )
-            
-            # Google Sheets link
-            st.markdown("---")
-            st.markdown("**📋 Google Sheets Integration:**")
-            st.info("""
-            1. Download CSV dari tombol di atas
-            2. Buka Google Sheets
-            3. File → Import → Upload CSV
-            4. Pilih "Replace spreadsheet"
-            5. Share spreadsheet dengan tim
-            """)
-            
-            if GOOGLE_SHEET_URL != "https://docs.google.com/spreadsheets/d/YOUR_SHEET_ID/edit":
-                st.markdown(f"[🔗 Buka Google Sheets]({GOOGLE_SHEET_URL})")
+            # Backup statistics
+            backup_summary = _backup_summary(backup_version, backup_df)
+            col1_stat, col2_stat, col3_stat = st.columns(3)
+            with col1_stat:
+                st.metric("Total Item Backup", backup_summary['total_items'])
+            with col2_stat:
+                st.metric("Total Stok Backup", f"{backup_summary['total_stok']:,.0f}")
+            with col3_stat:
+                st.metric("Total Masuk Backup", f"{backup_summary['total_masuk']:,.0f}")
+        else:
+            st.info("📝 Tidak ada data backup yang tersedia.")
+    
+    with col2:
+        st.subheader("🔄 Restore dari Backup")
+        st.markdown("Pulihkan data ke generasi backup yang dipilih:")
+
+        # Restore berjalan sebagai job; hasilnya ditampilkan sekali setelah selesai
+        restore_job = render_job(st.session_state['restore_job'], "restore") if 'restore_job' in st.session_state else None
+        restore_running = restore_job is not None and restore_job["status"] in jobs.ACTIVE
+        if restore_job is not None and not restore_running:
+            del st.session_state['restore_job']
+            restored = get_jobs().result(restore_job) if restore_job["status"] == "done" else None
+            if restored is not None and "ids" in restored:
+                st.success(f"✅ {restored['ids']} ID berhasil dipulihkan dari generasi #{restored['gen']} ({restored['rows']} baris ditulis)!")
+            elif restored is not None:
+                st.success(f"✅ Data berhasil dipulihkan ke generasi #{restored['gen']} ({restored['chunks']} chunk, {restored['rows']} baris ditulis)!")
         
-        with col2:
-            st.subheader("📥 Import Data")
-            st.markdown("Upload file CSV untuk mengganti data inventory:")
+        if selected_gen is not None:
+            st.markdown("**⚠️ Peringatan:** Restore akan mengganti semua data saat ini! Data saat ini disimpan dulu sebagai generasi baru.")
             
-            uploaded_file = st.file_uploader("Pilih file CSV", type=['csv'])
+            col1_restore, col2_restore = st.columns(2)
             
-            if uploaded_file is not None:
-                st.markdown("**Preview data yang akan diimport:**")
-                
-                # Preview uploaded data
-                try:
-                    preview_df = pd.read_csv(uploaded_file)
-                    st.dataframe(preview_df.head(), width='stretch')
-                    
-                    st.markdown(f"**Total rows:** {len(preview_df)}")
-                    st.markdown(f"**Columns:** {', '.join(preview_df.columns)}")
-                    
-                    # Reset file pointer
-                    uploaded_file.seek(0)
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        if st.button("✅ Import Data", width='stretch'):
-                            with st.spinner('Importing data...'):
-                                if import_from_csv(uploaded_file):
-                                    st.success("✅ Data berhasil diimport!")
-                                    st.rerun()
-                                else:
-                                    st.error("❌ Gagal import data.")
-                    
-                    with col2:
-                        if st.button("❌ Batal", width='stretch'):
-                            st.rerun()
-                            
-                except Exception as e:
-                    st.error(f"Error reading file: {str(e)}")
+            with col1_restore:
+                if st.button(f"🔄 Restore ke #{selected_gen}", type="secondary", width='stretch', disabled=restore_running):
+                    try:
+                        st.session_state.restore_job = start_restore_job(selected_gen)["id"]
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error restoring backup: {str(e)}")
             
-            st.markdown("---")
-            st.markdown("**📋 Format CSV yang diperlukan:**")
-            st.code("""
-ID,Tanggal,Nama Komponen,Deskripsi,Jumlah Masuk,Jumlah Keluar,Stok Akhir,Lokasi Penyimpanan,Keterangan
-1,2024-10-06 18:00:00,Motherboard ASUS,ASUS B450M Pro4,10,2,8,Labor 1.3 Thehok,Komponen utama PC
-            """)
-    
-    # Tab 6: Backup Data
-    with tab6:
-        st.header("💾 Backup Data Management")
+            with col2_restore:
+                if st.button("📋 Lihat Detail Backup", width='stretch'):
+                    manifest = generations[selected_gen]
+                    st.markdown("**Detail Backup:**")
+                    st.write(f"- **Generasi:** #{selected_gen}")
+                    st.write(f"- **Dibuat:** {manifest['created']}")
+                    st.write(f"- **Alasan:** {manifest['reason'] or '-'}")
+                    st.write(f"- **Total Records:** {manifest['rows']}")
+                    st.write(f"- **Chunk:** {len(manifest['chunks'])}")
+        else:
+            st.info("📝 Tidak ada data backup untuk dipulihkan.")
         
-        col1, col2 = st.columns(2)
+        if st.button("💾 Buat Backup Sekarang", width='stretch'):
+            manifest = create_backup()
+            if manifest is not None:
+                st.success(f"✅ Backup tersimpan sebagai generasi #{manifest['gen']}")
+                st.rerun()
         
-        with col1:
-            st.subheader("📊 Lihat Data Backup")
-            st.markdown("Data backup dari file `inventory_backup.csv`:")
-            
-            backup_df = load_backup_data()
-            if len(backup_df) > 0:
-                st.dataframe(
-                    backup_df,
-                    width='stretch',
-                    hide_index=True,
-                    column_config={
-                        "ID": st.column_config.NumberColumn("ID", width="small"),
-                        "Jumlah Masuk": st.column_config.NumberColumn("Jumlah Masuk"),
-                        "Jumlah Keluar": st.column_config.NumberColumn("Jumlah Keluar"),
-                        "Stok Akhir": st.column_config.NumberColumn("Stok Akhir"),
-                    }
-                )
-                
-                # Backup statistics
-                col1_stat, col2_stat, col3_stat = st.columns(3)
-                with col1_stat:
-                    st.metric("Total Item Backup", len(backup_df))
-                with col2_stat:
-                    total_stok_backup = backup_df['Stok Akhir'].sum() if 'Stok Akhir' in backup_df.columns else 0
-                    st.metric("Total Stok Backup", f"{total_stok_backup:,.0f}")
-                with col3_stat:
-                    total_masuk_backup = backup_df['Jumlah Masuk'].sum() if 'Jumlah Masuk' in backup_df.columns else 0
-                    st.metric("Total Masuk Backup", f"{total_masuk_backup:,.0f}")
-            else:
-                st.info("📝 Tidak ada data backup yang tersedia.")
+        st.markdown("---")
+        st.markdown("**📁 Backup Info:**")
+        chunk_files = [entry for entry in os.scandir(backups.chunk_directory) if entry.is_file()]
+        st.write(f"- **Folder:** `{BACKUP_DIR}`")
+        st.write(f"- **Generasi:** {len(generations)} (maksimal {BACKUP_RETENTION})")
+        st.write(f"- **Backup otomatis:** setiap {BACKUP_EVERY_WRITES} perubahan atau {BACKUP_INTERVAL_SECONDS // 60} menit")
+        st.write(f"- **Size:** {sum(entry.stat().st_size for entry in chunk_files)} bytes dalam {len(chunk_files)} chunk")
+
+    if selected_gen is not None:
+        st.markdown("---")
+        render_backup_diff(selected_gen, generations, restore_running)
+
+def render_backup_diff(gen, generations, restore_running):
+    """Perbedaan generasi gen dengan data saat ini atau generasi lain, plus restore sebagian"""
+    st.subheader("🔍 Bandingkan Backup")
+    others = [None] + [other for other in generations if other != gen]
+    other = st.selectbox(
+        f"Bandingkan #{gen} dengan:",
+        others,
+        format_func=lambda other: "Data saat ini" if other is None else f"#{other} - {generations[other]['created']}",
+        key="diff_other"
+    )
+    result = load_backup_diff(gen, other)
+    if result is None:
+        return
+
+    target = "data saat ini" if other is None else f"#{other}"
+    kinds = {
+        "changed": f"✏️ Berubah ({len(result['changed'])})",
+        "removed": f"➖ Hanya di #{gen} ({len(result['removed'])})",
+        "added": f"➕ Hanya di {target} ({len(result['added'])})",
+    }
+    kind = st.radio("Tampilkan:", list(kinds), format_func=kinds.get, horizontal=True, key="diff_kind")
+    rows = result[kind]
+    if len(rows) == 0:
+        st.info(f"📝 Tidak ada perbedaan jenis ini antara #{gen} dan {target}.")
+        return
+
+    render_paged_table(rows, f"diff_{kind}")
+    if kind == "changed":
+        with st.expander(f"🔎 Perubahan per kolom ({len(result['changes'])} sel)"):
+            render_paged_table(result['changes'], "diff_changes")
+
+    # Restore sebagian hanya ke data saat ini
+    if other is not None:
+        return
+    st.markdown("**↩️ Restore sebagian**")
+    if st.checkbox(f"Pilih semua {len(rows)} baris", key=f"diff_all_{kind}"):
+        ids = rows['ID'].tolist()
+    else:
+        if len(rows) > BULK_LIMIT:
+            st.caption(f"Hanya {BULK_LIMIT} ID pertama yang bisa dipilih satu per satu; gunakan 'Pilih semua' untuk sisanya.")
+        candidates = rows.head(BULK_LIMIT)
+        names = dict(zip(candidates['ID'].tolist(), candidates['Nama Komponen'].tolist()))
+        ids = st.multiselect(
+            "Pilih ID:",
+            list(names),
+            format_func=lambda item_id: f"#{item_id} - {names[item_id]}",
+            key=f"diff_ids_{kind}"
+        )
+    action = {
+        "changed": "dikembalikan ke isi backup",
+        "removed": "ditambahkan lagi dari backup",
+        "added": "dihapus (tidak ada di backup)",
+    }[kind]
+    st.caption(f"{len(ids)} baris akan {action}. Data saat ini disimpan dulu sebagai generasi baru.")
+    if st.button(f"↩️ Restore {len(ids)} baris dari #{gen}", disabled=restore_running or not ids, key="diff_restore"):
+        try:
+            st.session_state.restore_job = start_restore_rows_job(gen, ids)["id"]
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error restoring backup: {str(e)}")
+
+@fragment("tab7")
+def render_tab_movements():
+    """Tab 7: Pergerakan Stok"""
+    st.header("🔁 Pergerakan Stok")
+    
+    df, data_version = load_snapshot()
+    
+    if len(df) > 0:
+        selected_row = item_picker("Pilih komponen:", "movement_picker", df, data_version, show_stock=True)
         
-        with col2:
-            st.subheader("🔄 Restore dari Backup")
-            st.markdown("Pulihkan data dari backup file:")
+        if selected_row is not None:
+            item_id = int(selected_row['ID'])
+            st.markdown(f"**{selected_row['Nama Komponen']}** - Stok Akhir saat ini: **{int(selected_row['Stok Akhir'])}**")
             
-            if len(backup_df) > 0:
-                st.markdown("**Preview data backup:**")
-                st.dataframe(backup_df.head(3), width='stretch')
+            with st.form("movement_form"):
+                col1, col2 = st.columns(2)
                 
-                st.markdown("---")
-                st.markdown("**⚠️ Peringatan:** Restore akan mengganti semua data saat ini!")
+                with col1:
+                    jenis = st.radio("Jenis:", ["Masuk", "Keluar", "Koreksi"], horizontal=True)
+                    jumlah = st.number_input("Jumlah * (Koreksi boleh negatif)", step=1, value=0)
+                
+                with col2:
+                    lokasi = st.text_input("Lokasi", value=selected_row['Lokasi Penyimpanan'] if pd.notna(selected_row['Lokasi Penyimpanan']) else "")
+                    catatan = st.text_input("Catatan", placeholder="Contoh: Dipakai untuk servis PC Lab 2")
                 
-                col1_restore, col2_restore = st.columns(2)
+                submitted = st.form_submit_button("💾 Catat Pergerakan", width='stretch')
                 
-                with col1_restore:
-                    if st.button("🔄 Restore dari Backup", type="secondary", width='stretch'):
-                        with st.spinner('Restoring data from backup...'):
-                            if save_data(backup_df):
-                                st.success("✅ Data berhasil dipulihkan dari backup!")
+                if submitted:
+                    if jumlah == 0 or (jenis != "Koreksi" and jumlah < 0):
+                        st.error("❌ Jumlah harus lebih dari 0 (kecuali Koreksi)")
+                    else:
+                        jumlah = int(jumlah)
+                        movement = {
+                            "masuk": jumlah if jenis == "Masuk" else 0,
+                            "keluar": jumlah if jenis == "Keluar" else 0,
+                            "koreksi": jumlah if jenis == "Koreksi" else 0,
+                        }
+                        with st.spinner('Mencatat pergerakan...'):
+                            if record_movement(item_id, lokasi=lokasi, catatan=catatan, **movement):
+                                st.success(f"✅ Pergerakan {jenis.lower()} {jumlah} untuk '{selected_row['Nama Komponen']}' tercatat!")
                                 st.rerun()
                             else:
-                                st.error("❌ Gagal memulihkan data dari backup.")
-                
-                with col2_restore:
-                    if st.button("📋 Lihat Detail Backup", width='stretch'):
-                        st.markdown("**Detail Backup File:**")
-                        st.write(f"- **File:** {BACKUP_FILE}")
-                        st.write(f"- **Total Records:** {len(backup_df)}")
-                        if os.path.exists(BACKUP_FILE):
-                            file_size = os.path.getsize(BACKUP_FILE)
-                            st.write(f"- **File Size:** {file_size} bytes")
-                        st.write(f"- **Last Modified:** {datetime.fromtimestamp(os.path.getmtime(BACKUP_FILE)).strftime('%Y-%m-%d %H:%M:%S') if os.path.exists(BACKUP_FILE) else 'N/A'}")
-            else:
-                st.info("📝 Tidak ada data backup untuk dipulihkan.")
-            
+                                st.error("❌ Gagal mencatat pergerakan.")
+        
+        st.markdown("---")
+        st.subheader("📜 Riwayat Pergerakan")
+        try:
+            movements = get_backend().recent_movements(50, item_id=int(selected_row['ID']) if selected_row is not None else None)
+        except Exception as e:
+            st.error(f"Error loading movements: {str(e)}")
+            movements = []
+        if movements:
+            st.dataframe(
+                pd.DataFrame(movements).rename(columns={
+                    "seq": "No", "waktu": "Waktu", "id": "ID", "masuk": "Masuk", "keluar": "Keluar",
+                    "koreksi": "Koreksi", "lokasi": "Lokasi", "catatan": "Catatan"
+                }),
+                width='stretch',
+                hide_index=True
+            )
+        else:
+            st.info("📝 Belum ada pergerakan stok.")
+        
+        st.markdown("---")
+        st.subheader("📅 Stok pada Waktu Tertentu")
+        st.caption("Dihitung dari Stok Akhir saat ini dikurangi pergerakan setelah waktu yang dipilih. Perubahan dari import/restore tidak tercatat sebagai pergerakan.")
+        # Default diisi sekali per session supaya tidak berubah tiap rerun
+        now = datetime.now()
+        st.session_state.setdefault("stock_at_date", now.date())
+        st.session_state.setdefault("stock_at_time", now.time().replace(second=0, microsecond=0))
+        col1, col2 = st.columns(2)
+        with col1:
+            tanggal = st.date_input("Tanggal:", key="stock_at_date")
+        with col2:
+            jam = st.time_input("Jam:", key="stock_at_time")
+        waktu = datetime.combine(tanggal, jam).strftime("%Y-%m-%d %H:%M:%S")
+        history_df = stock_at(df, waktu)
+        if history_df is not None:
+            render_paged_table(history_df, "stock_at_table")
+    else:
+        st.info("📝 Belum ada data komponen.")
+
+# Label tab -> (fungsi render, role minimal) (urutan tampil)
+TABS = {
+    "📋 Lihat Inventory": (render_tab_inventory, "viewer"),
+    "➕ Tambah Barang": (render_tab_add, "operator"),
+    "✏️ Edit Barang": (render_tab_edit, "operator"),
+    "🗑️ Hapus Barang": (render_tab_delete, "operator"),
+    "📊 Import/Export": (render_tab_import_export, "admin"),
+    "💾 Backup Data": (render_tab_backup, "admin"),
+    "🔁 Pergerakan Stok": (render_tab_movements, "operator"),
+}
+
+def allowed_tabs(role):
+    """Tab yang boleh dibuka role ini: label -> fungsi render (masing-masing fragment)"""
+    return {label: render_tab for label, (render_tab, required) in TABS.items() if auth.has_role(role, required)}
+
+# ================================
+# MAIN APPLICATION
+# ================================
+
+def main():
+    """Aplikasi utama"""
+    recorder = get_metrics()
+    recorder.begin_run()
+    
+    # Cek authentication; halaman login tidak menyentuh data
+    if not check_password():
+        return
+    
+    # API (jika dikonfigurasi) dijalankan setelah login pertama di proses ini,
+    # jadi request tanpa login tidak pernah membuka storage
+    get_api_server()
+    
+    role = current_role()
+    tabs = allowed_tabs(role)
+
+    # Initialize data file
+    init_data_file()
+    # Perubahan sampai titik ini sudah tampil di rerun penuh ini
+    st.session_state.live_seq = get_inventory().change_seq()
+    # Aktifkan backup otomatis untuk proses ini
+    get_backups()
+    
+    # Header aplikasi
+    st.title("📦 Inventory Management System - Komponen")
+    st.markdown("### Sistem Manajemen Inventory Komponen - Full CRUD + Local Storage")
+    
+    # Sidebar untuk logout dan info
+    with st.sidebar, metrics.timed("render.sidebar"):
+        st.markdown("### Menu")
+        st.markdown(f"**User:** 👤 {current_user()} ({role})")
+        if st.button("🚪 Logout", width='stretch'):
+            logout()
+        
+        st.markdown("---")
+        st.markdown("**Status:** ✅ Ready")
+        backend = get_backend()
+        storage_label = {
+            'sqlite': "🗄️ Local SQLite Database",
+            'arrow': "🧱 Local Arrow File (kolom)",
+        }.get(backend.kind, "📁 Local CSV File")
+        st.markdown(f"**Storage:** {storage_label}")
+        st.markdown("**Mode:** 🔄 Full CRUD")
+        if CHANGE_FEED and LIVE_POLL_SECONDS:
+            render_live_changes()
+        
+        # Mode hemat: info data diisi setelah tab aktif selesai (lihat bawah)
+        data_info_slot = st.container()
+        if not LAZY_LOADING:
+            with data_info_slot:
+                render_sidebar_data()
+
+        # Panel performa diisi setelah semua tab selesai (lihat akhir main())
+        perf_slot = None
+        if recorder.enabled and is_admin():
             st.markdown("---")
-            st.markdown("**📁 Backup File Info:**")
-            if os.path.exists(BACKUP_FILE):
-                st.success(f"✅ Backup file ditemukan: `{BACKUP_FILE}`")
-                file_size = os.path.getsize(BACKUP_FILE)
-                st.write(f"- **Size:** {file_size} bytes")
-                st.write(f"- **Modified:** {datetime.fromtimestamp(os.path.getmtime(BACKUP_FILE)).strftime('%Y-%m-%d %H:%M:%S')}")
-            else:
-                st.warning(f"⚠️ Backup file tidak ditemukan: `{BACKUP_FILE}`")
+            perf_slot = st.empty()
+    
+    # Tab menu
+    if LAZY_LOADING:
+        # Hanya tab aktif yang dihitung; tab lain tidak dijalankan sama sekali
+        active = st.radio("Menu:", list(tabs), horizontal=True, key="active_tab", label_visibility="collapsed")
+        tabs[active]()
+        with data_info_slot:
+            render_sidebar_data()
+    else:
+        # Setiap tab adalah fragment: interaksi di satu tab tidak menjalankan tab lain
+        for tab, render_tab in zip(st.tabs(list(tabs)), tabs.values()):
+            with tab:
+                render_tab()
+
+    record_first_render()
+    # Rincian rerun ini (termasuk semua tab) untuk panel performa
+    run = recorder.end_run()
+    if perf_slot is not None:
+        with perf_slot.container():
+            render_perf_panel(run)
 
 # ================================
 # SETUP PAGE CONFIG
@@ -0,0 +1,257 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Sampel latency terakhir per operasi untuk persentil bergulir
+WINDOW = 1000
+# Jarak minimal (detik) antar penulisan file Prometheus
+PROMETHEUS_INTERVAL_SECONDS = 5
+# Persentil yang ditampilkan di panel & file Prometheus
+QUANTILES = (0.5, 0.95, 0.99)
+
+# ================================
+# TIMER
+# ================================
+
+class _NullTimer:
+    """Timer saat instrumentasi mati: tidak mengukur apa-apa"""
+
+    rows = None
+    bytes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+class Timer:
+    """Mengukur satu pemanggilan; rows/bytes boleh diisi di dalam blok with"""
+
+    __slots__ = ("recorder", "name", "rows", "bytes", "start", "depth")
+
+    def __init__(self, recorder, name, rows=None, bytes=None):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+
+    def __enter__(self):
+        self.depth = self.recorder._enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.recorder._exit()
+        self.recorder._record(self.name, seconds, self.rows, self.bytes, self.depth, exc_type is not None, self.start)
+        return False
+
+# ================================
+# RECORDER
+# ================================
+
+class Recorder:
+    """Latency, baris dan byte per operasi, dikumpulkan di memory proses.
+
+    Mati secara default: timed() lalu mengembalikan timer kosong dan
+    fungsi ber-@instrument langsung dipanggil, jadi overhead-nya hanya
+    satu pengecekan atribut. Saat aktif, setiap pemanggilan dicatat ke
+    jendela sampel bergulir (untuk persentil), total kumulatif, daftar
+    pemanggilan rerun yang sedang berjalan di thread ini (lihat
+    begin_run()), dan opsional satu baris JSON di log_path.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.enabled = False
+        self.log_path = None
+        self.prometheus_path = None
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}  # nama -> deque detik
+        self._totals = {}   # nama -> [count, detik, rows, bytes, errors]
+        self._local = threading.local()
+        self._dumped = 0.0
+
+    def configure(self, enabled=True, log_path=None, prometheus_path=None):
+        self.enabled = bool(enabled)
+        self.log_path = log_path or None
+        self.prometheus_path = prometheus_path or None
+
+    def timed(self, name, rows=None, bytes=None):
+        """Context manager pengukur satu operasi"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return Timer(self, name, rows, bytes)
+
+    def instrument(self, name):
+        """Decorator: ukur setiap pemanggilan fungsi dengan nama ini"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Timer(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # -- pencatatan ---------------------------------------------------
+
+    def _enter(self):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def _exit(self):
+        self._local.depth -= 1
+
+    def _record(self, name, seconds, rows, bytes, depth, error, start=None):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0, 0, 0, 0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += rows or 0
+            totals[3] += bytes or 0
+            totals[4] += int(error)
+
+        call = {"name": name, "seconds": seconds, "rows": rows, "bytes": bytes, "depth": depth, "error": error}
+        calls = getattr(self._local, "calls", None)
+        if calls is not None:
+            calls.append((start, call))
+        if self.log_path:
+            line = json.dumps({
+                "ts": datetime.now().isoformat(timespec='milliseconds'),
+                "thread": threading.current_thread().name,
+                **call,
+            })
+            with self._lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    def record(self, name, seconds, rows=None, bytes=None):
+        """Catat durasi yang diukur sendiri oleh pemanggil"""
+        if self.enabled:
+            self._record(name, seconds, rows, bytes, getattr(self._local, "depth", 0), False, time.perf_counter() - seconds)
+
+    # -- per rerun ----------------------------------------------------
+
+    def begin_run(self):
+        """Mulai mengumpulkan pemanggilan thread ini (satu rerun Streamlit)"""
+        self._local.calls = [] if self.enabled else None
+        self._local.depth = 0
+        self._local.run_start = time.perf_counter()
+
+    def in_run(self):
+        """True jika thread ini sedang di antara begin_run() dan end_run()"""
+        return getattr(self._local, "calls", None) is not None
+
+    def end_run(self, name="rerun"):
+        """Selesai satu rerun (dicatat sebagai name); dict {seconds, calls} atau None jika mati"""
+        calls = getattr(self._local, "calls", None)
+        self._local.calls = None
+        if calls is None:
+            return None
+        seconds = time.perf_counter() - self._local.run_start
+        self._record(name, seconds, None, None, 0, False, self._local.run_start)
+        self.maybe_dump()
+        # Dicatat saat selesai; diurutkan menurut waktu mulai supaya induk di atas anaknya
+        calls.sort(key=lambda item: item[0])
+        return {"seconds": seconds, "calls": [call for _, call in calls]}
+
+    # -- laporan ------------------------------------------------------
+
+    def stats(self):
+        """Ringkasan per operasi: count, persentil, max, total rows/bytes"""
+        import numpy as np
+
+        with self._lock:
+            snapshot = {name: (np.array(samples), list(self._totals[name])) for name, samples in self._samples.items()}
+        result = []
+        for name, (samples, (count, total, rows, bytes, errors)) in sorted(snapshot.items()):
+            quantiles = np.quantile(samples, QUANTILES) if len(samples) else [0.0] * len(QUANTILES)
+            result.append({
+                "name": name,
+                "count": count,
+                "seconds_total": total,
+                **{f"p{int(q * 100)}": value for q, value in zip(QUANTILES, quantiles)},
+                "max": float(samples.max()) if len(samples) else 0.0,
+                "rows": rows,
+                "bytes": bytes,
+                "errors": errors,
+            })
+        return result
+
+    def prometheus(self):
+        """Statistik dalam format teks Prometheus"""
+        lines = [
+            "# HELP inventory_op_seconds Latency operasi inventory (jendela bergulir).",
+            "# TYPE inventory_op_seconds summary",
+        ]
+        stats = self.stats()
+        for stat in stats:
+            label = stat["name"].replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'inventory_op_seconds{{op="{label}",quantile="{q}"}} {stat[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'inventory_op_seconds_sum{{op="{label}"}} {stat["seconds_total"]:.6f}')
+            lines.append(f'inventory_op_seconds_count{{op="{label}"}} {stat["count"]}')
+        for metric, key, help_text in (
+            ("inventory_op_rows_total", "rows", "Baris yang diproses."),
+            ("inventory_op_bytes_total", "bytes", "Byte yang dibaca atau ditulis."),
+            ("inventory_op_errors_total", "errors", "Pemanggilan yang melempar exception."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for stat in stats:
+                label = stat["name"].replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}{{op="{label}"}} {stat[key]}')
+        return "\n".join(lines) + "\n"
+
+    def maybe_dump(self, force=False):
+        """Tulis file Prometheus (jika dikonfigurasi), maksimal sekali per interval"""
+        if not self.prometheus_path:
+            return
+        now = time.monotonic()
+        if not force and now - self._dumped < PROMETHEUS_INTERVAL_SECONDS:
+            return
+        self._dumped = now
+        # Import lokal: storage sendiri mengimpor modul ini
+        from storage import write_text
+        write_text(self.prometheus_path, self.prometheus())
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+# Recorder bersama untuk seluruh proses (UI, API, thread backup)
+RECORDER = Recorder()
+
+def timed(name, rows=None, bytes=None):
+    return RECORDER.timed(name, rows, bytes)
+
+def instrument(name):
+    return RECORDER.instrument(name)
+
+def configure(enabled=True, log_path=None, prometheus_path=None):
+    RECORDER.configure(enabled, log_path, prometheus_path)
+
+def enabled():
+    return RECORDER.enabled
@@ -0,0 +1,211 @@
+import threading
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Panjang n-gram yang diindex; kata kunci lebih pendek dicek satu per satu
+NGRAM = 3
+
+# Kolom nama untuk prefix lookup (item picker)
+NAME_COLUMN = "Nama Komponen"
+
+# ================================
+# HELPER
+# ================================
+
+def normalize(value):
+    """Teks pencarian: lowercase, NaN/None menjadi string kosong"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value).lower()
+
+def _grams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+# ================================
+# SEARCH INDEX
+# ================================
+
+class SearchIndex:
+    """Index n-gram untuk pencarian substring (case-insensitive) per ID.
+
+    Selain n-gram, nama komponen disimpan terurut untuk prefix lookup.
+    Index dibangun sekali dari snapshot lalu diperbarui secara incremental
+    lewat event backend (lihat storage.Backend.subscribe). Jika event
+    terlewat atau data diganti seluruhnya, index ditandai basi dan
+    dibangun ulang pada pencarian berikutnya.
+    """
+
+    def __init__(self, columns=(NAME_COLUMN,)):
+        self.columns = list(columns)
+        # Teks yang disimpan per baris: kolom pencarian + kolom nama
+        self._fields = list(dict.fromkeys(self.columns + [NAME_COLUMN]))
+        self._name_slot = self._fields.index(NAME_COLUMN)
+        self._lock = threading.Lock()
+        self._version = None
+        self._rows = {}      # ID -> list tuple teks per field (satu per baris)
+        self._postings = {}  # n-gram -> set ID
+        self._names = []     # list terurut (nama, ID) untuk prefix lookup
+        self._locator = None  # (version, pd.Index berisi ID per posisi baris)
+
+    # -- maintenance --------------------------------------------------
+
+    def _searchable(self, texts):
+        return texts[:len(self.columns)]
+
+    def _add(self, item_id, texts):
+        self._rows.setdefault(item_id, []).append(texts)
+        insort(self._names, (texts[self._name_slot], item_id))
+        for text in self._searchable(texts):
+            for gram in _grams(text):
+                self._postings.setdefault(gram, set()).add(item_id)
+
+    def _remove(self, item_id):
+        for texts in self._rows.pop(item_id, []):
+            position = bisect_left(self._names, (texts[self._name_slot], item_id))
+            if position < len(self._names) and self._names[position][1] == item_id:
+                del self._names[position]
+            for text in self._searchable(texts):
+                for gram in _grams(text):
+                    posting = self._postings.get(gram)
+                    if posting is not None:
+                        posting.discard(item_id)
+                        if not posting:
+                            del self._postings[gram]
+
+    def _texts(self, row):
+        return tuple(normalize(row.get(col)) for col in self._fields)
+
+    def rebuild(self, df, version):
+        """Bangun ulang index dari snapshot penuh"""
+        with self._lock:
+            self._rows = {}
+            self._postings = {}
+            self._names = []
+            if len(df) > 0:
+                columns = [
+                    df[col].astype(object).fillna("").astype(str).str.lower().tolist() if col in df.columns
+                    else [""] * len(df)
+                    for col in self._fields
+                ]
+                for item_id, texts in zip(df['ID'].tolist(), zip(*columns)):
+                    self._add(item_id, texts)
+            self._version = version
+
+    def apply(self, event):
+        """Listener backend: terapkan satu perubahan secara incremental"""
+        with self._lock:
+            if self._version is None or event['prev_version'] != self._version:
+                self._version = None
+                return
+
+            op = event['op']
+            if op == 'insert':
+                self._add(event['id'], self._texts(event['row']))
+            elif op in ('update', 'update_many'):
+                updates = event['updates'] if op == 'update_many' else [event]
+                for update in updates:
+                    if not self._update(update['id'], update['values']):
+                        # ID ganda: baris mana yang berubah tidak tercatat di index
+                        self._version = None
+                        return
+            elif op == 'delete':
+                self._remove(event['id'])
+            elif op == 'delete_many':
+                for item_id in event['ids']:
+                    self._remove(item_id)
+            else:
+                self._version = None
+                return
+            self._version = event['version']
+
+    def _update(self, item_id, values):
+        """Perbarui teks satu ID; False jika ID punya lebih dari satu baris"""
+        rows = self._rows.get(item_id, [])
+        if len(rows) != 1:
+            return False
+        current = dict(zip(self._fields, rows[0]))
+        current.update({
+            col: normalize(value) for col, value in values.items()
+            if col in current
+        })
+        self._remove(item_id)
+        self._add(item_id, tuple(current[col] for col in self._fields))
+        return True
+
+    def _sync(self, df, version):
+        if self._version != version or version is None:
+            self.rebuild(df, version)
+
+    # -- query --------------------------------------------------------
+
+    def search_ids(self, df, version, term):
+        """ID yang teksnya mengandung term (tanpa urutan tertentu)"""
+        self._sync(df, version)
+        term = normalize(term)
+        with self._lock:
+            if len(term) >= NGRAM:
+                postings = sorted(
+                    (self._postings.get(gram, set()) for gram in _grams(term)), key=len
+                )
+                candidates = set.intersection(*postings) if postings[0] else set()
+            else:
+                candidates = self._rows.keys()
+            return [
+                item_id for item_id in candidates
+                if any(
+                    term in text
+                    for texts in self._rows[item_id] for text in self._searchable(texts)
+                )
+            ]
+
+    def suggest(self, df, version, query, limit):
+        """Maksimal limit ID: ID yang persis sama, lalu nama berawalan query"""
+        self._sync(df, version)
+        query = normalize(query).strip()
+        result = []
+        with self._lock:
+            if query.isdigit() and int(query) in self._rows:
+                result.append(int(query))
+            position = bisect_left(self._names, (query,))
+            while len(result) < limit and position < len(self._names):
+                name, item_id = self._names[position]
+                if not name.startswith(query):
+                    break
+                if item_id not in result:
+                    result.append(item_id)
+                position += 1
+        return result
+
+    def locate(self, df, version, ids, sort=True):
+        """Posisi baris untuk daftar ID pada snapshot versi ini.
+
+        Lookup lewat hash index ID (dibangun sekali per versi). Dengan
+        sort=False posisi mengikuti urutan ids.
+        """
+        locator = self._locator
+        if locator is None or locator[0] != version or version is None:
+            locator = (version, pd.Index(df['ID']))
+            self._locator = locator
+        if len(ids) == 0:
+            return np.array([], dtype=np.intp)
+        positions = locator[1].get_indexer_for(list(ids))
+        positions = positions[positions >= 0]
+        return np.sort(positions) if sort else positions
+
+    def row(self, df, version, item_id):
+        """Baris pertama dengan ID tersebut, atau None"""
+        positions = self.locate(df, version, [item_id], sort=False)
+        if len(positions) == 0:
+            return None
+        return df.iloc[positions[0]]
+
+    def search(self, df, version, term):
+        """Posisi baris snapshot yang cocok dengan term, tanpa menyalin frame"""
+        return self.locate(df, version, self.search_ids(df, version, term))
@@ -0,0 +1,2007 @@
+import hashlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from ledger import Ledger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ================================
+# KONFIGURASI
+# ================================
+
+# Berapa kali transaksi diulang jika terjadi konflik versi; percobaan
+# terakhir memegang lock eksklusif sehingga tidak bisa konflik lagi
+DEFAULT_RETRIES = 5
+# Jeda awal (detik) sebelum mengulang transaksi, dikali dua tiap percobaan
+# dan diacak +/-50% supaya writer yang bentrok tidak mengulang bersamaan
+RETRY_BACKOFF = 0.02
+
+# Format kolom Tanggal di file CSV
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Penanda write_csv() tanpa pengecekan versi
+ANY_VERSION = object()
+
+# Jumlah versi snapshot bersama yang disimpan per sumber data
+SHARED_KEEP = 3
+
+# Struktur kolom inventory
+COLUMNS = [
+    "ID", "Tanggal", "Nama Komponen", "Deskripsi",
+    "Jumlah Masuk", "Jumlah Keluar", "Stok Akhir",
+    "Lokasi Penyimpanan", "Keterangan"
+]
+NUMERIC_COLUMNS = ["Jumlah Masuk", "Jumlah Keluar", "Stok Akhir"]
+# Kolom teks bebas (lihat compact())
+TEXT_COLUMNS = ["Nama Komponen", "Deskripsi", "Keterangan"]
+
+# ================================
+# ERROR
+# ================================
+
+class ConflictError(Exception):
+    """File berubah sejak dibaca (optimistic version check gagal)"""
+
+# ================================
+# VERSI & LOCK
+# ================================
+
+def file_version(path):
+    """Versi file (inode, mtime_ns, size), atau None jika file tidak ada.
+
+    Setiap commit atomik membuat inode baru dan setiap append menambah
+    size, sehingga versi ini berubah di setiap penulisan.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def _lock_path(path):
+    return f"{path}.lock"
+
+# Lock eksklusif yang sedang dipegang thread ini (lihat file_lock())
+_held_locks = threading.local()
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Advisory lock pada file pendamping `<path>.lock`.
+
+    Lock eksklusif hanya dipegang selama commit; pembaca memakai lock
+    shared agar tidak membaca baris append yang setengah tertulis. Selama
+    thread ini memegang lock eksklusif path, file_lock(path) berikutnya di
+    thread yang sama langsung masuk (mis. baca dan commit di dalam
+    percobaan terakhir transaksi).
+    """
+    lock_path = os.path.abspath(_lock_path(path))
+    held = _held_locks.__dict__.setdefault('paths', set())
+    if lock_path in held:
+        yield
+        return
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt tidak punya shared lock, jadi selalu eksklusif
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        if not shared or fcntl is None:
+            held.add(lock_path)
+        try:
+            yield
+        finally:
+            held.discard(lock_path)
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _attempt_lock(path, attempt, retries):
+    """Lock untuk satu percobaan transaksi: percobaan terakhir memegang lock
+    eksklusif dari baca sampai commit, percobaan lain optimistic"""
+    return file_lock(path) if attempt == retries else nullcontext()
+
+def _backoff(attempt):
+    """Tunggu sebelum percobaan berikutnya (eksponensial dengan jitter)"""
+    time.sleep(RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+def _fsync_dir(path):
+    """fsync direktori agar rename tercatat permanen (no-op di Windows)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+# ================================
+# BACA & TULIS
+# ================================
+
+def coerce_numeric(df):
+    """Pastikan kolom numerik dalam format yang benar"""
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        raw = f.read()
+    return raw, (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def read_csv(path, lock=True):
+    """Baca CSV beserta versinya sebagai tuple (df, version).
+
+    Byte file dibaca di bawah lock shared, parsing dilakukan setelah lock
+    dilepas supaya writer tidak menunggu pandas. Gunakan lock=False jika
+    pemanggil sudah memegang file_lock(path).
+    """
+    with file_lock(path, shared=True) if lock else nullcontext():
+        raw, version = _read_bytes(path)
+    return pd.read_csv(io.BytesIO(raw)), version
+
+def write_text(path, text):
+    """Tulis file teks kecil secara atomik (temp file + rename, tanpa lock)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _csv_ready(df):
+    """Frame untuk to_csv(): jumlah Float64 yang bulat ditulis tanpa ".0"
+    supaya isi file tidak berubah saat ditulis ulang"""
+    floats = [col for col in df.columns if df[col].dtype == pd.Float64Dtype()]
+    if not floats:
+        return df
+    df = df.copy(deep=False)
+    for col in floats:
+        df[col] = pd.Series(
+            [value if pd.isna(value) or not float(value).is_integer() else int(value) for value in df[col]],
+            index=df.index, dtype=object
+        )
+    return df
+
+def _write_temp_csv(path, chunks):
+    """Tulis potongan DataFrame ke file sementara di direktori yang sama.
+
+    Header ditulis dari potongan pertama (atau COLUMNS jika tidak ada
+    potongan sama sekali). File sudah di-fsync saat dikembalikan.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp'
+    )
+    try:
+        with metrics.timed("csv.write") as timer, os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            header = True
+            rows = 0
+            for chunk in chunks:
+                _csv_ready(chunk).to_csv(f, index=False, header=header, date_format=DATE_FORMAT)
+                header = False
+                rows += len(chunk)
+            if header:
+                pd.DataFrame(columns=COLUMNS).to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            timer.rows = rows
+            timer.bytes = f.tell()
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+def _link_or_copy(src, dst):
+    """Hard link src ke dst (O(1)), fallback ke salinan byte"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def write_csv(path, df, expected_version=ANY_VERSION, backup_path=None, on_commit=None):
+    """Commit df ke path secara atomik (temp file + rename).
+
+    Jika expected_version diberikan dan versi file saat ini berbeda,
+    ConflictError dilempar dan file tidak diubah; expected_version=None
+    berarti file belum boleh ada. Jika backup_path diberikan, isi lama
+    file menjadi backup. on_commit(tmp_path) dipanggil di dalam lock tepat
+    sebelum rename dan boleh melempar ConflictError untuk membatalkan.
+    Mengembalikan versi baru.
+    """
+    return write_csv_chunks(
+        path, [df], expected_version=expected_version, backup_path=backup_path, on_commit=on_commit
+    )
+
+def write_csv_chunks(path, chunks, expected_version=ANY_VERSION, backup_path=None, on_commit=None):
+    """Seperti write_csv(), tetapi isi file berasal dari iterable DataFrame.
+
+    Potongan ditulis satu per satu sehingga data besar tidak perlu
+    digabung menjadi satu frame di memory.
+    """
+    # File sementara ditulis di luar lock supaya lock hanya menahan rename
+    tmp_path = _write_temp_csv(path, chunks)
+    return _commit_file(path, tmp_path, expected_version, backup_path, on_commit)
+
+def _commit_file(path, tmp_path, expected_version=ANY_VERSION, backup_path=None, on_commit=None):
+    """Rename tmp_path menjadi path di bawah lock (lihat write_csv())"""
+    try:
+        with file_lock(path):
+            current = file_version(path)
+            if expected_version is not ANY_VERSION and current != expected_version:
+                raise ConflictError(f"{path} berubah sejak dibaca")
+            if on_commit is not None:
+                on_commit(tmp_path)
+
+            backup_tmp = None
+            if backup_path and current is not None:
+                backup_tmp = f"{backup_path}.{os.getpid()}.tmp"
+                if os.path.exists(backup_tmp):
+                    os.unlink(backup_tmp)
+                _link_or_copy(path, backup_tmp)
+
+            try:
+                os.replace(tmp_path, path)
+            except BaseException:
+                if backup_tmp:
+                    os.unlink(backup_tmp)
+                raise
+            if backup_tmp:
+                os.replace(backup_tmp, backup_path)
+            _fsync_dir(path)
+            return file_version(path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def append_csv_row(path, row):
+    """Tambahkan satu baris ke akhir CSV dengan append yang di-fsync.
+
+    Pemanggil harus memegang file_lock(path) supaya alokasi ID dan append
+    terjadi dalam satu critical section.
+    """
+    return append_csv_chunks(path, [pd.DataFrame([row])])
+
+def append_csv_chunks(path, chunks):
+    """Append potongan DataFrame ke akhir CSV, fsync sekali di akhir.
+
+    Kolom setiap potongan harus sama persis dengan header file; jika satu
+    potongan gagal, file dikembalikan ke ukuran semula. Pemanggil harus
+    memegang file_lock(path).
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        header = f.readline().rstrip('\r\n').split(',')
+
+    with metrics.timed("csv.append") as timer, open(path, 'a+b') as f:
+        # Pastikan baris baru dimulai di line sendiri
+        f.seek(0, os.SEEK_END)
+        needs_newline = False
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        start = f.tell()
+        rows = 0
+        try:
+            for chunk in chunks:
+                if header != list(chunk.columns):
+                    raise ValueError(f"Header {path} tidak sesuai dengan kolom data")
+                text = _csv_ready(chunk).to_csv(index=False, header=False, date_format=DATE_FORMAT)
+                if needs_newline:
+                    text = '\n' + text
+                    needs_newline = False
+                f.write(text.encode('utf-8'))
+                rows += len(chunk)
+        except BaseException:
+            # Potongan gagal atau dibatalkan: buang baris yang sudah ditambahkan
+            f.truncate(start)
+            raise
+        f.flush()
+        os.fsync(f.fileno())
+        timer.rows = rows
+        timer.bytes = f.tell() - start
+    return file_version(path)
+
+# ================================
+# FRAME RINGKAS
+# ================================
+
+@lru_cache(maxsize=None)
+def _text_dtype():
+    """String berbasis pyarrow dengan NaN sebagai nilai kosong (seperti object)"""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)  # pandas >= 2.3
+    except (TypeError, ImportError):
+        pass
+    try:
+        return pd.StringDtype('pyarrow_numpy')  # pandas 2.1 - 2.2
+    except (TypeError, ValueError, ImportError):
+        return np.dtype(object)
+
+def _lost(values, converted):
+    """Mask nilai terisi (bukan kosong) yang gagal dikonversi"""
+    if not converted.hasnans:
+        return np.zeros(len(values), dtype=bool)
+    filled = values.notna() & (values.astype(str).str.strip() != "")
+    return (filled & converted.isna()).to_numpy()
+
+def _invalid(col, values, mask):
+    first = values[mask].iloc[0]
+    return ValueError(f"Nilai '{first}' tidak valid untuk kolom {col}")
+
+def _compact_column(col, values, strict=False):
+    """Satu kolom dengan tipe ringkas tanpa mengubah isinya.
+
+    Nilai yang tidak muat di tipe ringkas tidak dibuang: ID bukan bilangan
+    bulat dipakai apa adanya, jumlah pecahan menjadi Float64 dan Tanggal di
+    luar DATE_FORMAT tetap teks. Jumlah kosong menjadi 0. Dengan strict
+    (nilai baru yang akan ditulis) ID dan jumlah yang bukan angka
+    menimbulkan ValueError.
+    """
+    if col == "ID":
+        if values.dtype == np.int64:
+            return values
+        numbers = pd.to_numeric(values, errors='coerce')
+        invalid = _lost(values, numbers) | (numbers.notna() & (numbers % 1 != 0)).to_numpy()
+        if invalid.any():
+            if strict:
+                raise _invalid(col, values, invalid)
+            return values
+        return numbers.astype('Int64' if numbers.hasnans else 'int64')
+    if col in NUMERIC_COLUMNS:
+        if values.dtype in (pd.Int64Dtype(), pd.Float64Dtype()) and not values.hasnans:
+            return values
+        numbers = pd.to_numeric(values, errors='coerce')
+        if strict:
+            invalid = _lost(values, numbers)
+            if invalid.any():
+                raise _invalid(col, values, invalid)
+        numbers = numbers.fillna(0)
+        return numbers.astype('Float64' if (numbers % 1 != 0).any() else 'Int64')
+    if col == "Tanggal":
+        if values.dtype == 'datetime64[s]':
+            return values
+        dates = pd.to_datetime(values, errors='coerce', format=DATE_FORMAT)
+        if _lost(values, dates).any():
+            return _compact_column("Keterangan", values)
+        return dates.astype('datetime64[s]')
+    if col == "Lokasi Penyimpanan":
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        return _compact_column("Keterangan", values).astype('category')
+    if col in TEXT_COLUMNS:
+        dtype = _text_dtype()
+        return values if values.dtype == dtype else values.astype(dtype)
+    return values
+
+def compact(df):
+    """Frame inventory dengan tipe ringkas; df tidak diubah.
+
+    ID int64, jumlah Int64 (kosong menjadi 0), Tanggal datetime64[s],
+    Lokasi Penyimpanan category dan teks bebas string pyarrow. Nilai yang
+    tidak muat dipertahankan (lihat _compact_column()) sehingga menulis
+    ulang frame tidak mengubah data. Kolom yang sudah bertipe benar
+    dipakai apa adanya tanpa salinan.
+    """
+    return pd.DataFrame(
+        {col: _compact_column(col, df[col]) for col in df.columns}, index=df.index, copy=False
+    )
+
+def memory_usage(df):
+    """Pemakaian memory per kolom dalam byte (termasuk isi string)"""
+    return df.memory_usage(index=False, deep=True)
+
+def set_values(df, positions, col, values):
+    """Isi df[col] pada posisi baris tersebut dengan values (satu pass per kolom).
+
+    Nilai dikonversi ke tipe kolom (lihat compact()); ID atau jumlah yang
+    bukan angka menimbulkan ValueError. Lokasi baru ditambahkan dulu ke
+    kategori kolom; nilai yang tidak muat di tipe kolom (mis. jumlah
+    pecahan) membuat kolom diringkas ulang.
+    """
+    column = df[col].copy()
+    values = pd.Series(list(values), dtype=object)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        new = values.dropna().unique()
+        column = column.cat.add_categories([value for value in new if value not in column.cat.categories])
+    else:
+        values = _compact_column(col, values, strict=True)
+        if values.dtype != column.dtype:
+            column = column.astype(object)
+            column.iloc[list(positions)] = values.astype(object).to_numpy()
+            df[col] = _compact_column(col, column)
+            return
+    column.iloc[list(positions)] = values.to_numpy()
+    df[col] = column
+
+def _plain_value(value):
+    """Satu nilai sebagai nilai Python polos (lihat plain_rows())"""
+    if not isinstance(value, str) and pd.isna(value):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value.item() if isinstance(value, np.generic) else value
+
+def row_values(values, complete=False):
+    """Nilai {kolom: nilai} untuk insert/update, sama di semua backend.
+
+    Nilai menjadi nilai Python polos (lihat _plain_value()) dengan urutan
+    COLUMNS. ID dan jumlah divalidasi seperti set_values(): bukan angka
+    menimbulkan ValueError, jumlah kosong menjadi 0. Dengan complete
+    (baris baru) kolom yang tidak ada diisi 0 untuk jumlah dan teks kosong
+    untuk kolom lain.
+    """
+    unknown = [col for col in values if col not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Kolom tidak dikenal: {unknown}")
+    result = {}
+    for col in COLUMNS:
+        if col in values:
+            value = values[col]
+            if col == "ID" or col in NUMERIC_COLUMNS:
+                value = _compact_column(col, pd.Series([value], dtype=object), strict=True).iloc[0]
+            result[col] = _plain_value(value)
+        elif complete and col != "ID":
+            result[col] = 0 if col in NUMERIC_COLUMNS else ""
+    return result
+
+def plain_rows(df):
+    """Baris df sebagai tuple nilai Python (Tanggal teks, kosong None) untuk SQLite"""
+    df = df.astype(object)
+    if "Tanggal" in df.columns:
+        df["Tanggal"] = [_plain_value(value) for value in df["Tanggal"]]
+    df = df.where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+# ================================
+# TRANSAKSI
+# ================================
+
+def transact(path, mutate, load=None, backup_path=None, retries=DEFAULT_RETRIES):
+    """Read-modify-write dengan optimistic concurrency.
+
+    load() mengembalikan (df, version) dan default-nya read_csv(path).
+    mutate(df) mengembalikan DataFrame baru, atau None untuk membatalkan.
+    Jika file berubah di antara baca dan commit, seluruh siklus diulang.
+    Mengembalikan versi baru, atau None jika mutate membatalkan.
+    """
+    if load is None:
+        load = lambda: read_csv(path)
+
+    for attempt in range(retries + 1):
+        with _attempt_lock(path, attempt, retries):
+            df, version = load()
+            new_df = mutate(df)
+            if new_df is None:
+                return None
+            try:
+                return write_csv(path, new_df, expected_version=version, backup_path=backup_path)
+            except ConflictError:
+                if attempt == retries:
+                    raise
+        _backoff(attempt)
+
+# ================================
+# BACKEND
+# ================================
+
+class Backend:
+    """Basis backend: daftar listener yang diberi tahu setiap commit.
+
+    Setiap event adalah dict dengan 'op' ('insert', 'update', 'delete',
+    'update_many', 'delete_many' atau 'replace'), 'version' (versi setelah
+    commit) dan 'prev_version' (versi sebelum commit, None untuk 'replace').
+    Field tambahan: 'id', 'row' (insert), 'values' + 'old_row' (update),
+    'old_rows' (delete), 'updates' berisi dict id/values/old_row
+    (update_many), 'ids' + 'old_rows' (delete_many). Pergerakan stok
+    dikirim sebagai 'update' dengan field 'movement'.
+    Listener yang versinya tidak sama dengan prev_version harus membangun
+    ulang dari read(). Commit proses lain yang diterapkan dari change feed
+    (lihat attach_feed()) dikirim ulang dengan 'replayed': True.
+    """
+
+    def __init__(self):
+        self._listeners = []
+        self.shared = None  # SharedSnapshots, lihat share()
+        self.feed = None    # changefeed.ChangeFeed, lihat attach_feed()
+
+    def subscribe(self, listener):
+        """Daftarkan listener(event) yang dipanggil setelah setiap commit"""
+        self._listeners.append(listener)
+
+    def share(self, snapshots):
+        """Bagi snapshot ke proses lain lewat SharedSnapshots"""
+        self.shared = snapshots
+
+    def attach_feed(self, feed):
+        """Catat setiap commit ke change feed, dan pakai feed itu untuk
+        mengejar commit proses lain tanpa membaca ulang seluruh data"""
+        self.feed = feed
+        self.subscribe(feed.append)
+
+    def _catch_up(self, snapshot, version):
+        """Terapkan record feed ke snapshot lama sampai version.
+
+        Mengembalikan (df, events) dengan events siap di-_emit() (berisi
+        baris lama dari snapshot), atau None jika harus membaca ulang.
+        """
+        if self.feed is None or snapshot is None or version is None:
+            return None
+        records = self.feed.chain(snapshot[0], version)
+        if not records:
+            return None
+        df, events = snapshot[1], []
+        with metrics.timed("feed.catch_up", rows=len(records)):
+            for record in records:
+                patched = _patch(df, record, self._row_frame)
+                if patched is None:
+                    return None
+                df, event = patched
+                events.append(event)
+        return df, events
+
+    def _row_frame(self, row):
+        """Satu baris baru sebagai frame ringkas, sama seperti hasil read()"""
+        return compact(pd.DataFrame([row]))
+
+    def _shared_key(self):
+        return os.path.abspath(self.path)
+
+    def _load_shared(self, version):
+        """Snapshot versi ini dari proses lain, atau None"""
+        if self.shared is None or version is None:
+            return None
+        return self.shared.load(self._shared_key(), version)
+
+    def _publish(self, df, version):
+        """Publikasikan df; mengembalikan salinan ter-map (dibagi antar proses) atau df"""
+        if self.shared is None or version is None:
+            return df
+        return self.shared.publish(self._shared_key(), version, df)
+
+    def _emit(self, op, version, prev_version=None, **fields):
+        event = {"op": op, "version": version, "prev_version": prev_version, **fields}
+        for listener in list(self._listeners):
+            listener(event)
+
+class CsvBackend(Backend):
+    """Inventory di satu file CSV, ditulis lewat write_csv/append_csv_row.
+
+    Pergerakan stok (record_movement) hanya di-append ke ledger di samping
+    file (`<path>.movements.jsonl`) dan ditampilkan di atas isi file saat
+    dibaca. Setiap penulisan ulang file memuat nilai hasil pergerakan itu
+    dan menandai ledger dengan fold, sehingga pergerakan tidak dihitung
+    dua kali. Versi = versi file + ukuran ledger.
+
+    Snapshot hasil parse disimpan per versi dan dibagi ke semua pemanggil
+    dalam proses; frame dari read() jangan dimodifikasi.
+    """
+
+    kind = 'csv'
+
+    def __init__(self, path, backup_path=None):
+        super().__init__()
+        self.path = path
+        self.backup_path = backup_path
+        self.ledger = Ledger(f"{path}.movements.jsonl")
+        self._lock = threading.Lock()
+        self._snapshot = None  # (version, df)
+        self._max_id = None    # (version, max ID)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def create(self, df):
+        """Buat file data; False jika file sudah dibuat proses lain"""
+        try:
+            self._write_frame(self._normalize(df), expected_version=None, on_commit=self._fold())
+        except ConflictError:
+            return False
+        return True
+
+    def _combined(self, base_version, ledger_version):
+        if base_version is None:
+            return None
+        return base_version + (ledger_version,)
+
+    def version(self):
+        return self._combined(file_version(self.path), self.ledger.version())
+
+    # -- format file (di-override ArrowBackend) ------------------------
+
+    def _load_raw(self):
+        """Isi file mentah + versinya; pemanggil memegang lock"""
+        return _read_bytes(self.path)
+
+    def _decode(self, raw):
+        """Isi mentah menjadi DataFrame ringkas (di luar lock)"""
+        return compact(pd.read_csv(io.BytesIO(raw)))
+
+    def _normalize(self, df):
+        """Frame yang akan ditulis & disimpan sebagai snapshot"""
+        return compact(df)
+
+    def _row_frame(self, row):
+        # Baris baru di-parse dengan aturan yang sama seperti read_csv
+        line = pd.DataFrame([row]).to_csv(index=False)
+        return compact(pd.read_csv(io.StringIO(line)))
+
+    def _editable(self, df):
+        """Salinan snapshot yang boleh diubah oleh mutate() (lihat set_value())"""
+        return df.copy()
+
+    def _write_frame(self, df, expected_version=ANY_VERSION, on_commit=None):
+        return write_csv(
+            self.path, df, expected_version=expected_version, backup_path=self.backup_path, on_commit=on_commit
+        )
+
+    def _write_chunks(self, chunks, on_commit=None):
+        return write_csv_chunks(self.path, chunks, backup_path=self.backup_path, on_commit=on_commit)
+
+    # -- baca ---------------------------------------------------------
+
+    def _parse(self, lock=True):
+        with metrics.timed(f"{self.kind}.parse") as timer:
+            with file_lock(self.path, shared=True) if lock else nullcontext():
+                raw, base_version = self._load_raw()
+                ledger_version = self.ledger.version()
+            df = self._decode(raw)
+            pending, ledger_version = self.ledger.pending(base_version[0], upto=ledger_version)
+            timer.rows = len(df)
+            # CSV: byte file; Arrow: byte kolom yang di-map
+            timer.bytes = raw.nbytes if hasattr(raw, 'nbytes') else len(raw)
+        return _apply_pending(df, pending), self._combined(base_version, ledger_version)
+
+    def read(self):
+        """Snapshot (df, version) terbaru, parse ulang hanya jika data berubah.
+
+        Commit proses lain yang tercatat di change feed diterapkan ke
+        snapshot lama tanpa parse. Dengan snapshot bersama, versi yang sudah
+        dipublikasikan proses lain dipetakan langsung tanpa parse.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+        version = self.version()
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1], snapshot[0]
+        caught = self._catch_up(snapshot, version)
+        if caught is not None:
+            df, events = caught
+            df = self._remember(df, version)
+            for event in events:
+                self._emit(**event)
+            return df, version
+        df = self._load_shared(version)
+        if df is None:
+            df, version = self._parse()
+            df = self._publish(df, version)
+        with self._lock:
+            self._snapshot = (version, df)
+        return df, version
+
+    def read_columns(self, columns):
+        """Hanya kolom tertentu dari snapshot terbaru"""
+        df, _ = self.read()
+        return df[list(columns)]
+
+    def _remember(self, df, version):
+        """Simpan frame yang baru di-commit sebagai snapshot + max ID; frame yang disimpan"""
+        df = self._publish(df, version)
+        with self._lock:
+            self._snapshot = (version, df)
+            self._max_id = (version, _max_id(df))
+        return df
+
+    def _fold(self, expected_ledger=None, captured=None, movements=None):
+        """Hook on_commit: tandai ledger bahwa file baru memuat semua pergerakan.
+
+        Jika expected_ledger diberikan dan ledger sudah bertambah sejak data
+        dibaca, commit dibatalkan dengan ConflictError. movements() (jika
+        ada) mengembalikan pergerakan yang sudah termuat di file baru; semua
+        di-append tepat sebelum fold. Ukuran ledger setelah fold disimpan di
+        captured['ledger'].
+        """
+        def fold(tmp_path):
+            ledger_version = self.ledger.version()
+            if expected_ledger is not None and ledger_version != expected_ledger():
+                raise ConflictError(f"{self.ledger.path} berubah sejak dibaca")
+            if movements is not None and self.ledger.append_movements(movements()):
+                ledger_version = self.ledger.version()
+            if ledger_version:
+                self.ledger.append_fold(os.stat(tmp_path).st_ino)
+            if captured is not None:
+                captured['ledger'] = self.ledger.version()
+        return fold
+
+    def save(self, df):
+        """Ganti seluruh data; isi lama menjadi backup"""
+        df = self._normalize(coerce_numeric(df.reset_index(drop=True)))
+        captured = {}
+        base_version = self._write_frame(df, on_commit=self._fold(captured=captured))
+        version = self._combined(base_version, captured['ledger'])
+        self._remember(df, version)
+        self._emit('replace', version)
+        return version
+
+    def _locked_max_id(self, version):
+        """(max ID, snapshot) untuk versi ini; pemanggil memegang file_lock"""
+        with self._lock:
+            cached = self._max_id
+            snapshot = self._snapshot
+        if cached is not None and cached[0] == version:
+            return cached[1], snapshot
+        # File diubah di luar proses ini: parse ulang
+        snapshot_df, _ = self._parse(lock=False)
+        return _max_id(snapshot_df), (version, snapshot_df)
+
+    def insert(self, row):
+        """Append satu baris baru, ID dialokasikan dari max ID ter-cache"""
+        row = row_values(row, complete=True)
+        with file_lock(self.path):
+            version = self.version()
+            max_id, snapshot = self._locked_max_id(version)
+            new_id = max_id + 1
+            new_row = {"ID": new_id, **row}
+            new_version = self._combined(append_csv_row(self.path, new_row), version[-1])
+
+        # Perpanjang snapshot di memory alih-alih parse ulang file
+        if snapshot is not None and snapshot[0] == version:
+            df = pd.concat([snapshot[1], self._row_frame(new_row)], ignore_index=True)
+            self._remember(compact(df), new_version)
+        self._emit('insert', new_version, version, id=new_id, row=new_row)
+        return new_id
+
+    def record_movement(self, item_id, masuk=0, keluar=0, koreksi=0, lokasi=None, catatan=""):
+        """Catat pergerakan stok dengan satu append ke ledger.
+
+        Jumlah Masuk/Keluar dan Stok Akhir item ikut berubah tanpa menulis
+        ulang file CSV. Mengembalikan record pergerakan, atau None jika ID
+        tidak ditemukan.
+        """
+        for attempt in range(DEFAULT_RETRIES + 1):
+            with _attempt_lock(self.path, attempt, DEFAULT_RETRIES):
+                df, version = self.read()
+                positions = np.flatnonzero(df['ID'].to_numpy() == item_id)
+                if len(positions) == 0:
+                    return None
+                with file_lock(self.path):
+                    if self.version() == version:
+                        record = self.ledger.append_movement(item_id, masuk, keluar, koreksi, lokasi, catatan)
+                        new_version = self._combined(version[:-1], self.ledger.version())
+                        break
+            if attempt == DEFAULT_RETRIES:
+                raise ConflictError(f"{self.path} berubah sejak dibaca")
+            _backoff(attempt)
+
+        old_row = df.iloc[positions[0]].to_dict()
+        pending = {int(item_id): [masuk, keluar, masuk - keluar + koreksi]}
+        new_df = _apply_pending(df, pending)
+        values = {col: new_df[col].iat[positions[0]] for col in NUMERIC_COLUMNS}
+        self._remember(new_df, new_version)
+        self._emit('update', new_version, version, id=item_id, values=values, old_row=old_row, movement=record)
+        return record
+
+    def record_movements(self, movements):
+        """Catat banyak pergerakan dengan satu append ke ledger (satu commit).
+
+        movements berisi dict seperti Ledger.append_movements(). Jika ada ID
+        yang tidak ditemukan tidak ada yang dicatat. Mengembalikan
+        (records, missing) dengan missing berisi ID yang tidak ditemukan.
+        """
+        ids = [int(movement["id"]) for movement in movements]
+        for attempt in range(DEFAULT_RETRIES + 1):
+            with _attempt_lock(self.path, attempt, DEFAULT_RETRIES):
+                df, version = self.read()
+                locator = _first_locator(df)
+                missing = [item_id for item_id in dict.fromkeys(ids) if item_id not in locator.index]
+                if missing or not movements:
+                    return [], missing
+                with file_lock(self.path):
+                    if self.version() == version:
+                        records = self.ledger.append_movements(movements)
+                        new_version = self._combined(version[:-1], self.ledger.version())
+                        break
+            if attempt == DEFAULT_RETRIES:
+                raise ConflictError(f"{self.path} berubah sejak dibaca")
+            _backoff(attempt)
+
+        pending = {}
+        for record in records:
+            _add_movement(pending, record)
+        new_df = _apply_pending(df, pending)
+        updates = []
+        for item_id in pending:
+            position = locator[item_id]
+            updates.append({
+                "id": item_id,
+                "values": {col: new_df[col].iat[position] for col in NUMERIC_COLUMNS},
+                "old_row": df.iloc[position].to_dict(),
+            })
+        self._remember(new_df, new_version)
+        self._emit('update_many', new_version, version, updates=updates)
+        return records, []
+
+    def stock_changes_since(self, waktu):
+        """Total perubahan Stok Akhir per ID dari pergerakan setelah waktu"""
+        now = self.ledger.cumulative()
+        before = self.ledger.cumulative_at(waktu)
+        changes = {item_id: total - before.get(item_id, 0) for item_id, total in now.items()}
+        return {item_id: change for item_id, change in changes.items() if change}
+
+    def recent_movements(self, limit=50, item_id=None):
+        """Pergerakan terbaru (terbaru dulu)"""
+        return self.ledger.recent(limit, item_id)
+
+    def _transact(self, mutate, retries=DEFAULT_RETRIES, movements=None):
+        """Read-modify-write seperti transact(); (prev_version, version) atau None.
+
+        movements diteruskan ke _fold() untuk dicatat di commit yang sama.
+        """
+        for attempt in range(retries + 1):
+            with _attempt_lock(self.path, attempt, retries):
+                df, prev_version = self.read()
+                new_df = mutate(self._editable(df))
+                if new_df is None:
+                    return None
+                new_df = self._normalize(new_df)
+                captured = {}
+                fold = self._fold(lambda: prev_version[-1], captured=captured, movements=movements)
+                try:
+                    base_version = self._write_frame(new_df, expected_version=prev_version[:-1], on_commit=fold)
+                except ConflictError:
+                    if attempt == retries:
+                        raise
+                    base_version = None
+            if base_version is None:
+                _backoff(attempt)
+                continue
+            version = self._combined(base_version, captured['ledger'])
+            self._remember(new_df, version)
+            return prev_version, version
+
+    def update(self, item_id, values):
+        """Ubah baris pertama dengan ID tersebut; False jika tidak ditemukan"""
+        values = row_values(values)
+        captured = {}
+        def apply_update(df):
+            positions = np.flatnonzero((df['ID'] == item_id).to_numpy())
+            if len(positions) == 0:
+                return None
+            captured['old_row'] = df.iloc[positions[0]].to_dict()
+            for col, value in values.items():
+                set_values(df, positions[:1], col, [value])
+            return df
+
+        versions = self._transact(apply_update)
+        if versions is None:
+            return False
+        self._emit('update', versions[1], versions[0], id=item_id, values=values, old_row=captured['old_row'])
+        return True
+
+    def delete(self, item_id):
+        """Hapus semua baris dengan ID tersebut; False jika tidak ditemukan"""
+        captured = {}
+        def apply_delete(df):
+            mask = df['ID'] == item_id
+            if not mask.any():
+                return None
+            captured['old_rows'] = df[mask].to_dict('records')
+            return df[~mask].reset_index(drop=True)
+
+        versions = self._transact(apply_delete)
+        if versions is None:
+            return False
+        self._emit('delete', versions[1], versions[0], id=item_id, old_rows=captured['old_rows'])
+        return True
+
+    def update_many(self, changes, catatan=""):
+        """Ubah banyak item dalam satu tulis ulang file; jumlah ID yang ditemukan.
+
+        changes berisi {ID: {kolom: nilai}} untuk baris pertama setiap ID.
+        Perubahan Jumlah Masuk/Keluar/Stok Akhir dicatat sebagai pergerakan
+        (dengan catatan) di ledger pada commit yang sama.
+        """
+        changes = {item_id: row_values(values) for item_id, values in changes.items()}
+        captured = {}
+        def apply_updates(df):
+            captured['updates'], captured['movements'] = _apply_changes(df, changes, catatan)
+            return df if captured['updates'] else None
+
+        versions = self._transact(apply_updates, movements=lambda: captured['movements'])
+        if versions is None:
+            return 0
+        self._emit('update_many', versions[1], versions[0], updates=captured['updates'])
+        return len(captured['updates'])
+
+    def delete_many(self, ids):
+        """Hapus semua baris dengan ID di ids dalam satu tulis ulang file;
+        jumlah ID yang ditemukan"""
+        ids = [int(item_id) for item_id in ids]
+        captured = {}
+        def apply_delete(df):
+            mask = df['ID'].isin(ids).to_numpy()
+            if not mask.any():
+                return None
+            captured['old_rows'] = df[mask].to_dict('records')
+            return df[~mask].reset_index(drop=True)
+
+        versions = self._transact(apply_delete)
+        if versions is None:
+            return 0
+        found = list(dict.fromkeys(row['ID'] for row in captured['old_rows']))
+        self._emit('delete_many', versions[1], versions[0], ids=found, old_rows=captured['old_rows'])
+        return len(found)
+
+    def replace_id_ranges(self, ranges, rows):
+        """Ganti semua baris dengan ID di rentang [lo, hi) dengan rows (di akhir file)"""
+        def apply_replace(df):
+            inside = _in_ranges(df['ID'].to_numpy(), ranges)
+            merged = _concat_rows([df[~inside], rows.reindex(columns=df.columns)], df.columns)
+            return coerce_numeric(merged)
+
+        versions = self._transact(apply_replace)
+        self._emit('replace', versions[1])
+        return versions[1]
+
+    def import_chunks(self, chunks, mode):
+        """Tulis potongan hasil import; mengembalikan (inserted, updated).
+
+        mode 'replace' menulis ulang file per potongan, 'append' menambah
+        baris di akhir file dengan ID baru, 'upsert' mengubah baris dengan
+        ID yang sudah ada dan menambah sisanya dalam satu commit.
+        """
+        counts = {"inserted": 0, "updated": 0}
+
+        def counted(chunks):
+            for chunk in chunks:
+                counts["inserted"] += len(chunk)
+                yield chunk
+
+        captured = {}
+        if mode == 'replace':
+            base_version = self._write_chunks(counted(chunks), on_commit=self._fold(captured=captured))
+            version = self._combined(base_version, captured['ledger'])
+        elif mode == 'append':
+            with file_lock(self.path):
+                prev_version = self.version()
+                max_id, _ = self._locked_max_id(prev_version)
+
+                def with_new_ids(chunks):
+                    nonlocal max_id
+                    for chunk in chunks:
+                        chunk = chunk.assign(ID=range(max_id + 1, max_id + 1 + len(chunk)))
+                        max_id += len(chunk)
+                        yield chunk
+
+                version = self._combined(
+                    append_csv_chunks(self.path, with_new_ids(counted(chunks))), prev_version[-1]
+                )
+                with self._lock:
+                    self._max_id = (version, max_id)
+        elif mode == 'upsert':
+            df, prev_version = self.read()
+            locator = _first_locator(df)
+
+            update_parts, new_parts = [], []
+            for chunk in chunks:
+                chunk = chunk.drop_duplicates('ID', keep='last')
+                positions = locator.reindex(chunk['ID'].to_numpy()).to_numpy()
+                hit = ~pd.isna(positions)
+                if hit.any():
+                    update_parts.append(chunk[hit].assign(_position=positions[hit].astype(np.intp)))
+                if (~hit).any():
+                    new_parts.append(chunk[~hit])
+
+            if update_parts:
+                # Terapkan semua update sekaligus, satu pass per kolom
+                updates = pd.concat(update_parts, ignore_index=True).drop_duplicates('_position', keep='last')
+                counts["updated"] = len(updates)
+                rows = updates['_position'].to_numpy()
+                df = df.copy()
+                for col in COLUMNS:
+                    if col == 'ID' or col not in updates.columns:
+                        continue
+                    values = df[col].to_numpy(dtype=object, copy=True)
+                    values[rows] = updates[col].to_numpy(dtype=object)
+                    df[col] = pd.Series(values, index=df.index).infer_objects()
+            if new_parts:
+                new_rows = pd.concat(new_parts, ignore_index=True).drop_duplicates('ID', keep='last')
+                counts["inserted"] = len(new_rows)
+                df = pd.concat([df, new_rows], ignore_index=True)
+            df = self._normalize(coerce_numeric(df))
+            base_version = self._write_frame(
+                df, expected_version=prev_version[:-1],
+                on_commit=self._fold(lambda: prev_version[-1], captured=captured)
+            )
+            version = self._combined(base_version, captured['ledger'])
+            self._remember(df, version)
+        else:
+            raise ValueError(f"Mode import tidak dikenal: {mode}")
+
+        self._emit('replace', version)
+        return counts["inserted"], counts["updated"]
+
+def _concat_rows(frames, columns=COLUMNS):
+    """Gabung frame baris; frame kosong dilewati agar dtype kolom tidak ikut berubah"""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def _max_id(df):
+    if len(df) == 0:
+        return 0
+    return int(df['ID'].max())
+
+def _in_ranges(ids, ranges):
+    """Mask ids yang berada di salah satu rentang [lo, hi), satu pencarian biner per ID"""
+    bounds = np.array(sorted(ranges), dtype=np.int64).reshape(-1, 2)
+    if len(bounds) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    # Batas atas terjauh dari semua rentang yang dimulai sebelum ID (rentang boleh tumpang tindih)
+    highs = np.maximum.accumulate(bounds[:, 1])
+    slots = np.searchsorted(bounds[:, 0], ids, side='right') - 1
+    return (slots >= 0) & (ids < highs[np.maximum(slots, 0)])
+
+def _first_locator(df):
+    """Series ID -> posisi baris pertama dengan ID itu (sama seperti update())"""
+    first = ~df['ID'].duplicated(keep='first')
+    return pd.Series(np.flatnonzero(first.to_numpy()), index=df['ID'][first].to_numpy())
+
+def _apply_changes(df, changes, catatan=""):
+    """Terapkan {ID: {kolom: nilai}} ke baris pertama setiap ID (df diubah).
+
+    Mengembalikan (updates, movements): updates berisi dict id/values/
+    old_row untuk setiap ID yang ditemukan, movements berisi pergerakan
+    dari selisih kolom jumlah.
+    """
+    ids = list(changes)
+    positions = _first_locator(df).reindex(ids).to_numpy()
+    found = [(item_id, int(position)) for item_id, position in zip(ids, positions) if not pd.isna(position)]
+    if not found:
+        return [], []
+    rows = [position for _, position in found]
+    old = df.take(rows)
+    updates = [
+        {"id": item_id, "values": changes[item_id], "old_row": old_row}
+        for (item_id, _), old_row in zip(found, old.to_dict('records'))
+    ]
+
+    # Satu pass per kolom yang berubah
+    for col in dict.fromkeys(col for _, values in changes.items() for col in values):
+        hits = [(position, changes[item_id][col]) for item_id, position in found if col in changes[item_id]]
+        set_values(df, [position for position, _ in hits], col, [value for _, value in hits])
+
+    before = old[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    after = df[NUMERIC_COLUMNS].take(rows).to_numpy(dtype=np.float64)
+    deltas = after - before
+    movements = [
+        {
+            "id": item_id, "masuk": _quantity(masuk), "keluar": _quantity(keluar),
+            "koreksi": _quantity(stok - masuk + keluar), "catatan": catatan,
+        }
+        for (item_id, _), (masuk, keluar, stok) in zip(found, deltas)
+        if masuk or keluar or stok
+    ]
+    return updates, movements
+
+def _quantity(value):
+    """Jumlah sebagai int, atau float jika pecahan"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def _add_movement(pending, movement):
+    """Tambahkan satu pergerakan ke saldo ID -> [masuk, keluar, stok]"""
+    entry = pending.setdefault(int(movement["id"]), [0, 0, 0])
+    entry[0] += movement["masuk"]
+    entry[1] += movement["keluar"]
+    entry[2] += movement["masuk"] - movement["keluar"] + movement["koreksi"]
+
+def _apply_pending(df, pending):
+    """Frame baru dengan saldo ledger (ID -> [masuk, keluar, stok]) ditambahkan
+    ke baris pertama setiap ID; df tidak diubah"""
+    if not pending or len(df) == 0:
+        return df
+    positions = _first_locator(df).reindex(list(pending)).to_numpy()
+    hit = ~pd.isna(positions)
+    if not hit.any():
+        return df
+    rows = positions[hit].astype(np.intp)
+    deltas = np.array(list(pending.values()))[hit]
+    df = df.copy(deep=False)
+    for slot, col in enumerate(NUMERIC_COLUMNS):
+        values = df[col].to_numpy(copy=True)
+        values[rows] = values[rows] + deltas[:, slot]
+        try:
+            df[col] = pd.array(values, dtype=df[col].dtype)
+        except (TypeError, ValueError):
+            # Saldo pecahan tidak muat di Int64
+            df[col] = pd.array(values.astype(np.float64), dtype='Float64')
+    return df
+
+def _patch(df, record, row_frame):
+    """Terapkan satu record change feed ke frame ringkas; df tidak diubah.
+
+    row_frame(row) mengubah baris insert menjadi frame (lihat _row_frame()).
+
+    Mengembalikan (df baru, event lokal dengan baris lama), atau None jika
+    record tidak bisa diterapkan (mis. 'replace' atau ID tidak ditemukan).
+    """
+    op = record['op']
+    event = {"op": op, "version": record['version'], "prev_version": record['prev_version'], "replayed": True}
+    if op == 'insert':
+        df = compact(pd.concat([df, row_frame(record['row'])], ignore_index=True))
+        event.update(id=record['id'], row=record['row'])
+    elif op in ('update', 'update_many'):
+        updates = record['updates'] if op == 'update_many' else [record]
+        changes = {int(update['id']): update['values'] for update in updates}
+        df = df.copy()
+        applied, _ = _apply_changes(df, changes)
+        if len(applied) != len(changes):
+            return None
+        if op == 'update':
+            event.update(id=applied[0]['id'], values=applied[0]['values'], old_row=applied[0]['old_row'])
+        else:
+            event.update(updates=applied)
+    elif op in ('delete', 'delete_many'):
+        ids = record['ids'] if op == 'delete_many' else [record['id']]
+        mask = df['ID'].isin(ids).to_numpy()
+        if not mask.any():
+            return None
+        if op == 'delete':
+            event.update(id=record['id'])
+        else:
+            event.update(ids=ids)
+        event.update(old_rows=df[mask].to_dict('records'))
+        df = df[~mask].reset_index(drop=True)
+    else:
+        return None
+    return df, event
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+class SqliteBackend(Backend):
+    """Inventory di tabel SQLite (WAL) dengan index pada ID, nama dan lokasi.
+
+    Insert, update dan delete adalah statement satu baris. Versi data
+    disimpan di tabel meta dan dinaikkan di transaksi yang sama dengan
+    setiap perubahan, sehingga cache bisa dicek dengan satu query murah.
+    """
+
+    kind = 'sqlite'
+
+    def __init__(self, path, backup_path=None):
+        super().__init__()
+        self.path = path
+        self.backup_path = backup_path
+        self._lock = threading.Lock()
+        self._snapshot = None  # (version, df)
+        self._init_schema()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS inventory (
+                        "ID" INTEGER NOT NULL,
+                        "Tanggal" TEXT,
+                        "Nama Komponen" TEXT,
+                        "Deskripsi" TEXT,
+                        "Jumlah Masuk" INTEGER NOT NULL DEFAULT 0,
+                        "Jumlah Keluar" INTEGER NOT NULL DEFAULT 0,
+                        "Stok Akhir" INTEGER NOT NULL DEFAULT 0,
+                        "Lokasi Penyimpanan" TEXT,
+                        "Keterangan" TEXT
+                    )
+                """)
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_inventory_id ON inventory ("ID")')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_inventory_nama ON inventory ("Nama Komponen")')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_inventory_lokasi ON inventory ("Lokasi Penyimpanan")')
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS movements (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        waktu TEXT NOT NULL,
+                        id INTEGER NOT NULL,
+                        masuk INTEGER NOT NULL DEFAULT 0,
+                        keluar INTEGER NOT NULL DEFAULT 0,
+                        koreksi INTEGER NOT NULL DEFAULT 0,
+                        lokasi TEXT,
+                        catatan TEXT
+                    )
+                """)
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_movements_waktu ON movements (waktu)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_movements_id ON movements (id)')
+                conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+                conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        finally:
+            conn.close()
+
+    def exists(self):
+        return True
+
+    def create(self, df):
+        return False
+
+    def is_empty(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT NOT EXISTS (SELECT 1 FROM inventory)').fetchone()[0] == 1
+        finally:
+            conn.close()
+
+    def _version(self, conn):
+        return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def _bump(self, conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self._version(conn)
+
+    def version(self):
+        conn = self._connect()
+        try:
+            return self._version(conn)
+        finally:
+            conn.close()
+
+    def _shared_key(self):
+        # Nomor versi dimulai ulang jika database dibuat ulang: sertakan inode
+        return f"{os.path.abspath(self.path)}:{os.stat(self.path).st_ino}"
+
+    def read(self):
+        """Snapshot (df, version) terbaru, query ulang hanya jika versi berubah
+        dan perubahannya tidak bisa diterapkan dari change feed"""
+        with self._lock:
+            snapshot = self._snapshot
+        conn = self._connect()
+        try:
+            # Versi dan isi tabel dibaca dalam satu read transaction
+            conn.execute('BEGIN')
+            version = self._version(conn)
+            if snapshot is not None and snapshot[0] == version:
+                return snapshot[1], version
+            caught = self._catch_up(snapshot, version)
+            if caught is not None:
+                df, events = caught
+                df = self._publish(df, version)
+            else:
+                events = []
+                df = self._load_shared(version)
+            if df is None:
+                columns = ', '.join(_quote(col) for col in COLUMNS)
+                with metrics.timed("sqlite.query") as timer:
+                    df = pd.read_sql_query(f'SELECT {columns} FROM inventory ORDER BY rowid', conn)
+                    timer.rows = len(df)
+                df = self._publish(compact(df), version)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        with self._lock:
+            self._snapshot = (version, df)
+        for event in events:
+            self._emit(**event)
+        return df, version
+
+    def read_columns(self, columns):
+        """Hanya kolom tertentu; query per kolom jika snapshot belum ada"""
+        with self._lock:
+            snapshot = self._snapshot
+        conn = self._connect()
+        try:
+            if snapshot is not None and snapshot[0] == self._version(conn):
+                return snapshot[1][list(columns)]
+            names = ', '.join(_quote(col) for col in columns)
+            df = pd.read_sql_query(f'SELECT {names} FROM inventory ORDER BY rowid', conn)
+        finally:
+            conn.close()
+        return compact(df)
+
+    def _rows(self, df):
+        return plain_rows(df.reindex(columns=COLUMNS))
+
+    def save(self, df):
+        """Ganti seluruh data dalam satu transaksi; isi lama menjadi backup CSV"""
+        if self.backup_path:
+            current, _ = self.read()
+            write_csv(self.backup_path, current)
+
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM inventory')
+                conn.executemany(
+                    f'INSERT INTO inventory ({columns}) VALUES ({placeholders})',
+                    self._rows(df)
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('replace', version)
+        return version
+
+    def insert(self, row):
+        """Insert satu baris; ID = max ID + 1 lewat index"""
+        row = row_values(row, complete=True)
+        columns = [col for col in COLUMNS if col != 'ID' and col in row]
+        names = ', '.join(_quote(col) for col in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        conn = self._connect()
+        try:
+            with conn:
+                # BEGIN IMMEDIATE supaya dua writer tidak mendapat ID yang sama
+                conn.execute('BEGIN IMMEDIATE')
+                new_id = conn.execute('SELECT COALESCE(MAX("ID"), 0) + 1 FROM inventory').fetchone()[0]
+                conn.execute(
+                    f'INSERT INTO inventory ("ID", {names}) VALUES (?, {placeholders})',
+                    [new_id] + [row[col] for col in columns]
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('insert', version, version - 1, id=new_id, row={"ID": new_id, **row})
+        return new_id
+
+    def update(self, item_id, values):
+        """Ubah baris pertama dengan ID tersebut; False jika tidak ditemukan"""
+        values = row_values(values)
+        assignments = ', '.join(f'{_quote(col)} = ?' for col in values)
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                found = conn.execute(
+                    f'SELECT rowid, {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid LIMIT 1',
+                    (int(item_id),)
+                ).fetchone()
+                if found is None:
+                    return False
+                old_row = dict(zip(COLUMNS, found[1:]))
+                conn.execute(
+                    f'UPDATE inventory SET {assignments} WHERE rowid = ?',
+                    list(values.values()) + [found[0]]
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('update', version, version - 1, id=item_id, values=values, old_row=old_row)
+        return True
+
+    def delete(self, item_id):
+        """Hapus semua baris dengan ID tersebut; False jika tidak ditemukan"""
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                old_rows = [
+                    dict(zip(COLUMNS, found)) for found in conn.execute(
+                        f'SELECT {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid', (int(item_id),)
+                    )
+                ]
+                if not old_rows:
+                    return False
+                conn.execute('DELETE FROM inventory WHERE "ID" = ?', (int(item_id),))
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('delete', version, version - 1, id=item_id, old_rows=old_rows)
+        return True
+
+    def update_many(self, changes, catatan=""):
+        """Ubah banyak item dalam satu transaksi; jumlah ID yang ditemukan.
+
+        Perubahan Jumlah Masuk/Keluar/Stok Akhir dicatat sebagai pergerakan
+        (dengan catatan) di transaksi yang sama.
+        """
+        changes = {item_id: row_values(values) for item_id, values in changes.items()}
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        updates, movements = [], []
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                for item_id, values in changes.items():
+                    found = conn.execute(
+                        f'SELECT rowid, {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid LIMIT 1',
+                        (int(item_id),)
+                    ).fetchone()
+                    if found is None:
+                        continue
+                    old_row = dict(zip(COLUMNS, found[1:]))
+                    if values:
+                        assignments = ', '.join(f'{_quote(col)} = ?' for col in values)
+                        conn.execute(
+                            f'UPDATE inventory SET {assignments} WHERE rowid = ?',
+                            list(values.values()) + [found[0]]
+                        )
+                    updates.append({"id": item_id, "values": values, "old_row": old_row})
+                    masuk, keluar, stok = (
+                        float(values.get(col, old_row[col]) or 0) - float(old_row[col] or 0) for col in NUMERIC_COLUMNS
+                    )
+                    if masuk or keluar or stok:
+                        movements.append((
+                            waktu, int(item_id), _quantity(masuk), _quantity(keluar),
+                            _quantity(stok - masuk + keluar), None, catatan
+                        ))
+                if not updates:
+                    return 0
+                conn.executemany(
+                    'INSERT INTO movements (waktu, id, masuk, keluar, koreksi, lokasi, catatan) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    movements
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('update_many', version, version - 1, updates=updates)
+        return len(updates)
+
+    def delete_many(self, ids):
+        """Hapus semua baris dengan ID di ids dalam satu transaksi; jumlah ID yang ditemukan"""
+        ids = [(int(item_id),) for item_id in dict.fromkeys(ids)]
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                old_rows = [
+                    dict(zip(COLUMNS, found))
+                    for item_id in ids
+                    for found in conn.execute(
+                        f'SELECT {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid', item_id
+                    )
+                ]
+                if not old_rows:
+                    return 0
+                conn.executemany('DELETE FROM inventory WHERE "ID" = ?', ids)
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        found = list(dict.fromkeys(row['ID'] for row in old_rows))
+        self._emit('delete_many', version, version - 1, ids=found, old_rows=old_rows)
+        return len(found)
+
+    def record_movement(self, item_id, masuk=0, keluar=0, koreksi=0, lokasi=None, catatan=""):
+        """Catat pergerakan stok: satu INSERT ke movements dan satu UPDATE baris.
+
+        Mengembalikan record pergerakan, atau None jika ID tidak ditemukan.
+        """
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                found = conn.execute(
+                    f'SELECT rowid, {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid LIMIT 1',
+                    (int(item_id),)
+                ).fetchone()
+                if found is None:
+                    return None
+                old_row = dict(zip(COLUMNS, found[1:]))
+                seq = conn.execute(
+                    'INSERT INTO movements (waktu, id, masuk, keluar, koreksi, lokasi, catatan) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (waktu, int(item_id), masuk, keluar, koreksi, lokasi, catatan)
+                ).lastrowid
+                values = {
+                    "Jumlah Masuk": old_row["Jumlah Masuk"] + masuk,
+                    "Jumlah Keluar": old_row["Jumlah Keluar"] + keluar,
+                    "Stok Akhir": old_row["Stok Akhir"] + masuk - keluar + koreksi,
+                }
+                conn.execute(
+                    'UPDATE inventory SET "Jumlah Masuk" = ?, "Jumlah Keluar" = ?, "Stok Akhir" = ? WHERE rowid = ?',
+                    list(values.values()) + [found[0]]
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        record = {
+            "seq": seq, "waktu": waktu, "id": int(item_id), "masuk": masuk, "keluar": keluar,
+            "koreksi": koreksi, "lokasi": lokasi, "catatan": catatan,
+        }
+        self._emit('update', version, version - 1, id=item_id, values=values, old_row=old_row, movement=record)
+        return record
+
+    def record_movements(self, movements):
+        """Catat banyak pergerakan dalam satu transaksi; (records, missing).
+
+        Jika ada ID yang tidak ditemukan tidak ada yang dicatat (lihat
+        CsvBackend.record_movements()).
+        """
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ids = list(dict.fromkeys(int(movement["id"]) for movement in movements))
+        records, found, pending = [], {}, {}
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                for item_id in ids:
+                    row = conn.execute(
+                        f'SELECT rowid, {columns} FROM inventory WHERE "ID" = ? ORDER BY rowid LIMIT 1',
+                        (item_id,)
+                    ).fetchone()
+                    if row is not None:
+                        found[item_id] = row
+                missing = [item_id for item_id in ids if item_id not in found]
+                if missing or not movements:
+                    return [], missing
+                for movement in movements:
+                    record = {
+                        "waktu": waktu, "id": int(movement["id"]), "masuk": movement.get("masuk", 0),
+                        "keluar": movement.get("keluar", 0), "koreksi": movement.get("koreksi", 0),
+                        "lokasi": movement.get("lokasi"), "catatan": movement.get("catatan", ""),
+                    }
+                    record["seq"] = conn.execute(
+                        'INSERT INTO movements (waktu, id, masuk, keluar, koreksi, lokasi, catatan) '
+                        'VALUES (:waktu, :id, :masuk, :keluar, :koreksi, :lokasi, :catatan)',
+                        record
+                    ).lastrowid
+                    records.append(record)
+                    _add_movement(pending, record)
+                updates = []
+                for item_id, (masuk, keluar, stok) in pending.items():
+                    old_row = dict(zip(COLUMNS, found[item_id][1:]))
+                    values = {
+                        "Jumlah Masuk": old_row["Jumlah Masuk"] + masuk,
+                        "Jumlah Keluar": old_row["Jumlah Keluar"] + keluar,
+                        "Stok Akhir": old_row["Stok Akhir"] + stok,
+                    }
+                    conn.execute(
+                        'UPDATE inventory SET "Jumlah Masuk" = ?, "Jumlah Keluar" = ?, "Stok Akhir" = ? WHERE rowid = ?',
+                        list(values.values()) + [found[item_id][0]]
+                    )
+                    updates.append({"id": item_id, "values": values, "old_row": old_row})
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('update_many', version, version - 1, updates=updates)
+        return records, []
+
+    def stock_changes_since(self, waktu):
+        """Total perubahan Stok Akhir per ID dari pergerakan setelah waktu"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT id, SUM(masuk - keluar + koreksi) FROM movements WHERE waktu > ? GROUP BY id',
+                (waktu,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {item_id: change for item_id, change in rows if change}
+
+    def recent_movements(self, limit=50, item_id=None):
+        """Pergerakan terbaru (terbaru dulu)"""
+        query = 'SELECT seq, waktu, id, masuk, keluar, koreksi, lokasi, catatan FROM movements'
+        params = []
+        if item_id is not None:
+            query += ' WHERE id = ?'
+            params.append(int(item_id))
+        query += ' ORDER BY seq DESC LIMIT ?'
+        params.append(limit)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(query, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def replace_id_ranges(self, ranges, rows):
+        """Ganti semua baris dengan ID di rentang [lo, hi) dengan rows, satu transaksi"""
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                # Lewat index ID: hanya baris di rentang yang disentuh
+                conn.executemany('DELETE FROM inventory WHERE "ID" >= ? AND "ID" < ?', ranges)
+                conn.executemany(
+                    f'INSERT INTO inventory ({columns}) VALUES ({placeholders})',
+                    self._rows(rows)
+                )
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('replace', version)
+        return version
+
+    def import_chunks(self, chunks, mode):
+        """Tulis potongan hasil import dalam satu transaksi; (inserted, updated)"""
+        if mode == 'replace' and self.backup_path:
+            current, _ = self.read()
+            write_csv(self.backup_path, current)
+
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        others = [col for col in COLUMNS if col != 'ID']
+        inserted = updated = 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                if mode == 'replace':
+                    conn.execute('DELETE FROM inventory')
+                elif mode not in ('append', 'upsert'):
+                    raise ValueError(f"Mode import tidak dikenal: {mode}")
+                max_id = conn.execute('SELECT COALESCE(MAX("ID"), 0) FROM inventory').fetchone()[0]
+
+                for chunk in chunks:
+                    if mode == 'append':
+                        chunk = chunk.assign(ID=range(max_id + 1, max_id + 1 + len(chunk)))
+                        max_id += len(chunk)
+                    elif mode == 'upsert':
+                        chunk = chunk.drop_duplicates('ID', keep='last')
+                    rows = self._rows(chunk)
+
+                    if mode != 'upsert':
+                        conn.executemany(f'INSERT INTO inventory ({columns}) VALUES ({placeholders})', rows)
+                        inserted += len(rows)
+                        continue
+
+                    # Upsert: update baris pertama per ID, lalu insert ID yang belum ada
+                    assignments = ', '.join(f'{_quote(col)} = ?' for col in others)
+                    cursor = conn.executemany(
+                        f'UPDATE inventory SET {assignments} WHERE rowid = '
+                        '(SELECT rowid FROM inventory WHERE "ID" = ? ORDER BY rowid LIMIT 1)',
+                        [row[1:] + row[:1] for row in rows]
+                    )
+                    updated += cursor.rowcount
+                    cursor = conn.executemany(
+                        f'INSERT INTO inventory ({columns}) SELECT {placeholders} '
+                        'WHERE NOT EXISTS (SELECT 1 FROM inventory WHERE "ID" = ?)',
+                        [row + row[:1] for row in rows]
+                    )
+                    inserted += cursor.rowcount
+                version = self._bump(conn)
+        finally:
+            conn.close()
+        self._emit('replace', version)
+        return inserted, updated
+
+    def migrate_csv(self, csv_path):
+        """Migrasi satu kali: isi tabel dari CSV lama jika tabel masih kosong"""
+        if not os.path.exists(csv_path) or not self.is_empty():
+            return False
+        df, _ = read_csv(csv_path)
+        conn = self._connect()
+        try:
+            columns = ', '.join(_quote(col) for col in COLUMNS)
+            placeholders = ', '.join('?' for _ in COLUMNS)
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                # Cek ulang di dalam lock, mungkin proses lain sudah migrasi
+                if conn.execute('SELECT EXISTS (SELECT 1 FROM inventory)').fetchone()[0]:
+                    return False
+                conn.executemany(
+                    f'INSERT INTO inventory ({columns}) VALUES ({placeholders})',
+                    self._rows(coerce_numeric(df))
+                )
+                self._bump(conn)
+        finally:
+            conn.close()
+        return True
+
+# ================================
+# FORMAT KOLOM (ARROW IPC)
+# ================================
+
+def _pyarrow():
+    """Import pyarrow saat dibutuhkan (terpasang bersama streamlit)"""
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401 - mendaftarkan pa.ipc
+    return pa
+
+def arrow_schema():
+    """Skema tetap file Arrow: jumlah integer, lokasi kategori, tanggal datetime"""
+    pa = _pyarrow()
+    fields = []
+    for col in COLUMNS:
+        if col == "ID" or col in NUMERIC_COLUMNS:
+            fields.append((col, pa.int64()))
+        elif col == "Tanggal":
+            fields.append((col, pa.timestamp('s')))
+        elif col == "Lokasi Penyimpanan":
+            fields.append((col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append((col, pa.string()))
+    return pa.schema(fields)
+
+def to_arrow_table(df):
+    """DataFrame (kolom teks/angka bebas) menjadi Table dengan arrow_schema().
+
+    Nilai yang tidak muat di skema (angka pecahan atau bukan angka, tanggal
+    yang tidak bisa dibaca) menimbulkan ValueError, tidak diubah diam-diam.
+    """
+    pa = _pyarrow()
+    schema = arrow_schema()
+    arrays = []
+    for field in schema:
+        col = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_integer(field.type):
+            numbers = pd.to_numeric(col, errors='coerce')
+            invalid = _lost(col, numbers) | (numbers.notna() & (numbers % 1 != 0)).to_numpy()
+            if invalid.any():
+                raise _invalid(field.name, col, invalid)
+            values = numbers.fillna(0).astype('int64')
+            arrays.append(pa.array(values.to_numpy(), type=field.type))
+        elif pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(col, errors='coerce', format='mixed')
+            invalid = _lost(col, values)
+            if invalid.any():
+                raise _invalid(field.name, col, invalid)
+            values = values.dt.floor('s')
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        else:
+            values = pa.array(col.astype(object).where(col.notna(), None).map(
+                lambda value: value if value is None else str(value)
+            ), type=pa.string(), from_pandas=True)
+            if pa.types.is_dictionary(field.type):
+                values = values.dictionary_encode()
+            arrays.append(values)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def from_arrow_table(table):
+    """Table menjadi DataFrame ringkas (lihat compact()); ID, Tanggal dan
+    Lokasi Penyimpanan tanpa konversi ulang"""
+    return compact(table.to_pandas(split_blocks=True))
+
+def _write_temp_arrow(path, table):
+    """Tulis Table ke file Arrow IPC sementara (tanpa kompresi, bisa di-mmap)"""
+    pa = _pyarrow()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp'
+    )
+    os.close(fd)
+    try:
+        with metrics.timed("arrow.write", rows=table.num_rows) as timer:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table.combine_chunks())
+            with open(tmp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+                timer.bytes = os.fstat(f.fileno()).st_size
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+def write_arrow(path, df, expected_version=ANY_VERSION, on_commit=None):
+    """Commit df ke file Arrow secara atomik; aturan sama dengan write_csv()"""
+    tmp_path = _write_temp_arrow(path, to_arrow_table(df))
+    return _commit_file(path, tmp_path, expected_version, on_commit=on_commit)
+
+def read_arrow(path, columns=None):
+    """Table dari file Arrow lewat memory map (zero-copy), opsional per kolom"""
+    pa = _pyarrow()
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.select(list(columns)) if columns is not None else table
+
+class ArrowBackend(CsvBackend):
+    """Inventory di file Arrow IPC dengan skema tetap, dibaca lewat memory map.
+
+    Sama seperti CsvBackend (ledger pergerakan, fold, optimistic commit),
+    tetapi file disimpan kolom per kolom: membaca tidak perlu parse teks
+    maupun konversi angka, kolom numerik dipakai langsung dari page cache,
+    dan read_columns() hanya menyentuh kolom yang diminta. Insert menulis
+    ulang file (format Arrow tidak bisa di-append).
+    """
+
+    kind = 'arrow'
+
+    def _load_raw(self):
+        # Mapping tetap valid setelah file diganti (rename membuat inode baru)
+        return read_arrow(self.path), file_version(self.path)
+
+    def _decode(self, raw):
+        return from_arrow_table(raw)
+
+    def _normalize(self, df):
+        return from_arrow_table(to_arrow_table(df))
+
+    def _row_frame(self, row):
+        return self._normalize(pd.DataFrame([row]))
+
+    def _write_frame(self, df, expected_version=ANY_VERSION, on_commit=None):
+        return write_arrow(self.path, df, expected_version=expected_version, on_commit=on_commit)
+
+    def _write_chunks(self, chunks, on_commit=None):
+        return self._write_frame(_concat_rows(chunks), on_commit=on_commit)
+
+    def read_columns(self, columns):
+        """Hanya kolom tertentu; tanpa snapshot penuh jika belum ada di memory"""
+        with self._lock:
+            snapshot = self._snapshot
+        version = self.version()
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1][list(columns)]
+        if self.ledger.version() and any(col in NUMERIC_COLUMNS for col in columns):
+            # Jumlah perlu saldo ledger: pakai snapshot lengkap
+            return super().read_columns(columns)
+        with file_lock(self.path, shared=True):
+            table = read_arrow(self.path, columns)
+        return from_arrow_table(table)
+
+    def insert(self, row):
+        """Tambah satu baris (tulis ulang file); ID = max ID + 1"""
+        row = row_values(row, complete=True)
+        captured = {}
+        def apply_insert(df):
+            captured['id'] = _max_id(df) + 1
+            captured['row'] = {"ID": captured['id'], **row}
+            return pd.concat([df, pd.DataFrame([captured['row']])], ignore_index=True)
+
+        prev_version, version = self._transact(apply_insert)
+        self._emit('insert', version, prev_version, id=captured['id'], row=captured['row'])
+        return captured['id']
+
+    def import_chunks(self, chunks, mode):
+        """Seperti CsvBackend.import_chunks(); append juga menulis ulang file"""
+        if mode != 'append':
+            return super().import_chunks(chunks, mode)
+        frames = list(chunks)
+        inserted = sum(len(frame) for frame in frames)
+        def apply_append(df):
+            max_id = _max_id(df)
+            new_rows = _concat_rows(frames)
+            new_rows = new_rows.assign(ID=range(max_id + 1, max_id + 1 + len(new_rows)))
+            return _concat_rows([df, new_rows], df.columns)
+
+        _, version = self._transact(apply_append)
+        self._emit('replace', version)
+        return inserted, 0
+
+    def migrate_csv(self, csv_path):
+        """Migrasi satu kali: buat file Arrow dari CSV lama jika belum ada"""
+        if self.exists() or not os.path.exists(csv_path):
+            return False
+        df, _ = read_csv(csv_path)
+        return self.create(coerce_numeric(df))
+
+# ================================
+# SNAPSHOT BERSAMA (ANTAR PROSES)
+# ================================
+
+class SharedSnapshots:
+    """Snapshot per versi data di file Arrow IPC, dipetakan oleh semua proses.
+
+    Proses yang pertama memegang frame versi baru (writer setelah commit,
+    atau pembaca pertama setelah perubahan dari luar) menulisnya sekali ke
+    `<directory>/<sumber>-<versi>.arrow`. Proses lain yang melihat versi
+    itu cukup memeriksa keberadaan file (satu stat) lalu memetakannya:
+    kolom teks dipakai langsung dari page cache tanpa parse maupun
+    salinan, jadi N worker berbagi satu salinan data. File hanya cache;
+    jika hilang atau rusak, pembaca kembali parse sumber data.
+    """
+
+    def __init__(self, directory, keep=SHARED_KEEP):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, key, version):
+        prefix = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        digest = hashlib.sha1(repr(version).encode('utf-8')).hexdigest()[:16]
+        return prefix, os.path.join(self.directory, f"{prefix}-{digest}.arrow")
+
+    def load(self, key, version):
+        """Frame ringkas versi ini (memory-mapped), atau None jika belum dipublikasikan"""
+        _, path = self._path(key, version)
+        if not os.path.exists(path):
+            return None
+        pa = _pyarrow()
+        try:
+            with metrics.timed("shared.load") as timer:
+                table = read_arrow(path)
+                df = compact(table.to_pandas(split_blocks=True))
+                timer.rows = len(df)
+                timer.bytes = table.nbytes
+        except (OSError, pa.ArrowException):
+            # Dihapus oleh retention atau tidak utuh: anggap belum ada
+            return None
+        return df
+
+    def publish(self, key, version, df):
+        """Tulis df sebagai snapshot versi ini (jika belum ada); salinan ter-map-nya"""
+        prefix, path = self._path(key, version)
+        if not os.path.exists(path):
+            pa = _pyarrow()
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{prefix}-", suffix='.tmp')
+            os.close(fd)
+            try:
+                with metrics.timed("shared.publish", rows=len(df)) as timer:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    with pa.OSFile(tmp_path, 'wb') as sink:
+                        with pa.ipc.new_file(sink, table.schema) as writer:
+                            writer.write_table(table)
+                    timer.bytes = os.path.getsize(tmp_path)
+                # Tanpa fsync: file ini cache, bukan sumber data
+                os.replace(tmp_path, path)
+            except (OSError, pa.ArrowException):
+                # Cache tidak tersedia (disk penuh, tipe tak dikenal): pakai df biasa
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                return df
+            self._prune(prefix)
+        shared = self.load(key, version)
+        return shared if shared is not None else df
+
+    def _prune(self, prefix):
+        """Hapus snapshot lama sumber ini di luar keep (yang terbaru dipertahankan)"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(f"{prefix}-") and entry.name.endswith('.arrow'):
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+                except OSError:
+                    continue
+        for _, path in sorted(entries, reverse=True)[self.keep:]:
+            try:
+                # Proses yang masih memetakan file lama tetap bisa membacanya (POSIX)
+                os.unlink(path)
+            except OSError:
+                pass
+
+def open_backend(kind, data_file, backup_file=None, sqlite_file=None, arrow_file=None):
+    """Buat backend sesuai konfigurasi ('csv', 'sqlite' atau 'arrow').
+
+    Untuk 'sqlite' dan 'arrow', data_file (CSV lama) dimigrasikan otomatis
+    saat database/file Arrow masih kosong.
+    """
+    if kind == 'csv':
+        return CsvBackend(data_file, backup_path=backup_file)
+    if kind == 'sqlite':
+        backend = SqliteBackend(sqlite_file, backup_path=backup_file)
+        backend.migrate_csv(data_file)
+        return backend
+    if kind == 'arrow':
+        backend = ArrowBackend(arrow_file)
+        backend.migrate_csv(data_file)
+        return backend
+    raise ValueError(f"Storage backend tidak dikenal: {kind}")
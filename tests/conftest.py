@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Modul aplikasi ada di root repo (tanpa package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+
+def make_rows(n, start=1):
+    """n baris inventory dengan ID berurutan mulai dari start"""
+    return pd.DataFrame({
+        "ID": range(start, start + n),
+        "Tanggal": "2026-10-18 09:00:00",
+        "Nama Komponen": [f"Part {i}" for i in range(start, start + n)],
+        "Deskripsi": "",
+        "Jumlah Masuk": 10,
+        "Jumlah Keluar": 0,
+        "Stok Akhir": 10,
+        "Lokasi Penyimpanan": "Rak 1",
+        "Keterangan": "",
+    }, columns=storage.COLUMNS)
+
+
+@pytest.fixture
+def csv_backend(tmp_path):
+    """CsvBackend dengan 3 item"""
+    backend = storage.CsvBackend(str(tmp_path / "data.csv"))
+    backend.create(make_rows(3))
+    return backend
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    """Inventory (backend CSV) dengan 3 item"""
+    from inventory import Inventory
+    inv = Inventory(str(tmp_path / "data.csv"), backup_dir=str(tmp_path / "backups"))
+    inv.backend.create(make_rows(3))
+    return inv
@@ -0,0 +1,84 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+import api
+from conftest import make_rows
+from inventory import Inventory
+
+
+@pytest.fixture(params=["csv", "sqlite", "arrow"])
+def server(request, tmp_path):
+    inv = Inventory(
+        str(tmp_path / "data.csv"), backup_dir=str(tmp_path / "backups"),
+        storage_backend=request.param, sqlite_file=str(tmp_path / "inventory.db"),
+        arrow_file=str(tmp_path / "inventory.arrow")
+    )
+    # SQLite/Arrow: file dibuat saat dibuka, isi diganti lewat save()
+    inv.backend.save(make_rows(3))
+    server = api.ApiServer(inv, "rahasia")
+    yield server
+    server.executor.shutdown()
+
+
+def post_movements(server, body):
+    return asyncio.run(server.record_movements({"json": lambda: body}))
+
+
+def stock(server):
+    df, _ = server.inventory.snapshot()
+    return dict(zip(df['ID'].tolist(), df['Stok Akhir'].tolist()))
+
+
+@pytest.mark.parametrize("movements", [5, "abc", {"id": 1}, []])
+def test_movements_must_be_a_list(server, movements):
+    with pytest.raises(api.HTTPError) as error:
+        post_movements(server, {"movements": movements})
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_movements_are_one_commit(server):
+    seq = server.inventory.change_seq()
+    status, body = post_movements(server, {"movements": [
+        {"id": 1, "masuk": 5}, {"id": 2, "keluar": 3}, {"id": 1, "koreksi": -1},
+    ]})
+    assert status == HTTPStatus.OK
+    assert [record["id"] for record in body["recorded"]] == [1, 2, 1]
+    assert server.inventory.change_seq() == seq + 1
+    assert stock(server) == {1: 14, 2: 7, 3: 10}
+
+
+def test_unknown_id_records_nothing(server):
+    status, body = post_movements(server, {"movements": [{"id": 1, "masuk": 5}, {"id": 77, "masuk": 1}]})
+    assert status == HTTPStatus.NOT_FOUND
+    assert body == {"recorded": [], "missing": [77]}
+    assert stock(server) == {1: 10, 2: 10, 3: 10}
+    assert server.inventory.recent_movements() == []
+
+
+def read_request(server, raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await server._read_request(reader)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_invalid_content_length_is_bad_request(server, length):
+    raw = f"POST /api/items HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+    with pytest.raises(api.HTTPError) as error:
+        read_request(server, raw)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("name", ["", "   ", None])
+def test_partial_update_keeps_name_required(server, name):
+    with pytest.raises(api.HTTPError) as error:
+        asyncio.run(server.update_item({"json": lambda: {"Nama Komponen": name}}, "1"))
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+    # Update parsial tanpa Nama Komponen tetap boleh
+    status, _ = asyncio.run(server.update_item({"json": lambda: {"Keterangan": "ok"}}, "1"))
+    assert status == HTTPStatus.OK
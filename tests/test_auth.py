@@ -0,0 +1,60 @@
+import pytest
+
+import auth
+
+SECRET = b"rahasia"
+
+
+def test_password_hash_roundtrip():
+    stored = auth.hash_password("s3cret", iterations=1000)
+    assert auth.verify_password("s3cret", stored)
+    assert not auth.verify_password("salah", stored)
+    assert not auth.verify_password("s3cret", "bukan-hash")
+
+
+def test_accounts_authenticate_and_roles():
+    accounts = auth.Accounts({
+        "ani": {"password_hash": auth.hash_password("a", iterations=1000), "role": "operator"},
+    })
+    assert accounts.authenticate("ani", "a") == "operator"
+    assert accounts.authenticate("ani", "b") is None
+    assert accounts.authenticate("budi", "a") is None
+    assert auth.has_role("operator", "viewer")
+    assert not auth.has_role("operator", "admin")
+    with pytest.raises(ValueError):
+        auth.Accounts({"x": {"password_hash": "h", "role": "root"}})
+
+
+def test_token_sign_and_verify(monkeypatch):
+    token = auth.issue_token("ani", SECRET, ttl=60)
+    assert auth.verify_token(token, SECRET) == "ani"
+    assert auth.verify_token(token, b"lain") is None
+
+    payload, _, signature = token.partition('.')
+    forged = auth._b64encode(b'{"u": "admin", "exp": 9999999999}')
+    assert auth.verify_token(f"{forged}.{signature}", SECRET) is None
+    assert auth.verify_token(f"{payload}.!!", SECRET) is None
+    assert auth.verify_token("", SECRET) is None
+
+    now = auth.time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + 61)
+    assert auth.verify_token(token, SECRET) is None
+
+
+def test_rate_limiter_burst_and_refill(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: clock[0])
+    limiter = auth.RateLimiter(burst=3, refill_seconds=10)
+
+    assert [limiter.allow("ani", "1.2.3.4") for _ in range(4)] == [True, True, True, False]
+    assert limiter.retry_after("ani") == pytest.approx(10)
+    # Key lain tidak ikut habis, tapi satu key yang habis menolak seluruh percobaan
+    assert limiter.allow("budi")
+    assert not limiter.allow("budi", "1.2.3.4")
+
+    clock[0] += 10
+    assert limiter.allow("ani")
+    assert not limiter.allow("ani")
+
+    limiter.reset("ani")
+    assert limiter.allow("ani")
@@ -0,0 +1,116 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+import storage
+from backups import BackupStore
+from conftest import make_rows
+
+
+def backup_store(tmp_path, **kwargs):
+    return BackupStore(str(tmp_path / "backups"), chunk_rows=10, **kwargs)
+
+
+def parsed(backend):
+    """Isi file seperti dibaca proses lain, urut per ID"""
+    df = storage.CsvBackend(backend.path).read()[0]
+    return df.sort_values('ID').reset_index(drop=True)
+
+
+def chunk_files(store):
+    return glob.glob(os.path.join(store.chunk_directory, "*.csv.gz"))
+
+
+def test_snapshot_reuses_unchanged_chunks(tmp_path, csv_backend):
+    store = backup_store(tmp_path)
+    csv_backend.save(make_rows(35))
+    df, version = csv_backend.read()
+    first = store.snapshot(df, version)
+    assert store.snapshot(df, version) == first
+    assert len(chunk_files(store)) == 4
+
+    csv_backend.update(12, {"Nama Komponen": "Diubah"})
+    df, version = csv_backend.read()
+    second = store.snapshot(df, version)
+    assert second["gen"] == first["gen"] + 1
+    assert store.changed_keys(first, second) == [1]
+    assert len(chunk_files(store)) == 5
+
+
+def test_retention_removes_unused_chunks(tmp_path, csv_backend):
+    store = backup_store(tmp_path, retention=2)
+    for i in range(4):
+        csv_backend.update(1, {"Nama Komponen": f"Versi {i}"})
+        store.snapshot(*csv_backend.read())
+    assert [manifest["gen"] for manifest in store.generations()] == [4, 3]
+    assert len(chunk_files(store)) == 2
+
+
+def test_restore_rewrites_only_changed_ranges(tmp_path, csv_backend):
+    store = backup_store(tmp_path)
+    csv_backend.save(make_rows(35))
+    gen = store.snapshot(*csv_backend.read())["gen"]
+    original = parsed(csv_backend)
+
+    csv_backend.update(5, {"Stok Akhir": 99})
+    csv_backend.delete(31)
+    assert store.restore(gen, csv_backend) == (2, 15)
+
+    pd.testing.assert_frame_equal(parsed(csv_backend), original, check_categorical=False)
+    # Data sebelum restore tersimpan sebagai generasi baru
+    assert store.latest()["reason"] == f"Sebelum restore #{gen}"
+    assert store.load(store.latest()["gen"])['ID'].tolist().count(31) == 0
+
+
+def test_restore_rows_touches_only_selected_ids(tmp_path, csv_backend):
+    store = backup_store(tmp_path)
+    csv_backend.save(make_rows(35))
+    gen = store.snapshot(*csv_backend.read())["gen"]
+    original = parsed(csv_backend).set_index('ID')
+
+    csv_backend.update_many({3: {"Stok Akhir": 1}, 4: {"Stok Akhir": 2}, 22: {"Stok Akhir": 3}})
+    csv_backend.delete(30)
+    csv_backend.insert(make_rows(1, start=36).iloc[0].to_dict())
+
+    # 36 tidak ada di generasi itu: ikut dihapus
+    assert store.restore_rows(gen, [3, 30, 36], csv_backend) == (3, 2)
+    df = parsed(csv_backend).set_index('ID')
+    assert df.index.tolist() == list(range(1, 36))
+    assert df.loc[3, 'Stok Akhir'] == original.loc[3, 'Stok Akhir']
+    assert df.loc[30, 'Nama Komponen'] == original.loc[30, 'Nama Komponen']
+    # ID lain tetap berisi perubahan setelah backup
+    assert (df.loc[4, 'Stok Akhir'], df.loc[22, 'Stok Akhir']) == (2, 3)
+    assert store.restore_rows(gen, [], csv_backend) == (0, 0)
+
+
+def test_diff_backup_against_current_data(inventory):
+    gen = inventory.create_backup("Awal")["gen"]
+    inventory.update_item(2, {"Nama Komponen": "Baru"})
+    inventory.delete_item(3)
+
+    result = inventory.diff_backup(gen)
+    assert result["removed"]['ID'].tolist() == [3]
+    assert result["changed"]['ID'].tolist() == [2]
+    changes = result["changes"].set_index("Kolom")
+    assert changes.loc["Nama Komponen", "Baru"] == "Baru"
+
+
+@pytest.mark.filterwarnings("error")
+def test_restore_rows_only_missing_ids(tmp_path, csv_backend):
+    store = backup_store(tmp_path)
+    gen = store.snapshot(*csv_backend.read())["gen"]
+    csv_backend.insert(make_rows(1, start=4).iloc[0].to_dict())
+
+    # Tidak ada baris dari generasi itu: rentang hanya dihapus
+    assert store.restore_rows(gen, [4], csv_backend) == (1, 0)
+    assert parsed(csv_backend)['ID'].tolist() == [1, 2, 3]
+
+
+def test_bulk_writes_follow_backup_schedule(inventory):
+    inventory.create_backup("Awal")
+    inventory.update_items({1: {"Stok Akhir": 4}, 2: {"Stok Akhir": 5}})
+    inventory.delete_items([3])
+    # Tidak ada snapshot penuh per panggilan; generasi berikutnya menunggu jadwal
+    assert [manifest["reason"] for manifest in inventory.backups.generations()] == ["Awal"]
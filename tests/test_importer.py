@@ -0,0 +1,94 @@
+import io
+
+import pytest
+
+import importer
+
+HEADER = "ID,Tanggal,Nama Komponen,Deskripsi,Jumlah Masuk,Jumlah Keluar,Stok Akhir,Lokasi Penyimpanan,Keterangan\n"
+
+
+def csv_file(*lines):
+    return io.BytesIO((HEADER + "".join(line + "\n" for line in lines)).encode('utf-8'))
+
+
+def ids(backend):
+    return backend.read()[0]['ID'].tolist()
+
+
+def test_replace_writes_all_rows(csv_backend):
+    result = importer.import_csv(csv_backend, csv_file(
+        "10,2026-10-18 10:00:00,Baru A,,1,0,1,Rak 2,",
+        "11,2026-10-18 10:00:00,Baru B,,2,0,2,Rak 2,",
+    ), mode='replace')
+    assert not result["aborted"]
+    assert result["inserted"] == 2
+    assert ids(csv_backend) == [10, 11]
+
+
+def test_replace_aborts_on_invalid_rows(csv_backend):
+    result = importer.import_csv(csv_backend, csv_file(
+        "10,2026-10-18 10:00:00,Baru A,,1,0,1,Rak 2,",
+        "x,2026-10-18 10:00:00,Baru B,,2,0,2,Rak 2,",
+        "12,2026-10-18 10:00:00,,,2,0,2,Rak 2,",
+    ), mode='replace')
+    assert result["aborted"]
+    assert result["inserted"] == 0
+    assert result["error_count"] == 2
+    assert [line for line, _ in result["errors"]] == [3, 4]
+    assert ids(csv_backend) == [1, 2, 3]
+
+
+def test_replace_aborts_without_valid_rows(csv_backend):
+    result = importer.import_csv(csv_backend, csv_file(), mode='replace')
+    assert result["aborted"]
+    assert ids(csv_backend) == [1, 2, 3]
+
+    result = importer.import_csv(csv_backend, csv_file("x,,,,1,0,1,,"), mode='replace', accept_partial=True)
+    assert result["aborted"]
+    assert ids(csv_backend) == [1, 2, 3]
+
+
+def test_replace_accept_partial_skips_invalid_rows(csv_backend):
+    result = importer.import_csv(csv_backend, csv_file(
+        "10,2026-10-18 10:00:00,Baru A,,1,0,1,Rak 2,",
+        "11,2026-10-18 10:00:00,Baru B,,dua,0,2,Rak 2,",
+    ), mode='replace', accept_partial=True)
+    assert not result["aborted"]
+    assert result["inserted"] == 1
+    assert result["errors"] == [(3, "Jumlah Masuk bukan angka")]
+    assert ids(csv_backend) == [10]
+
+
+def test_append_gives_new_ids_and_skips_invalid_rows(csv_backend):
+    file = io.BytesIO(
+        b"Nama Komponen,Jumlah Masuk,Jumlah Keluar,Stok Akhir\n"
+        b"Baru A,1,0,1\n"
+        b",1,0,1\n"
+        b"Baru B,2,0,2\n"
+    )
+    result = importer.import_csv(csv_backend, file, mode='append')
+    assert result["inserted"] == 2
+    assert result["error_count"] == 1
+    df = csv_backend.read()[0]
+    assert df['ID'].tolist() == [1, 2, 3, 4, 5]
+    assert df['Nama Komponen'].tolist()[3:] == ["Baru A", "Baru B"]
+
+
+def test_upsert_updates_existing_and_inserts_new(csv_backend):
+    result = importer.import_csv(csv_backend, csv_file(
+        "2,2026-10-18 10:00:00,Part 2 baru,,10,3,7,Rak 1,",
+        "20,2026-10-18 10:00:00,Baru,,5,0,5,Rak 2,",
+        "21,2026-10-18 10:00:00,Salah,,5,0,lima,Rak 2,",
+    ), mode='upsert')
+    assert (result["inserted"], result["updated"], result["error_count"]) == (1, 1, 1)
+    df = csv_backend.read()[0].set_index('ID')
+    assert df.index.tolist() == [1, 2, 3, 20]
+    assert df.loc[2, 'Nama Komponen'] == "Part 2 baru"
+    assert df.loc[2, 'Stok Akhir'] == 7
+
+
+def test_missing_columns_and_unknown_mode(csv_backend):
+    with pytest.raises(ValueError):
+        importer.import_csv(csv_backend, io.BytesIO(b"ID,Nama Komponen\n1,A\n"), mode='replace')
+    with pytest.raises(ValueError):
+        importer.import_csv(csv_backend, csv_file(), mode='merge')
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+import jobs
+
+
+def wait(runner, job_id):
+    for _ in range(200):
+        job = runner.get(job_id)
+        if job["status"] not in jobs.ACTIVE:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError("job tidak selesai")
+
+
+def set_owner(runner, job_id, host, pid):
+    with sqlite3.connect(runner.db_path) as conn:
+        conn.execute('UPDATE jobs SET host = ?, pid = ? WHERE id = ?', (host, pid, job_id))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_submit_runs_and_stores_result(tmp_path):
+    runner = jobs.JobRunner(str(tmp_path))
+    job = runner.submit("hitung", lambda job: {"total": 3}, label="Hitung")
+    assert (job["host"], job["pid"]) == (jobs.HOST, os.getpid())
+    job = wait(runner, job["id"])
+    assert job["status"] == "done"
+    assert runner.result(job) == {"total": 3}
+
+
+def other_process(tmp_path, monkeypatch, **kwargs):
+    """JobRunner di folder yang sama seolah-olah dari proses lain"""
+    pid = dead_pid()
+    with monkeypatch.context() as patch:
+        patch.setattr(jobs.os, "getpid", lambda: pid)
+        return jobs.JobRunner(str(tmp_path), **kwargs)
+
+
+def test_restart_fails_only_orphaned_jobs(tmp_path, monkeypatch):
+    runner = jobs.JobRunner(str(tmp_path), workers=3)
+    release = threading.Event()
+    ids = [runner.submit("tunggu", lambda job: release.wait(5) and {})["id"] for _ in range(3)]
+    # Job 0 milik proses ini (masih hidup), job 1 milik proses yang sudah
+    # mati, job 2 milik host lain
+    set_owner(runner, ids[1], jobs.HOST, dead_pid())
+    set_owner(runner, ids[2], "host-lain", 1)
+
+    other = other_process(tmp_path, monkeypatch)
+    assert [other.get(job_id)["status"] for job_id in ids] == ["running", "failed", "running"]
+    assert not other.cancel(ids[0])
+    release.set()
+    for job_id in ids:
+        wait(runner, job_id)
+
+
+def test_prune_keeps_artifacts_of_other_processes(tmp_path, monkeypatch):
+    runner = jobs.JobRunner(str(tmp_path))
+    release = threading.Event()
+
+    def write(job):
+        release.wait(5)
+        with open(job.artifact_path, 'w') as f:
+            f.write("isi")
+        return {}
+
+    job = runner.submit("export", write, artifact_name="hasil.txt")
+    other = other_process(tmp_path, monkeypatch, retention=0)
+    release.set()
+    job = wait(runner, job["id"])
+    assert job["status"] == "done"
+
+    other.prune()
+    assert other.get(job["id"])["status"] == "done"
+    assert other.read_artifact(job["id"]) == b"isi"
+    runner.retention = 0
+    runner.prune()
+    assert runner.get(job["id"]) is None
+    assert not os.path.exists(job["artifact"])
+
+
+@pytest.mark.parametrize("separate_process", [False, True])
+def test_excel_job_writes_artifact(tmp_path, inventory, separate_process):
+    runner = jobs.JobRunner(str(tmp_path / "jobs"))
+    job = runner.submit(
+        "excel", jobs.excel_task(inventory, separate_process=separate_process),
+        artifact_name="inventory.xlsx"
+    )
+    job = wait(runner, job["id"])
+    assert job["status"] == "done"
+    assert runner.result(job) == {"rows": 3, "bytes": os.path.getsize(job["artifact"])}
+    df = pd.read_excel(job["artifact"])
+    assert df["Nama Komponen"].tolist() == ["Part 1", "Part 2", "Part 3"]
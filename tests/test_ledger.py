@@ -0,0 +1,84 @@
+import json
+
+import ledger
+import storage
+
+
+def stock(backend, item_id):
+    df = backend.read()[0]
+    return df.loc[df['ID'] == item_id, 'Stok Akhir'].iloc[0]
+
+
+def records(backend):
+    with open(backend.ledger.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pending_resets_after_fold(tmp_path):
+    log = ledger.Ledger(str(tmp_path / "data.csv.movements.jsonl"))
+    log.append_fold(100)
+    log.append_movements([
+        {"id": 1, "masuk": 5},
+        {"id": 1, "keluar": 2},
+        {"id": 2, "koreksi": -1},
+    ])
+    pending, _ = log.pending(base_inode=100)
+    assert pending == {1: [5, 2, 3], 2: [0, 0, -1]}
+
+    log.append_fold(200)
+    assert log.pending(base_inode=200)[0] == {}
+    # File dengan inode lama (rename gagal) masih butuh saldo sebelum fold
+    assert log.pending(base_inode=100)[0] == {1: [5, 2, 3], 2: [0, 0, -1]}
+    assert log.cumulative() == {1: 3, 2: -1}
+
+
+def test_cumulative_at_uses_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "CHECKPOINT_EVERY", 2)
+    log = ledger.Ledger(str(tmp_path / "data.csv.movements.jsonl"))
+    for minute, masuk in enumerate([1, 2, 4, 8, 16]):
+        monkeypatch.setattr(ledger, "_now", lambda minute=minute: f"2026-10-18 09:0{minute}:00")
+        log.append_movement(7, masuk=masuk)
+
+    assert len(log._checkpoints()) == 2
+    assert log.cumulative_at("2026-10-18 08:59:59") == {}
+    assert log.cumulative_at("2026-10-18 09:00:00") == {7: 1}
+    assert log.cumulative_at("2026-10-18 09:02:30") == {7: 7}
+    assert log.cumulative_at("2026-10-18 09:04:00") == {7: 31}
+    assert log.cumulative() == {7: 31}
+
+
+def test_record_movement_appends_without_rewriting(csv_backend):
+    base = storage.file_version(csv_backend.path)
+    csv_backend.record_movement(2, masuk=5, keluar=1)
+    assert storage.file_version(csv_backend.path) == base
+    assert stock(csv_backend, 2) == 14
+    # Proses lain (parse dari file + ledger) melihat saldo yang sama
+    assert stock(storage.CsvBackend(csv_backend.path), 2) == 14
+
+
+def test_fold_is_not_counted_twice(csv_backend):
+    csv_backend.record_movement(1, masuk=3)
+    csv_backend.update_many({2: {"Stok Akhir": 4}}, catatan="Edit")
+    fresh = storage.CsvBackend(csv_backend.path)
+    assert stock(fresh, 1) == 13
+    assert stock(fresh, 2) == 4
+    assert [record.get("fold") is not None for record in records(csv_backend)] == [False, False, True]
+    assert records(csv_backend)[1]["koreksi"] == -6
+
+
+def test_update_item_is_one_commit_with_fresh_delta(inventory):
+    other = storage.CsvBackend(inventory.backend.path)
+    inventory.item(1)  # snapshot lama di instance ini
+    other.record_movement(1, masuk=5)
+
+    seq = inventory.change_seq()
+    assert inventory.update_item(1, {"Stok Akhir": 20, "Keterangan": "cek"})
+    assert inventory.change_seq() == seq + 1
+    movements = [record for record in records(inventory.backend) if "fold" not in record]
+    # Selisih dihitung dari 15 (termasuk pergerakan proses lain), bukan 10
+    assert movements[-1]["koreksi"] == 5
+    assert movements[-1]["catatan"] == "Edit barang"
+    row = inventory.item(1)
+    assert (row["Stok Akhir"], row["Keterangan"]) == (20, "cek")
+    assert stock(storage.CsvBackend(inventory.backend.path), 1) == 20
+    assert not inventory.update_item(99, {"Stok Akhir": 1})